@@ -0,0 +1,60 @@
+"""
+Compare the time taken to build a portfolio by adding holdings one at a time
+and in bulk.
+
+Usage: python benchmarks/bench_add_holdings.py [N_HOLDINGS]
+"""
+import datetime
+import sys
+import timeit
+
+import lisatools
+
+
+def make_holdings(n_holdings):
+    return [
+        lisatools.Holding(
+            lisatools.Fund(f"Fund {i}", 100.0 + i, date=datetime.date(2023, 1, 2)),
+            1.0,
+            1.0 / n_holdings,
+        )
+        for i in range(n_holdings)
+    ]
+
+
+def add_sequentially(holdings):
+    pf = lisatools.Portfolio()
+    for holding in holdings:
+        pf.add_holding(holding)
+    return pf
+
+
+def add_in_bulk(holdings):
+    pf = lisatools.Portfolio()
+    pf.add_holdings(holdings)
+    return pf
+
+
+def main(n_holdings=10_000):
+    for function in (add_sequentially, add_in_bulk):
+        seconds = min(
+            timeit.repeat(
+                "function(holdings)",
+                setup="holdings = make_holdings(n_holdings)",
+                number=1,
+                repeat=3,
+                globals={**globals(), "function": function, "n_holdings": n_holdings},
+            )
+        )
+        print(f"{function.__name__}: {seconds:.3f} s")
+
+    sequential = add_sequentially(make_holdings(n_holdings))
+    bulk = add_in_bulk(make_holdings(n_holdings))
+    error = max(
+        abs(a.target_fraction - b.target_fraction) for a, b in zip(sequential, bulk)
+    )
+    print(f"largest difference in target fractions: {error:.2e}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,44 @@
+"""
+Time a backtest of many allocation variants over years of daily prices.
+
+Usage: python benchmarks/bench_backtest.py [N_DATES] [N_FUNDS] [N_VARIANTS]
+"""
+import datetime
+import sys
+import timeit
+
+import numpy as np
+
+import lisatools
+from lisatools import backtest
+
+
+def main(n_dates=2520, n_funds=50, n_variants=1000):
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0003, 0.01, size=(n_dates, n_funds))
+    prices = 100.0 * np.exp(np.cumsum(returns, axis=0))
+    start = datetime.date(2013, 1, 1)
+    dates = [start + datetime.timedelta(days=i) for i in range(n_dates)]
+    pf = lisatools.Portfolio.from_funds(
+        [lisatools.Fund(f"Fund {i}", isin=f"GB{i:010d}") for i in range(n_funds)]
+    )
+    targets = rng.dirichlet(np.ones(n_funds), n_variants)
+
+    for schedule in ("monthly", "daily"):
+        seconds = min(
+            timeit.repeat(
+                lambda: backtest.backtest(
+                    pf, dates, prices, rebalance=schedule, targets=targets
+                ),
+                number=1,
+                repeat=3,
+            )
+        )
+        print(
+            f"{n_variants} variants of {n_funds} funds over {n_dates} dates, "
+            f"rebalanced {schedule}: {seconds:.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""
+Compare the time taken to start the CLI with lazy imports against importing
+all dependencies eagerly, as required when updating prices.
+
+Usage: python benchmarks/bench_import.py [REPEATS]
+"""
+import subprocess
+import sys
+import time
+
+statements = {
+    "lazy (python -m lisatools FILE)": "import lisatools.cli",
+    "eager (python -m lisatools -u FILE)": (
+        "import lisatools.cli, lisatools.scraping, lisatools.columnar; "
+        "lisatools.__version__"
+    ),
+}
+
+
+def measure(statement, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(repeats=10):
+    baseline = measure("pass", repeats)
+    print(f"{'interpreter startup':<40} {baseline * 1e3:6.1f} ms")
+    for name, statement in statements.items():
+        seconds = measure(statement, repeats) - baseline
+        print(f"{name:<40} {seconds * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,43 @@
+"""
+Compare the time taken to load a large portfolio saved in either JSON format.
+
+Usage: python benchmarks/bench_load.py [N_HOLDINGS] [N_FUNDS]
+"""
+import datetime
+import pathlib
+import sys
+import tempfile
+import timeit
+
+import lisatools
+
+
+def make_portfolio(n_holdings, n_funds):
+    funds = [
+        lisatools.Fund(
+            f"Fund {i}", 100.0 + i, isin=f"GB{i:010d}", date=datetime.date(2023, 1, 2)
+        )
+        for i in range(n_funds)
+    ]
+    holdings = [
+        lisatools.Holding(funds[i % n_funds], 1.0 + i, 1.0 / n_holdings)
+        for i in range(n_holdings)
+    ]
+    return lisatools.Portfolio(holdings)
+
+
+def main(n_holdings=100_000, n_funds=50):
+    pf = make_portfolio(n_holdings, n_funds)
+    with tempfile.TemporaryDirectory() as directory:
+        for version in (1, 2):
+            path = pathlib.Path(directory) / f"v{version}.json"
+            pf.save(path, silent=True, version=version)
+            size = path.stat().st_size / 1e6
+            seconds = min(
+                timeit.repeat(lambda: lisatools.Portfolio.load(path), number=1)
+            )
+            print(f"version {version}: {size:6.1f} MB, loaded in {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
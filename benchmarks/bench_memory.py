@@ -0,0 +1,97 @@
+"""
+Measure the memory used by a large portfolio of distinct funds, compared to
+the original classes with a per-instance __dict__, both for the holdings alone
+and for a Portfolio holding them.
+
+Usage: python benchmarks/bench_memory.py [N_HOLDINGS]
+"""
+import datetime
+import sys
+import tracemalloc
+
+import lisatools
+
+
+# copies of the data held by Fund, ETF, Holding and Portfolio before they had
+# __slots__
+
+
+class DictFund:
+    def __init__(self, description, price, *, isin="None", date=None):
+        self.description = description
+        self.isin = isin
+        self.price = price
+        self.date = date
+
+
+class DictETF(DictFund):
+    def __init__(self, name, price, *, ticker=None, isin="None", date=None):
+        self.name = name
+        self.description = name if ticker is None else f"{ticker}: {name}"
+        self.ticker = ticker
+        self.isin = isin
+        self.price = price
+        self.date = date
+
+
+class DictHolding:
+    def __init__(self, fund, units=1.0, target_fraction=0.0):
+        self.fund = fund
+        self.units = units
+        self.target_fraction = target_fraction
+
+
+class DictPortfolio:
+    def __init__(self, holdings=None):
+        self.holdings = list(holdings) if holdings is not None else []
+
+
+def make_holdings(n_holdings, fund_cls, etf_cls, holding_cls):
+    date = datetime.date(2023, 1, 2)
+    holdings = []
+    for i in range(n_holdings):
+        if i % 2:
+            fund = etf_cls(
+                f"ETF {i}", 10.0 + i, ticker=f"T{i}", isin=f"IE{i:010d}", date=date
+            )
+        else:
+            fund = fund_cls(f"Fund {i}", 100.0 + i, isin=f"GB{i:010d}", date=date)
+        holdings.append(holding_cls(fund, 1.0 + i, 1.0 / n_holdings))
+    return holdings
+
+
+def measure(n_holdings, portfolio_cls, *classes, lookup=False):
+    # memory used by the holdings, and by a portfolio of them
+    tracemalloc.start()
+    holdings = make_holdings(n_holdings, *classes)
+    holdings_size, _ = tracemalloc.get_traced_memory()
+    portfolio = portfolio_cls(holdings)
+    del holdings
+    if lookup:
+        # build the index of the portfolio
+        portfolio.get("GB0000000000")
+    portfolio_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del portfolio
+    return holdings_size, portfolio_size
+
+
+def main(n_holdings=100_000):
+    classes = (lisatools.Fund, lisatools.ETF, lisatools.Holding)
+    dicts = measure(n_holdings, DictPortfolio, DictFund, DictETF, DictHolding)
+    slotted = measure(n_holdings, lisatools.Portfolio, *classes)
+    indexed = measure(n_holdings, lisatools.Portfolio, *classes, lookup=True)
+    for label, (before, after) in [
+        ("__dict__", dicts),
+        ("__slots__", slotted),
+        ("__slots__, indexed", indexed),
+    ]:
+        print(
+            f"{n_holdings} holdings with {label + ':':<19} {before / 1e6:6.1f} MB, "
+            f"as a Portfolio: {after / 1e6:6.1f} MB"
+        )
+    print(f"saving for a Portfolio: {1 - slotted[1] / dicts[1]:.0%}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -1,11 +1,45 @@
-# read version from installed package
-from importlib.metadata import version
+import importlib
 
-__version__ = version("lisatools")
+# populate package namespace; modules with heavy dependencies (e.g. requests,
+# bs4 and numpy) are only imported on first access, see __getattr__ below
+from lisatools import history, io, tables
 
+from lisatools.fund import Fund, ETF, FundRegistry
+from lisatools.portfolio import Holding, Portfolio
 
-# populate package namespace
-from lisatools import io, scraping
 
-from lisatools.fund import Fund, ETF
-from lisatools.portfolio import Holding, Portfolio
+_lazy_modules = (
+    "analytics",
+    "backtest",
+    "batch",
+    "cache",
+    "columnar",
+    "projection",
+    "providers",
+    "rebalancing",
+    "scraping",
+    "server",
+    "store",
+)
+_lazy_attributes = {"ColumnarPortfolio": "columnar"}
+
+
+def __getattr__(name):
+    if name == "__version__":
+        # read version from installed package
+        from importlib.metadata import version
+
+        globals()["__version__"] = version("lisatools")
+        return globals()["__version__"]
+    if name in _lazy_modules:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _lazy_attributes:
+        module = importlib.import_module(f"{__name__}.{_lazy_attributes[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(
+        list(globals()) + ["__version__"] + list(_lazy_modules) + list(_lazy_attributes)
+    )
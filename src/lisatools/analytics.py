@@ -0,0 +1,489 @@
+import collections
+import datetime
+import math
+import threading
+import weakref
+
+import cachetools
+import numpy as np
+
+from lisatools.backtest import price_matrix
+from lisatools.history import PriceHistory
+
+
+PERIODS_PER_YEAR = 252
+"""Number of trading days in a year, used to annualise daily statistics."""
+
+# one LRU cache of analyses per price store
+_caches = weakref.WeakKeyDictionary()
+_cache_size = 64
+_lock = threading.Lock()
+
+
+def returns(prices):
+    """
+    Return the simple returns between consecutive prices.
+
+    Parameters
+    ----------
+    prices : array_like
+        Prices in chronological order, or a matrix of dates by funds (see
+        `lisatools.backtest.price_matrix`).
+
+    Returns
+    -------
+    numpy.ndarray
+        One row fewer than `prices`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    return prices[1:] / prices[:-1] - 1.0
+
+
+def volatility(returns, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Return the annualised standard deviation of returns (of each column).
+    """
+    return np.std(returns, axis=0, ddof=1) * math.sqrt(periods_per_year)
+
+
+def drawdown(values):
+    """
+    Return the relative fall of each value from the highest value before it,
+    as a non-negative fraction.
+    """
+    values = np.asarray(values, dtype=float)
+    return 1.0 - values / np.maximum.accumulate(values, axis=0)
+
+
+def max_drawdown(values):
+    """
+    Return the largest relative fall from a peak value to a later value, as a
+    non-negative fraction.
+    """
+    return np.max(drawdown(values), axis=0, initial=0.0)
+
+
+def covariance(returns, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Return the annualised covariance matrix of the returns of a number of
+    funds, given as a matrix of dates by funds.
+    """
+    return np.atleast_2d(np.cov(returns, rowvar=False, ddof=1)) * periods_per_year
+
+
+def risk_contributions(weights, covariance):
+    """
+    Return the contribution of each fund to the variance of a portfolio.
+
+    The contribution of fund `i` is `w_i (C w)_i / (w' C w)`, where `w` are
+    the weights and `C` the covariance matrix of the returns of the funds, so
+    that the contributions add up to one.
+
+    Parameters
+    ----------
+    weights : array_like
+        Fraction of the portfolio in each fund, e.g. the target fractions.
+    covariance : array_like
+        Covariance matrix of the returns of the funds.
+
+    Returns
+    -------
+    numpy.ndarray
+        NaN if the variance of the portfolio is zero.
+    """
+    weights = np.asarray(weights, dtype=float)
+    marginal = np.asarray(covariance, dtype=float) @ weights
+    variance = float(weights @ marginal)
+    if variance <= 0.0:
+        return np.full_like(weights, math.nan)
+    return weights * marginal / variance
+
+
+class RollingMoments:
+    """
+    Mean and variance of the latest `window` observations of a value, updated
+    in O(1) time per observation.
+
+    Parameters
+    ----------
+    window : int or None
+        Number of observations to include. If `None`, all observations are
+        included.
+
+    Example
+    -------
+    >>> moments = lisatools.analytics.RollingMoments(3)
+    >>> for x in [1.0, 2.0, 3.0, 4.0]:
+    ...     moments.update(x)
+    >>> moments.mean, moments.variance
+    (3.0, 1.0)
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self._values = collections.deque()
+        self.mean = math.nan
+        self._m2 = 0.0
+
+    def __repr__(self):
+        return f"<RollingMoments: {len(self)} of {self.window} observations>"
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, x):
+        """
+        Add an observation, dropping the oldest one if the window is full.
+        """
+        # Welford's algorithm, run backwards to remove the oldest value
+        self._values.append(x)
+        n = len(self._values)
+        mean = 0.0 if n == 1 else self.mean
+        delta = x - mean
+        self.mean = mean + delta / n
+        self._m2 += delta * (x - self.mean)
+        if self.window is not None and n > self.window:
+            old = self._values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self._m2 = max(self._m2 - delta * (old - self.mean), 0.0)
+
+    @property
+    def variance(self):
+        """
+        Sample variance of the observations in the window.
+        """
+        n = len(self._values)
+        return self._m2 / (n - 1) if n > 1 else math.nan
+
+    @property
+    def std(self):
+        """
+        Sample standard deviation of the observations in the window.
+        """
+        return math.sqrt(self.variance)
+
+
+class RollingCovariance:
+    """
+    Mean and covariance matrix of the latest `window` observations of a
+    vector, e.g. the returns of a number of funds, updated in O(1) time per
+    observation with respect to the size of the window.
+
+    Parameters
+    ----------
+    n : int
+        Number of elements of the observations.
+    window : int or None
+        Number of observations to include. If `None`, all observations are
+        included.
+    """
+
+    def __init__(self, n, window=None):
+        self.window = window
+        self._values = collections.deque()
+        self.mean = np.zeros(n)
+        self._comoment = np.zeros((n, n))
+
+    def __repr__(self):
+        return f"<RollingCovariance: {len(self)} of {self.window} observations>"
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, x):
+        """
+        Add an observation, dropping the oldest one if the window is full.
+        """
+        x = np.array(x, dtype=float)
+        self._values.append(x)
+        n = len(self._values)
+        delta = x - self.mean
+        self.mean = self.mean + delta / n
+        self._comoment += np.outer(delta, x - self.mean)
+        if self.window is not None and n > self.window:
+            old = self._values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean = self.mean - delta / n
+            self._comoment -= np.outer(delta, old - self.mean)
+
+    @property
+    def covariance(self):
+        """
+        Sample covariance matrix of the observations in the window.
+        """
+        n = len(self._values)
+        if n < 2:
+            return np.full_like(self._comoment, math.nan)
+        return self._comoment / (n - 1)
+
+
+class RollingDrawdown:
+    """
+    Fall of a value from the highest value of the latest `window`
+    observations, updated in amortised O(1) time per observation.
+
+    Parameters
+    ----------
+    window : int or None
+        Number of observations to take the peak over. If `None`, the peak is
+        the highest value observed.
+
+    Attributes
+    ----------
+    drawdown : float
+        Relative fall of the latest value from the peak, as a non-negative
+        fraction.
+    max_drawdown : float
+        Largest `drawdown` seen so far.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        # decreasing values, with the index of their observation; the first
+        # one is the peak of the window
+        self._peaks = collections.deque()
+        self._count = 0
+        self.drawdown = math.nan
+        self.max_drawdown = 0.0
+
+    def __repr__(self):
+        return f"<RollingDrawdown: {self.drawdown:.2%}, max {self.max_drawdown:.2%}>"
+
+    def update(self, value):
+        """
+        Add an observation.
+        """
+        while self._peaks and self._peaks[-1][1] <= value:
+            self._peaks.pop()
+        self._peaks.append((self._count, value))
+        if self.window is not None and self._peaks[0][0] <= self._count - self.window:
+            self._peaks.popleft()
+        self._count += 1
+        self.drawdown = 1.0 - value / self._peaks[0][1]
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+
+class RiskAnalysis:
+    """
+    Rolling risk and performance statistics of a portfolio held at fixed
+    target fractions, updated one observation of the fund prices at a time.
+
+    The portfolio is taken to be rebalanced to the target fractions at every
+    observation, so its return is the weighted mean of the returns of the
+    funds. Every update takes O(1) time with respect to the size of the
+    window, so that new prices can be added without recomputing the whole
+    window.
+
+    Parameters
+    ----------
+    targets : array_like
+        Target fraction of each fund.
+    window : int or None, default 252
+        Number of returns to compute the statistics over. If `None`, all
+        returns are included.
+    periods_per_year : float, default PERIODS_PER_YEAR
+        Number of observations per year, to annualise the statistics.
+
+    Attributes
+    ----------
+    end : datetime.date or None
+        Date of the latest observation.
+    prices : numpy.ndarray or None
+        Latest prices of the funds.
+    value : float
+        Value of the portfolio relative to the first observation.
+
+    Example
+    -------
+    >>> dates, prices = lisatools.backtest.price_matrix(histories)
+    >>> analysis = lisatools.analytics.RiskAnalysis([0.6, 0.4], window=63)
+    >>> analysis.extend(dates, prices)
+    >>> analysis.volatility(), analysis.risk_contributions()
+    """
+
+    def __init__(self, targets, window=252, periods_per_year=PERIODS_PER_YEAR):
+        self.targets = np.asarray(targets, dtype=float)
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.end = None
+        self.prices = None
+        self.value = 1.0
+        self._returns = RollingMoments(window)
+        self._fund_returns = RollingCovariance(len(self.targets), window)
+        self._drawdown = RollingDrawdown(window)
+        self._drawdown.update(self.value)
+
+    def __repr__(self):
+        return (
+            f"<RiskAnalysis: {len(self.targets)} funds, "
+            f"{len(self._returns)} returns up to {self.end}>"
+        )
+
+    def update(self, date, prices):
+        """
+        Add the prices of the funds on a date after the latest observation.
+        """
+        prices = np.array(prices, dtype=float)
+        if self.prices is not None:
+            fund_returns = prices / self.prices - 1.0
+            portfolio_return = float(self.targets @ fund_returns)
+            self.value *= 1.0 + portfolio_return
+            self._fund_returns.update(fund_returns)
+            self._returns.update(portfolio_return)
+            self._drawdown.update(self.value)
+        self.end = date
+        self.prices = prices
+
+    def extend(self, dates, prices):
+        """
+        Add the prices of the funds on a number of dates, as a matrix of dates
+        by funds (see `lisatools.backtest.price_matrix`).
+        """
+        for date, row in zip(dates, prices):
+            self.update(date, row)
+
+    def mean_return(self):
+        """
+        Annualised mean return of the portfolio over the window.
+        """
+        return self._returns.mean * self.periods_per_year
+
+    def volatility(self):
+        """
+        Annualised standard deviation of the returns of the portfolio over the
+        window.
+        """
+        return self._returns.std * math.sqrt(self.periods_per_year)
+
+    def drawdown(self):
+        """
+        Fall of the portfolio from its highest value in the window.
+        """
+        return self._drawdown.drawdown
+
+    def max_drawdown(self):
+        """
+        Largest fall of the portfolio from its highest value in the preceding
+        window, over all observations.
+        """
+        return self._drawdown.max_drawdown
+
+    def covariance(self):
+        """
+        Annualised covariance matrix of the returns of the funds over the
+        window.
+        """
+        return self._fund_returns.covariance * self.periods_per_year
+
+    def risk_contributions(self):
+        """
+        Contribution of each fund to the variance of the portfolio over the
+        window; see `risk_contributions`.
+        """
+        return risk_contributions(self.targets, self._fund_returns.covariance)
+
+
+def _fingerprint(portfolio):
+    return tuple((holding.fund.isin, holding.target_fraction) for holding in portfolio)
+
+
+def analyse(portfolio, store, window=252, *, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Return the rolling risk and performance statistics of a portfolio over the
+    price histories in a price store.
+
+    Results are cached per store, in an LRU cache keyed by the funds and
+    target fractions of the portfolio and the window. A repeated query does
+    not read the store at all if no prices were added to it since (see
+    `lisatools.store.PriceStore.revision`). Otherwise, if the prices added
+    are all after the latest date already analysed, only those are read and
+    added to the rolling statistics in O(1) time each; if not, the statistics
+    are computed afresh.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+    store : lisatools.store.PriceStore
+    window : int or None, default 252
+        Number of daily returns to compute the statistics over. If `None`, the
+        whole history is included.
+    periods_per_year : float, default PERIODS_PER_YEAR
+
+    Returns
+    -------
+    RiskAnalysis
+        Shared with later calls with the same arguments, which update it
+        while only prices after its `end` are added to the store.
+
+    Raises
+    ------
+    LookupError
+        If there are no stored prices for some fund.
+
+    Example
+    -------
+    >>> store = lisatools.store.PriceStore()
+    >>> analysis = lisatools.analytics.analyse(pf, store, window=63)
+    >>> analysis.volatility(), analysis.max_drawdown()
+    """
+    isins = [holding.fund.isin for holding in portfolio]
+    key = (_fingerprint(portfolio), window, periods_per_year)
+    with _lock:
+        cache = _caches.get(store)
+        if cache is None:
+            cache = _caches[store] = cachetools.LRUCache(maxsize=_cache_size)
+        # read before the prices, so that prices added meanwhile are seen
+        # by the next query
+        revision = store.revision()
+        entry = cache.get(key)
+        if entry is not None:
+            analysis, seen, count = entry
+            if seen == revision:
+                return analysis
+            if store.count(isins, end=analysis.end) != count:
+                # prices were added on or before the latest date analysed
+                entry = None
+
+        if entry is None:
+            histories = [store.history(isin) for isin in isins]
+            missing = [
+                holding.fund.description
+                for holding, history in zip(portfolio, histories)
+                if not history
+            ]
+            if missing:
+                raise LookupError("no stored prices for " + ", ".join(missing))
+            targets = [holding.target_fraction for holding in portfolio]
+            analysis = RiskAnalysis(targets, window, periods_per_year)
+            analysis.extend(*price_matrix(histories))
+        elif analysis.end is not None:
+            # only read prices after the latest observation, starting the new
+            # rows from its prices so that missing prices are filled in from
+            # them
+            end = analysis.end.toordinal()
+            start = analysis.end + datetime.timedelta(days=1)
+            histories = []
+            for isin, price in zip(isins, analysis.prices):
+                history = store.history(isin, start=start)
+                histories.append(
+                    PriceHistory.from_ordinals(
+                        [end, *history.ordinals], close=[price, *history.close]
+                    )
+                )
+            dates, prices = price_matrix(histories)
+            analysis.extend(dates[1:], prices[1:])
+
+        count = store.count(isins, end=analysis.end) if analysis.end else 0
+        cache[key] = (analysis, revision, count)
+        return analysis
+
+
+def clear_cache():
+    """
+    Clear the cache of `analyse`.
+    """
+    with _lock:
+        _caches.clear()
@@ -0,0 +1,228 @@
+import datetime
+
+import numpy as np
+
+
+_periods = {
+    "daily": lambda date: date.toordinal(),
+    "monthly": lambda date: (date.year, date.month),
+    "quarterly": lambda date: (date.year, (date.month - 1) // 3),
+    "yearly": lambda date: date.year,
+}
+
+
+def price_matrix(histories, start=None, end=None):
+    """
+    Align the closing prices of a number of price histories into a matrix of
+    dates by funds.
+
+    The dates are those on which any of the histories has a price, from the
+    first date on which all of them have one. Missing prices are filled in
+    with the latest earlier price.
+
+    Parameters
+    ----------
+    histories : sequence of lisatools.history.PriceHistory
+        One price history per fund, e.g. from `lisatools.store.PriceStore`.
+    start, end : datetime.date or None, default None
+        First and last date to include.
+
+    Returns
+    -------
+    dates : list of datetime.date
+    prices : numpy.ndarray
+        Array of shape (number of dates, number of histories).
+
+    Example
+    -------
+    >>> store = lisatools.store.PriceStore()
+    >>> dates, prices = lisatools.backtest.price_matrix(
+    ...     [store.history(holding.fund.isin) for holding in pf]
+    ... )
+    """
+    columns = []
+    for history in histories:
+        ordinals = np.asarray(history.ordinals, dtype=np.int64)
+        close = np.asarray(history.close, dtype=float)
+        present = ~np.isnan(close)
+        columns.append((ordinals[present], close[present]))
+    if not columns or any(len(ordinals) == 0 for ordinals, _ in columns):
+        return [], np.empty((0, len(columns)))
+
+    all_ordinals = np.unique(np.concatenate([ordinals for ordinals, _ in columns]))
+    first = max(ordinals[0] for ordinals, _ in columns)
+    if start is not None:
+        first = max(first, start.toordinal())
+    last = all_ordinals[-1] if end is None else end.toordinal()
+    all_ordinals = all_ordinals[(all_ordinals >= first) & (all_ordinals <= last)]
+
+    prices = np.empty((len(all_ordinals), len(columns)))
+    for j, (ordinals, close) in enumerate(columns):
+        latest = np.searchsorted(ordinals, all_ordinals, side="right") - 1
+        prices[:, j] = close[latest]
+    dates = [datetime.date.fromordinal(int(ordinal)) for ordinal in all_ordinals]
+    return dates, prices
+
+
+def _rebalance_rows(dates, schedule):
+    n_dates = len(dates)
+    if schedule is None:
+        return np.empty(0, dtype=np.intp)
+    if isinstance(schedule, str):
+        try:
+            period = _periods[schedule]
+        except KeyError:
+            raise ValueError(f"unknown rebalancing schedule {schedule!r}") from None
+        keys = [period(date) for date in dates]
+        return np.array(
+            [row for row in range(1, n_dates) if keys[row] != keys[row - 1]],
+            dtype=np.intp,
+        )
+    if isinstance(schedule, int):
+        if schedule < 1:
+            raise ValueError("rebalancing interval must be at least 1")
+        return np.arange(schedule, n_dates, schedule, dtype=np.intp)
+    # the first date on or after each of the given dates
+    ordinals = np.fromiter((date.toordinal() for date in dates), np.int64, n_dates)
+    wanted = np.fromiter((date.toordinal() for date in schedule), np.int64)
+    rows = np.searchsorted(ordinals, wanted, side="left")
+    return np.unique(rows[rows < n_dates])
+
+
+class BacktestResult:
+    """
+    Outcome of a backtest of one or more allocation variants.
+
+    Attributes
+    ----------
+    dates : list of datetime.date
+        Dates of the simulation.
+    values : numpy.ndarray
+        Total value of the portfolio on each date for each variant, as an
+        array of shape (number of dates, number of variants).
+    rebalance_dates : list of datetime.date
+        Dates on which the portfolio was rebalanced.
+    targets : numpy.ndarray
+        Target allocation of each variant, as an array of shape (number of
+        variants, number of funds).
+    """
+
+    def __init__(self, dates, values, rebalance_rows, targets, units, prices):
+        self.dates = dates
+        self.values = values
+        self.rebalance_dates = [dates[row] for row in rebalance_rows]
+        self.targets = targets
+        self._rebalance_rows = rebalance_rows
+        self._units = units
+        self._prices = prices
+
+    def __repr__(self):
+        n_dates, n_variants = self.values.shape
+        return (
+            f"<BacktestResult: {n_variants} variants over {n_dates} dates, "
+            f"{len(self.rebalance_dates)} rebalances>"
+        )
+
+    def trades(self):
+        """
+        Return the units of each fund bought (positive) or sold (negative) on
+        each rebalancing date for each variant, as an array of shape (number
+        of rebalances, number of variants, number of funds).
+        """
+        rows = self._rebalance_rows
+        values = self.values[rows]  # (rebalances, variants)
+        after = values[:, :, None] * self.targets / self._prices[rows][:, None, :]
+        before = np.concatenate(
+            [np.broadcast_to(self._units, (1, *self.targets.shape)), after[:-1]]
+        )
+        return after - before
+
+    def turnover(self):
+        """
+        Return the total value traded on each rebalancing date for each
+        variant, as an array of shape (number of rebalances, number of
+        variants).
+        """
+        prices = self._prices[self._rebalance_rows][:, None, :]
+        return np.abs(self.trades() * prices).sum(axis=2)
+
+
+def backtest(portfolio, dates, prices, *, rebalance="monthly", targets=None):
+    """
+    Simulate the value of a portfolio over time, rebalancing it to its target
+    allocation on a schedule.
+
+    The simulation starts from the units currently held in the portfolio, and
+    is vectorised over dates, funds and allocation variants: between
+    rebalancing dates, the value of each variant follows from a matrix product
+    of the price changes and the allocation, so that years of daily prices can
+    be simulated for many variants at once. Trades are assumed to be made at
+    the closing prices, without costs.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+    dates : sequence of datetime.date
+        Dates of the simulation, in increasing order.
+    prices : array_like
+        Price of each fund (in the order of the portfolio's holdings) on each
+        date, of shape (number of dates, number of holdings); see
+        `price_matrix`.
+    rebalance : str, int, iterable of datetime.date, or None, default "monthly"
+        When to rebalance: on the first date of each "daily", "monthly",
+        "quarterly" or "yearly" period after the start; every given number of
+        dates; on the first date on or after each of the given dates (which
+        includes the start if a date is not after it); or never.
+    targets : array_like or None, default None
+        Target allocation, or one target allocation per variant as an array
+        of shape (number of variants, number of holdings). Defaults to the
+        target fractions of the portfolio.
+
+    Returns
+    -------
+    BacktestResult
+
+    Example
+    -------
+    Compare 60/40 and 80/20 allocations, rebalanced quarterly.
+
+    >>> result = lisatools.backtest.backtest(
+    ...     pf, dates, prices, rebalance="quarterly", targets=[[0.6, 0.4], [0.8, 0.2]]
+    ... )
+    >>> result.values[-1]
+    """
+    prices = np.asarray(prices, dtype=float)
+    n_dates, n_funds = prices.shape
+    if n_dates != len(dates) or n_funds != len(portfolio):
+        raise ValueError("prices must have one row per date and one column per fund")
+    if n_dates == 0:
+        raise ValueError("no dates to simulate")
+    units = np.fromiter((holding.units for holding in portfolio), float, n_funds)
+    if targets is None:
+        targets = [holding.target_fraction for holding in portfolio]
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    if targets.shape[1] != n_funds:
+        raise ValueError("targets must have one column per fund")
+
+    rows = _rebalance_rows(dates, rebalance)
+    initial_value = float(units @ prices[0])
+    initial_weights = units * prices[0] / initial_value
+
+    # the portfolio is held in fixed units between consecutive anchors, i.e.
+    # the start and the rebalancing dates
+    anchors = np.union1d([0], rows)
+    segment = np.searchsorted(anchors, np.arange(n_dates), side="right") - 1
+    # growth of the value invested at the start of each segment
+    growth = (prices / prices[anchors][segment]) @ targets.T
+    steps = (prices[anchors[1:]] / prices[anchors[:-1]]) @ targets.T
+    if rows.size == 0 or rows[0] != 0:
+        # until the first rebalance, the initial holdings are kept instead
+        first = segment == 0
+        growth[first] = (prices[first] / prices[0] @ initial_weights)[:, None]
+        if len(anchors) > 1:
+            steps[0] = prices[anchors[1]] / prices[0] @ initial_weights
+    anchor_values = initial_value * np.concatenate(
+        [np.ones((1, targets.shape[0])), np.cumprod(steps, axis=0)]
+    )
+    values = anchor_values[segment] * growth
+    return BacktestResult(list(dates), values, rows, targets, units, prices)
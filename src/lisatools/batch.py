@@ -0,0 +1,137 @@
+import concurrent.futures
+import itertools
+import json
+import os
+import pathlib
+
+from lisatools import io
+from lisatools.fund import FundRegistry
+from lisatools.portfolio import Portfolio
+
+
+def read_portfolios(source, *, registry=None):
+    """
+    Read named portfolios from a directory or a JSONL stream.
+
+    Funds are shared between all the portfolios read, so that a price update
+    of a fund reaches every portfolio holding it.
+
+    Parameters
+    ----------
+    source : path-like object
+        Either a directory, in which case every "*.json" file in it is loaded
+        as a portfolio named after the file, or a JSONL file, with one portfolio
+        per line encoded as an object with keys "name" and "holdings". Lines
+        without a name are named after their line number.
+    registry : lisatools.fund.FundRegistry or None, default None
+        Registry in which the funds are interned. If unspecified, a new
+        registry is used for all the portfolios read.
+
+    Yields
+    ------
+    name : str
+    portfolio : lisatools.Portfolio
+    """
+    if registry is None:
+        registry = FundRegistry()
+    source = pathlib.Path(source)
+    if source.is_dir():
+        for path in sorted(source.glob("*.json")):
+            yield path.stem, Portfolio.load(path, registry=registry)
+        return
+    decoder = io.JSONDecoder(registry=registry)
+    with open(source, "r") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            d = decoder.decode(line)
+            yield str(d.get("name", line_number)), Portfolio(d["holdings"])
+
+
+def write_portfolio(name, portfolio, handle):
+    """
+    Write a named portfolio as a single line of JSON, in the format read by
+    `read_portfolios`.
+    """
+    d = {"name": name, "holdings": portfolio.holdings}
+    handle.write(json.dumps(d, cls=io.JSONEncoder, allow_nan=False) + "\n")
+
+
+def update_prices(portfolios, **kwargs):
+    """
+    Update the fund prices of many portfolios at once.
+
+    Each distinct fund price is only retrieved once, however many portfolios
+    hold the fund. Funds read by `read_portfolios` are shared between the
+    portfolios, so each of them is also only updated once.
+
+    Parameters
+    ----------
+    portfolios : iterable of lisatools.Portfolio
+    **kwargs
+        Optional keyword arguments passed to `lisatools.Portfolio.update_prices`.
+
+    Returns
+    -------
+    errors : list
+        For each portfolio, the list of per-holding errors as returned by
+        `lisatools.Portfolio.update_prices`.
+    """
+    portfolios = list(portfolios)
+    combined = Portfolio(
+        holding for portfolio in portfolios for holding in portfolio.holdings
+    )
+    errors = iter(combined.update_prices(**kwargs))
+    return [list(itertools.islice(errors, len(pf))) for pf in portfolios]
+
+
+def _rebalance_chunk(chunk):
+    return [(name, *portfolio.trade_to_target()) for name, portfolio in chunk]
+
+
+def rebalance_many(portfolios, *, max_workers=None, chunksize=64):
+    """
+    Calculate the trades required to rebalance many portfolios to their target
+    allocations, spreading the work over a pool of processes.
+
+    Results are yielded as soon as they are available, so they are not
+    necessarily in the order of the input. At most a few chunks per worker
+    are submitted ahead of the results being consumed, so that arbitrarily
+    long streams of portfolios can be processed in bounded memory.
+
+    Parameters
+    ----------
+    portfolios : iterable
+        Pairs of a name and a `lisatools.Portfolio`, e.g. as yielded by
+        `read_portfolios`.
+    max_workers : int or None, default None
+        Number of worker processes. Defaults to the number of processors.
+    chunksize : int, default 64
+        Number of portfolios sent to a worker at once.
+
+    Yields
+    ------
+    name : str
+    buy : lisatools.Portfolio
+    sell : lisatools.Portfolio
+        As returned by `lisatools.Portfolio.trade_to_target`.
+    """
+    portfolios = iter(portfolios)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_pending = 2 * max_workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        pending = set()
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(itertools.islice(portfolios, chunksize))
+                if not chunk:
+                    break
+                pending.add(executor.submit(_rebalance_chunk, chunk))
+            if not pending:
+                return
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                yield from future.result()
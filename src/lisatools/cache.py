@@ -0,0 +1,229 @@
+import math
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+from lisatools.history import PriceHistory
+
+
+_schema_version = 4
+
+# Entries are ordered by use through a counter rather than a timestamp, which
+# may not advance between two uses on a coarse clock
+_next_use = "SELECT COALESCE(MAX(used), 0) + 1 FROM pages"
+
+
+def default_path():
+    """
+    Return the default location of the on-disk price cache.
+
+    The cache is stored in the `lisatools` subdirectory of `$XDG_CACHE_HOME`,
+    falling back to `~/.cache` if that environment variable is not set.
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(root) / "lisatools" / "prices.sqlite"
+
+
+class PriceCache:
+    """
+    Persistent cache of parsed price histories, stored in an SQLite database.
+
+    Entries are keyed by the URL the price history was retrieved from and hold
+    the parsed rows of the `lisatools.history.PriceHistory`, so that repeated
+    runs within the time-to-live do not need to access the network at all.
+
+    Parameters
+    ----------
+    path : path-like object, str, or None, default None
+        Location of the database file. If unspecified, the location given by
+        `default_path` is used. Use ":memory:" for a cache that is not
+        persisted.
+    ttl : float, default 3600.0
+        Time-to-live of the cache entries in seconds.
+    maxsize : int, default 1024
+        Maximum number of price histories held. When exceeded, the least
+        recently used entries are evicted.
+
+    Example
+    -------
+    >>> cache = lisatools.cache.PriceCache(":memory:", ttl=60.0)
+    >>> history = lisatools.history.PriceHistory(
+    ...     [datetime.date(2023, 1, 2)], close=[1.0]
+    ... )
+    >>> cache.put("https://example.com", history)
+    >>> cache.get("https://example.com") == history
+    True
+    """
+
+    def __init__(self, path=None, *, ttl=3600.0, maxsize=1024):
+        if path is None:
+            path = default_path()
+        if str(path) != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != _schema_version:
+            # Cached data is disposable, so simply start afresh
+            self._connection.executescript(
+                f"""
+                DROP TABLE IF EXISTS pages;
+                DROP TABLE IF EXISTS rows;
+                CREATE TABLE pages (
+                    url TEXT PRIMARY KEY,
+                    fetched REAL NOT NULL,
+                    used INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                );
+                CREATE TABLE rows (
+                    url TEXT NOT NULL,
+                    date INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (url, date)
+                ) WITHOUT ROWID;
+                CREATE INDEX pages_used ON pages (used);
+                PRAGMA user_version = {_schema_version};
+                """
+            )
+
+    def __repr__(self):
+        return (
+            f"PriceCache({str(self.path)!r}, ttl={self.ttl!r}, "
+            f"maxsize={self.maxsize!r})"
+        )
+
+    def __len__(self):
+        with self._lock:
+            (n,) = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()
+        return n
+
+    def get(self, url):
+        """
+        Return the cached `lisatools.history.PriceHistory` for a URL, or `None`
+        if the URL is not cached or its entry has expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            page = self._connection.execute(
+                "SELECT fetched FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if page is None or now - page[0] > self.ttl:
+                return None
+            self._connection.execute(
+                f"UPDATE pages SET used = ({_next_use}) WHERE url = ?", (url,)
+            )
+            return self._history(url)
+
+    def get_stale(self, url):
+        """
+        Return the cached price history for a URL regardless of its age,
+        together with the validators needed for a conditional request.
+
+        Returns
+        -------
+        tuple or None
+            The `lisatools.history.PriceHistory`, and the ETag and Last-Modified
+            headers (or `None`) of the response it was parsed from. `None` if
+            the URL is not cached at all.
+        """
+        with self._lock:
+            page = self._connection.execute(
+                "SELECT etag, last_modified FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if page is None:
+                return None
+            return (self._history(url), *page)
+
+    def put(self, url, history, *, etag=None, last_modified=None):
+        """
+        Store the `lisatools.history.PriceHistory` retrieved from a URL,
+        replacing any previously cached history, and evict the least recently
+        used entries if the cache is full.
+
+        The ETag and Last-Modified headers of the response can be stored to
+        allow conditional requests once the entry has expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM rows WHERE url = ?", (url,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, fetched, used, etag, last_modified) "
+                f"VALUES (?, ?, ({_next_use}), ?, ?)",
+                (url, now, etag, last_modified),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO rows "
+                "(url, date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (url, *row)
+                    for row in zip(
+                        history.ordinals,
+                        history.open,
+                        history.high,
+                        history.low,
+                        history.close,
+                        history.volume,
+                    )
+                ),
+            )
+            self._evict()
+
+    def touch(self, url):
+        """
+        Mark the cached entry for a URL as freshly retrieved, e.g. after the
+        server confirmed that it has not been modified.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"UPDATE pages SET fetched = ?, used = ({_next_use}) WHERE url = ?",
+                (now, url),
+            )
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM rows")
+            self._connection.execute("DELETE FROM pages")
+
+    def close(self):
+        """
+        Close the connection to the underlying database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _history(self, url):
+        rows = self._connection.execute(
+            "SELECT date, open, high, low, close, volume FROM rows "
+            "WHERE url = ? ORDER BY date",
+            (url,),
+        ).fetchall()
+        columns = list(zip(*rows)) if rows else [()] * 6
+        ordinals, *values = columns
+        return PriceHistory.from_ordinals(
+            ordinals,
+            *[[math.nan if v is None else v for v in column] for column in values],
+        )
+
+    def _evict(self):
+        stale = self._connection.execute(
+            "SELECT url FROM pages ORDER BY used DESC LIMIT -1 OFFSET ?",
+            (self.maxsize,),
+        ).fetchall()
+        self._connection.executemany("DELETE FROM rows WHERE url = ?", stale)
+        self._connection.executemany("DELETE FROM pages WHERE url = ?", stale)
@@ -1,9 +1,123 @@
 import argparse
+import sys
 
+from lisatools import batch, io
 from lisatools.fund import Fund
 from lisatools.portfolio import Holding, Portfolio
 
 
+def _add_cash(pf, value):
+    cash = Fund("Cash", price=100.0)
+    pf.add_fund(cash, value=value, target=0.0)
+
+
+def _trades(buy, sell):
+    buy_holdings = buy.holdings
+    sell_holdings = [
+        Holding(h.fund, -h.units, h.target_fraction) for h in sell.holdings
+    ]
+    return Portfolio(buy_holdings + sell_holdings)
+
+
+def _report_errors(pf, errors):
+    for holding, error in zip(pf.holdings, errors):
+        if error is not None:
+            print(
+                f"could not update {holding.fund.description}: {error}",
+                file=sys.stderr,
+            )
+
+
+def _rebalance_within_cash(pf, options, name=None):
+    from lisatools import rebalancing  # deferred, to keep imports fast
+
+    buy, sell, cash = rebalancing.rebalance(
+        pf,
+        cash=options.cash_added or 0.0,
+        lot_sizes=dict(options.lot_sizes),
+        min_trade=options.min_trade,
+        buy_only=options.buy_only,
+    )
+    prefix = "" if name is None else f"{name}: "
+    print(f"{prefix}cash left over: {cash:.2f}", file=sys.stderr)
+    return _trades(buy, sell)
+
+
+def _lot_size(arg):
+    key, sep, units = arg.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=UNITS, got {arg!r}")
+    return key, float(units)
+
+
+def _address(arg):
+    host, sep, port = arg.rpartition(":")
+    try:
+        return (host if sep else "127.0.0.1"), int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected [HOST:]PORT, got {arg!r}")
+
+
+def _serve(options):
+    from lisatools import server  # deferred, to keep imports fast
+
+    server.serve(
+        options.input,
+        options.serve,
+        refresh_interval=options.refresh_interval,
+        lot_sizes=dict(options.lot_sizes),
+    )
+
+
+def _read_prices(path):
+    with open(path, "r", newline="") as handle:
+        return io.read_prices_csv(handle)
+
+
+def _report_prices(report):
+    for fund in report["unmatched"]:
+        print(f"no price for {fund.description}", file=sys.stderr)
+    for fund in report["stale"]:
+        print(f"stale price for {fund.description} ({fund.date})", file=sys.stderr)
+
+
+def _main_batch(options):
+    portfolios = batch.read_portfolios(options.input)
+
+    if options.update:
+        portfolios = list(portfolios)
+        errors = batch.update_prices(pf for _, pf in portfolios)
+        for (_, pf), pf_errors in zip(portfolios, errors):
+            _report_errors(pf, pf_errors)
+
+    if options.prices_file is not None:
+        prices = _read_prices(options.prices_file)
+        portfolios = list(portfolios)
+        for _, pf in portfolios:
+            _report_prices(pf.apply_prices(prices))
+
+    if options.cash_added is not None and not options.constrained:
+        portfolios = list(portfolios)
+        for _, pf in portfolios:
+            _add_cash(pf, options.cash_added)
+
+    if options.rebalance:
+        trades = batch.rebalance_many(portfolios, max_workers=options.jobs)
+        portfolios = ((name, _trades(buy, sell)) for name, buy, sell in trades)
+    elif options.constrained:
+        portfolios = (
+            (name, _rebalance_within_cash(pf, options, name)) for name, pf in portfolios
+        )
+
+    if options.output_file is None:
+        for name, pf in portfolios:
+            batch.write_portfolio(name, pf, sys.stdout)
+    else:
+        with open(options.output_file, "w") as handle:
+            for name, pf in portfolios:
+                batch.write_portfolio(name, pf, handle)
+
+
 def main(args=None):
     parser = argparse.ArgumentParser(
         prog="python -m lisatools",
@@ -11,7 +125,11 @@ def main(args=None):
     )
     parser.add_argument(
         "input",
-        help="Input file containing portfolio data in JSON format.",
+        help=(
+            "Input file containing portfolio data in JSON format, or in "
+            "line-delimited JSON format if its name ends in .jsonl "
+            "(or, with --batch, a directory or JSONL file of portfolios)."
+        ),
         metavar="FILE",
     )
     actions = parser.add_argument_group(
@@ -28,6 +146,16 @@ def main(args=None):
         help="update price data",
         action="store_true",
     )
+    actions.add_argument(
+        "-p",
+        "--prices",
+        help=(
+            "update price data in bulk from a CSV file with columns "
+            "ISIN, price and date"
+        ),
+        dest="prices_file",
+        metavar="FILE",
+    )
     actions.add_argument(
         "-c",
         "--add-cash",
@@ -46,7 +174,10 @@ def main(args=None):
     parser.add_argument(
         "-o",
         "--output",
-        help="output to file (if no file specified, print to terminal)",
+        help=(
+            "output to file (if no file specified, print to terminal); "
+            "JSON output is line-delimited if the file name ends in .jsonl"
+        ),
         dest="output_file",
         metavar="FILE",
     )
@@ -58,27 +189,146 @@ def main(args=None):
         ),
         action=argparse.BooleanOptionalAction,
     )
+    parser.add_argument(
+        "--batch",
+        help=(
+            "treat the input as a directory of JSON portfolios or a JSONL file "
+            "with one portfolio per line, and output one line of JSON per "
+            "portfolio "
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes used in batch mode (default: all CPUs)",
+        type=int,
+        metavar="N",
+    )
+    constraints = parser.add_argument_group(
+        "rebalancing constraints",
+        description=(
+            "Rebalance using only the cash added (see --add-cash) and the "
+            "proceeds of sales, trading funds in whole lots. Any of the "
+            "constraints below implies --rebalance-within-cash."
+        ),
+    )
+    constraints.add_argument(
+        "--rebalance-within-cash",
+        help=(
+            "calculate the achievable trades that bring the portfolio closest "
+            "to the target allocations"
+        ),
+        action="store_true",
+        dest="constrained",
+    )
+    constraints.add_argument(
+        "--buy-only",
+        help="never sell holdings",
+        action="store_true",
+    )
+    constraints.add_argument(
+        "--min-trade",
+        help="minimum value of a trade (default: 0)",
+        type=float,
+        default=0.0,
+        metavar="VALUE",
+    )
+    constraints.add_argument(
+        "--lot-size",
+        help=(
+            "number of units of the fund with the given ticker symbol or ISIN "
+            "traded at a time (default: 1 for ETFs, any amount otherwise); "
+            "can be repeated"
+        ),
+        type=_lot_size,
+        action="append",
+        default=[],
+        dest="lot_sizes",
+        metavar="KEY=UNITS",
+    )
+    watch = parser.add_argument_group(
+        "watch mode",
+        description=(
+            "Keep running and answer rebalancing queries over HTTP, reloading "
+            "the input file whenever it changes. GET /portfolio returns the "
+            "portfolio, and GET /rebalance the trades required to rebalance it, "
+            "optionally given the parameters cash, constrained, buy_only, "
+            "min_trade and lot_size (see above). Any --lot-size options apply "
+            "to constrained queries."
+        ),
+    )
+    watch.add_argument(
+        "--serve",
+        help="listen for queries on the given port (default host: 127.0.0.1)",
+        type=_address,
+        metavar="[HOST:]PORT",
+    )
+    watch.add_argument(
+        "--refresh-interval",
+        help="update price data on start-up and then every SECONDS seconds",
+        type=float,
+        metavar="SECONDS",
+    )
     options = parser.parse_args(args)  # if args == None, uses sys.argv[1:]
 
+    if options.serve is not None:
+        if options.batch or options.output_file is not None:
+            parser.error("--serve cannot be combined with --batch or --output")
+        if (
+            options.update
+            or options.prices_file is not None
+            or options.cash_added is not None
+            or options.rebalance
+            or options.constrained
+            or options.buy_only
+            or options.min_trade
+        ):
+            parser.error(
+                "--serve cannot be combined with actions; "
+                "pass them as parameters of the queries instead"
+            )
+        _serve(options)
+        return
+    if options.refresh_interval is not None:
+        parser.error("--refresh-interval requires --serve")
+
+    if options.buy_only or options.min_trade or options.lot_sizes:
+        options.constrained = True
+    if options.constrained and options.rebalance:
+        parser.error("--rebalance cannot be combined with rebalancing constraints")
+
+    if options.batch:
+        _main_batch(options)
+        return
+
     if options.json is None:
         options.json = options.output_file is not None
 
-    pf = Portfolio.load(options.input)
+    if options.input.endswith(".jsonl"):
+        pf = Portfolio.load_jsonl(options.input)
+    else:
+        pf = Portfolio.load(options.input)
 
     if options.update:
-        pf.update_prices()
+        errors = pf.update_prices()
+        _report_errors(pf, errors)
 
-    if options.cash_added is not None:
-        cash = Fund("Cash", price=100.0)
-        pf.add_fund(cash, value=options.cash_added, target=0.0)
+    if options.prices_file is not None:
+        _report_prices(pf.apply_prices(_read_prices(options.prices_file)))
+
+    if options.cash_added is not None and not options.constrained:
+        _add_cash(pf, options.cash_added)
 
     if options.rebalance:
         buy, sell = pf.trade_to_target()
-        buy_holdings = buy.holdings
-        sell_holdings = [
-            Holding(h.fund, -h.units, h.target_fraction) for h in sell.holdings
-        ]
-        pf = Portfolio(buy_holdings + sell_holdings)
+        pf = _trades(buy, sell)
+    elif options.constrained:
+        pf = _rebalance_within_cash(pf, options)
+
+    if options.json and str(options.output_file).endswith(".jsonl"):
+        pf.save_jsonl(options.output_file)
+        return
 
     s = pf.save(file=None, silent=True) if options.json else str(pf)
     if options.output_file is None:
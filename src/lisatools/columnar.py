@@ -0,0 +1,205 @@
+import numpy as np
+
+from lisatools.portfolio import Holding, Portfolio, _str_line, _str_prefix
+
+
+def _fund_array(funds):
+    array = np.empty(len(funds), dtype=object)
+    array[:] = funds
+    return array
+
+
+class ColumnarPortfolio:
+    """
+    A portfolio stored as columns of fund details, units held and target
+    allocations, for fast vectorised calculations on large numbers of
+    holdings.
+
+    The prices are copied from the funds when the portfolio is constructed;
+    use `refresh_prices` after updating the funds' prices.
+
+    Attributes
+    ----------
+    funds : numpy.ndarray
+        The funds held, as an array of `lisatools.Fund`s (with dtype object).
+    units : numpy.ndarray
+        Number of units held of each fund.
+    prices : numpy.ndarray
+        Price of one unit of each fund.
+    target_fractions : numpy.ndarray
+        Fraction of the total portfolio that should be allocated towards each
+        fund.
+
+    Parameters
+    ----------
+    funds : sequence of lisatools.Fund
+    units : array_like or None, default None
+        Defaults to one unit of each fund.
+    target_fractions : array_like or None, default None
+        Defaults to equal fractions of each fund, all adding up to 1.
+    prices : array_like or None, default None
+        Defaults to the current prices of the funds.
+
+    Example
+    -------
+    >>> pf = lisatools.Portfolio.load("portfolio.json")
+    >>> cpf = lisatools.ColumnarPortfolio.from_portfolio(pf)
+    >>> buy, sell = cpf.trade_to_target()
+    >>> buy.to_portfolio()
+    """
+
+    def __init__(self, funds=(), units=None, target_fractions=None, prices=None):
+        self.funds = _fund_array(funds)
+        n_funds = len(self.funds)
+        if units is None:
+            units = np.ones(n_funds)
+        if target_fractions is None:
+            target_fractions = np.full(n_funds, 1.0 / n_funds if n_funds else 0.0)
+        if prices is None:
+            prices = np.fromiter((fund.price for fund in funds), float, n_funds)
+        self.units = np.asarray(units, dtype=float)
+        self.target_fractions = np.asarray(target_fractions, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        for name in ("units", "target_fractions", "prices"):
+            if getattr(self, name).shape != (n_funds,):
+                raise ValueError(f"unequal lengths for funds and {name}")
+
+    def __repr__(self):
+        return (
+            f"ColumnarPortfolio({list(self.funds)!r}, {self.units!r}, "
+            f"{self.target_fractions!r}, {self.prices!r})"
+        )
+
+    def __str__(self):
+        values = self.values()
+        lines = "\n".join(
+            _str_line(
+                fund.description,
+                self.units[i],
+                values[i],
+                self.target_fractions[i],
+                fund.isin,
+                fund.date,
+            )
+            for i, fund in enumerate(self.funds)
+        )
+        return _str_prefix + "\n" + lines
+
+    def __len__(self):
+        return len(self.funds)
+
+    def __getitem__(self, key):
+        """
+        Select holdings by integer position (returning a `lisatools.Holding`),
+        or by slice, boolean mask or array of positions (returning a new
+        `ColumnarPortfolio`).
+        """
+        if isinstance(key, (int, np.integer)):
+            return Holding(self.funds[key], self.units[key], self.target_fractions[key])
+        cls = type(self)
+        return cls(
+            self.funds[key],
+            self.units[key],
+            self.target_fractions[key],
+            self.prices[key],
+        )
+
+    def __eq__(self, other):
+        return (
+            len(self) == len(other)
+            and all(a == b for a, b in zip(self.funds, other.funds))
+            and np.array_equal(self.units, other.units)
+            and np.array_equal(self.target_fractions, other.target_fractions)
+            and np.array_equal(self.prices, other.prices)
+        )
+
+    @classmethod
+    def from_portfolio(cls, portfolio):
+        """
+        Construct a columnar portfolio from a `lisatools.Portfolio`.
+
+        The funds are shared between both portfolios.
+        """
+        holdings = portfolio.holdings
+        n_holdings = len(holdings)
+        return cls(
+            [holding.fund for holding in holdings],
+            np.fromiter((h.units for h in holdings), float, n_holdings),
+            np.fromiter((h.target_fraction for h in holdings), float, n_holdings),
+        )
+
+    def to_portfolio(self):
+        """
+        Convert to a `lisatools.Portfolio` holding the same funds.
+        """
+        holdings = [
+            Holding(fund, units, target)
+            for fund, units, target in zip(
+                self.funds, self.units.tolist(), self.target_fractions.tolist()
+            )
+        ]
+        return Portfolio(holdings)
+
+    def refresh_prices(self):
+        """
+        Copy the current prices of the funds into the `prices` column.
+        """
+        self.prices = np.fromiter(
+            (fund.price for fund in self.funds), float, len(self.funds)
+        )
+
+    def values(self):
+        """
+        Return the value of each holding based on the `prices` column.
+        """
+        return self.units * self.prices
+
+    def total_value(self):
+        """
+        Return the total value of all the holdings based on the `prices`
+        column.
+        """
+        return float(self.units @ self.prices)
+
+    def target_portfolio(self):
+        """
+        Construct the 'ideal' target portfolio based on the allocation fractions
+        of the original.
+
+        See also
+        --------
+        lisatools.Portfolio.target_portfolio
+        """
+        target_units = self.target_fractions * self.total_value() / self.prices
+        cls = type(self)
+        return cls(self.funds, target_units, self.target_fractions, self.prices)
+
+    def trade_to_target(self, target_portfolio=None):
+        """
+        Return the required buy and sell instructions to reach the target
+        portfolio, which must hold the same funds in the same order.
+
+        Returns
+        -------
+        buy : ColumnarPortfolio
+            Funds to purchase to reach the target. Positive `units` values
+            indicate the number of units that must be bought.
+        sell : ColumnarPortfolio
+            Funds to sell to reach the target. Positive `units` values indicate
+            the number of units that must be sold.
+
+        See also
+        --------
+        lisatools.Portfolio.trade_to_target
+        """
+        if target_portfolio is None:
+            target_portfolio = self.target_portfolio()
+        elif len(target_portfolio) != len(self):
+            raise ValueError("target portfolio must hold the same funds")
+
+        diff = target_portfolio.units - self.units
+        buy = self[diff > 0]
+        buy.units = diff[diff > 0]
+        sell = self[diff < 0]
+        sell.units = -diff[diff < 0]
+        return buy, sell
@@ -1,7 +1,58 @@
 import datetime
+import weakref
 
 
-class Fund:
+class _Observable:
+    """
+    Base class of objects that notify observers (e.g. a
+    `lisatools.portfolio.ValueTracker`) of changes to their value.
+
+    Observers are held through weak references and are not copied or pickled
+    along with the object. They must implement a `_changed(subject)` method.
+    """
+
+    __slots__ = ("_observers",)
+
+    def _attach(self, observer):
+        observers = self._observers
+        if observers is None:
+            observers = self._observers = []
+        elif len(observers) >= 8 and not len(observers) & (len(observers) - 1):
+            # every time the list doubles in length, drop the observers that no
+            # longer exist (e.g. trackers that were not closed)
+            observers[:] = [ref for ref in observers if ref() is not None]
+        observers.append(weakref.ref(observer))
+
+    def _detach(self, observer):
+        if self._observers is not None:
+            self._observers = [ref for ref in self._observers if ref() is not observer]
+
+    def _notify(self):
+        if not self._observers:
+            return
+        alive = []
+        for ref in self._observers:
+            observer = ref()
+            if observer is not None:
+                observer._changed(self)
+                alive.append(ref)
+        self._observers = alive
+
+    def __getstate__(self):
+        return {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if name != "_observers"
+        }
+
+    def __setstate__(self, state):
+        self._observers = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Fund(_Observable):
     """
     Details of a fund, including its current market price.
 
@@ -33,6 +84,9 @@ class Fund:
     ...                    date=datetime.date(2022, 11, 1))
     """
 
+    # no per-instance __dict__, to keep large portfolios compact
+    __slots__ = ("description", "_price", "isin", "date")
+
     def __init__(
         self,
         description="Default fund",
@@ -41,6 +95,7 @@ class Fund:
         isin="None",  # UNSPECIFIED9 is a valid ISIN
         date=None,
     ):
+        self._observers = None
         self.description = description
         self.isin = isin
         self.update_price(price, date=date)
@@ -59,11 +114,24 @@ class Fund:
             and self.isin == other.isin
         )
 
+    @property
+    def price(self):
+        return self._price
+
+    @price.setter
+    def price(self, price):
+        self._price = price
+        if self._observers:
+            self._notify()
+
     def update_price(self, price, *, date=None):
         """
         Set the price of the fund to a given value and optionally specify the
         date at which this price is correct.
 
+        Trackers of portfolios holding the fund (see
+        `lisatools.Portfolio.track`) are notified of the new price.
+
         Parameters
         ----------
         price : float
@@ -166,7 +234,10 @@ class ETF(Fund):
     ...     date=datetime.date(2022, 11, 21))
     """
 
+    __slots__ = ("name", "ticker")
+
     def __init__(self, name, price=1.0, *, ticker=None, isin="None", date=None):
+        self._observers = None
         self.name = name
         if ticker is None:
             self.description = name
@@ -218,3 +289,74 @@ class ETF(Fund):
             isin=d.get("ISIN", "None"),
             date=d.get("date", None),
         )
+
+
+def fund_key(fund):
+    """
+    Return the key identifying a fund: the ticker symbol of an ETF, or
+    otherwise the ISIN. Returns `None` if the fund has neither.
+    """
+    ticker = getattr(fund, "ticker", None)
+    if ticker is not None:
+        return ticker
+    if fund.isin != "None":
+        return fund.isin
+    return None
+
+
+class FundRegistry:
+    """
+    Identity map of funds, so that each distinct fund is represented by a
+    single `Fund` object.
+
+    Funds are identified by `fund_key`, i.e. by ticker symbol for ETFs and by
+    ISIN otherwise. Funds without either are never interned.
+
+    Example
+    -------
+    >>> registry = lisatools.fund.FundRegistry()
+    >>> f1 = registry.intern(lisatools.Fund("Fund 1", 1.0, isin="GB00BD3RZ582"))
+    >>> f2 = registry.intern(lisatools.Fund("Fund 1", 1.0, isin="GB00BD3RZ582"))
+    >>> f1 is f2
+    True
+    """
+
+    def __init__(self, funds=()):
+        self._funds = {}
+        for fund in funds:
+            self.intern(fund)
+
+    def __repr__(self):
+        return f"FundRegistry({list(self._funds.values())!r})"
+
+    def __len__(self):
+        return len(self._funds)
+
+    def __iter__(self):
+        return iter(self._funds.values())
+
+    def __contains__(self, key):
+        return key in self._funds
+
+    def get(self, key, default=None):
+        """
+        Return the fund registered under a key (see `fund_key`), or `default`
+        if there is none.
+        """
+        return self._funds.get(key, default)
+
+    def intern(self, fund):
+        """
+        Return the registered fund with the same key as `fund`, registering
+        `fund` itself if there is none.
+
+        If `fund` has a more recent price than the registered fund, the
+        registered fund's price is updated to it.
+        """
+        key = fund_key(fund)
+        if key is None:
+            return fund
+        registered = self._funds.setdefault(key, fund)
+        if registered is not fund and fund.date > registered.date:
+            registered.update_price(fund.price, date=fund.date)
+        return registered
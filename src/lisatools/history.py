@@ -0,0 +1,151 @@
+import array
+import bisect
+import datetime
+import math
+
+
+_columns = ("open", "high", "low", "close", "volume")
+
+
+class PriceHistory:
+    """
+    Daily price history of a fund, stored column by column.
+
+    Each column is a compact `array.array`, so that the history can be handed to
+    numerical libraries without copying (e.g. using `numpy.asarray`). Rows are
+    kept in chronological order. Missing values are represented by NaN.
+
+    Attributes
+    ----------
+    ordinals : array.array
+        Dates of the rows as proleptic Gregorian ordinals (see
+        `datetime.date.toordinal`), in increasing order.
+    open, high, low, close, volume : array.array
+        Prices and traded volume on each date.
+
+    Parameters
+    ----------
+    dates : iterable of datetime.date, default ()
+    open, high, low, close, volume : iterable of float, default ()
+        If left unspecified, filled with NaN.
+
+    Example
+    -------
+    >>> h = lisatools.history.PriceHistory(
+    ...     [datetime.date(2023, 1, 2), datetime.date(2023, 1, 3)],
+    ...     close=[170.14, 171.02],
+    ... )
+    >>> h.latest()
+    (171.02, datetime.date(2023, 1, 3))
+    """
+
+    def __init__(self, dates=(), open=(), high=(), low=(), close=(), volume=()):
+        ordinals = (date.toordinal() for date in dates)
+        self._set_columns(ordinals, open, high, low, close, volume)
+
+    def _set_columns(self, ordinals, *columns):
+        self.ordinals = array.array("l", ordinals)
+        n_rows = len(self.ordinals)
+        for name, values in zip(_columns, columns):
+            column = array.array("d", values)
+            if len(column) == 0:
+                column = array.array("d", [math.nan]) * n_rows
+            elif len(column) != n_rows:
+                raise ValueError(f"unequal lengths for dates and {name}")
+            setattr(self, name, column)
+        if any(a > b for a, b in zip(self.ordinals, self.ordinals[1:])):
+            raise ValueError("dates must be in increasing order")
+
+    def __repr__(self):
+        return f"PriceHistory({len(self)} rows, {self.start!r} to {self.end!r})"
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __iter__(self):
+        return self.rows()
+
+    def __eq__(self, other):
+        return self.ordinals == other.ordinals and all(
+            _equal_nan(getattr(self, name), getattr(other, name)) for name in _columns
+        )
+
+    @property
+    def dates(self):
+        """
+        Dates of the rows as a list of `datetime.date`s.
+        """
+        return [datetime.date.fromordinal(ordinal) for ordinal in self.ordinals]
+
+    @property
+    def start(self):
+        """
+        Date of the first row, or `None` for an empty history.
+        """
+        return datetime.date.fromordinal(self.ordinals[0]) if self else None
+
+    @property
+    def end(self):
+        """
+        Date of the last row, or `None` for an empty history.
+        """
+        return datetime.date.fromordinal(self.ordinals[-1]) if self else None
+
+    def rows(self):
+        """
+        Iterate over the rows of the history as (date, open, high, low, close,
+        volume) tuples in chronological order.
+        """
+        for i, ordinal in enumerate(self.ordinals):
+            yield (datetime.date.fromordinal(ordinal),) + tuple(
+                getattr(self, name)[i] for name in _columns
+            )
+
+    @classmethod
+    def from_ordinals(cls, ordinals, open=(), high=(), low=(), close=(), volume=()):
+        """
+        Construct a price history from dates given as proleptic Gregorian
+        ordinals (see `datetime.date.toordinal`) in increasing order.
+        """
+        history = cls.__new__(cls)
+        history._set_columns(ordinals, open, high, low, close, volume)
+        return history
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Construct a price history from (date, open, high, low, close, volume)
+        tuples given in any order.
+        """
+        rows = sorted(rows, key=lambda row: row[0])
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return cls(*columns)
+
+    def latest(self):
+        """
+        Return the closing price on the most recent date and that date.
+        """
+        if not self:
+            raise LookupError("empty price history")
+        return self.close[-1], self.end
+
+    def as_of(self, date):
+        """
+        Return the most recent closing price on or before a given date, and
+        the date of that price.
+
+        Raises
+        ------
+        LookupError
+            If the history does not contain any prices on or before `date`.
+        """
+        i = bisect.bisect_right(self.ordinals, date.toordinal())
+        if i == 0:
+            raise LookupError(f"no prices on or before {date}")
+        return self.close[i - 1], datetime.date.fromordinal(self.ordinals[i - 1])
+
+
+def _equal_nan(a, b):
+    return len(a) == len(b) and all(
+        x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b)
+    )
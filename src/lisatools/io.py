@@ -1,13 +1,16 @@
-from lisatools.fund import ETF, Fund
+from lisatools.fund import ETF, Fund, FundRegistry
 from lisatools.portfolio import Holding
 
+import csv
 import datetime
 import json
 
 
 class JSONDecoder(json.JSONDecoder):
-    def __init__(self, **kwargs):
+    def __init__(self, *, registry=None, **kwargs):
         json.JSONDecoder.__init__(self, object_hook=self.parse_dict, **kwargs)
+        # funds are interned, so that equal funds decode to a single object
+        self.registry = FundRegistry() if registry is None else registry
 
     def parse_dict(self, d):
         if "fund" in d:
@@ -16,10 +19,10 @@ class JSONDecoder(json.JSONDecoder):
         elif "ISIN" in d:
             if "ticker" in d:
                 # assume it's an ETF
-                return ETF.from_dict(d)
+                return self.registry.intern(ETF.from_dict(d))
             else:
                 # assume it's a regular Fund
-                return Fund.from_dict(d)
+                return self.registry.intern(Fund.from_dict(d))
         else:
             return d
 
@@ -33,3 +36,194 @@ class JSONEncoder(json.JSONEncoder):
         except AttributeError:
             d = super().default(obj)
         return d
+
+
+SCHEMA_VERSION = 2
+
+_fund_types = {"Fund": Fund, "ETF": ETF}
+
+
+def encode_portfolio(holdings):
+    """
+    Encode holdings in the schema-versioned portfolio format.
+
+    In this format, every distinct fund is stored once in a table of funds,
+    tagged with its type. The holdings are stored column by column and refer
+    to the funds by their position in the table. Equal funds are stored only
+    once, even if they are different objects.
+
+    Parameters
+    ----------
+    holdings : iterable of lisatools.Holding
+
+    Returns
+    -------
+    dict
+        The encoded portfolio, which can be serialised using `JSONEncoder`.
+
+    See also
+    --------
+    decode_portfolio
+    """
+    funds = []
+    fund_indices = {}  # by id, to avoid encoding funds more than once
+    table_indices = {}  # by content, to store equal funds only once
+    columns = {"fund": [], "units": [], "target_fraction": []}
+    for holding in holdings:
+        fund = holding.fund
+        index = fund_indices.get(id(fund))
+        if index is None:
+            d = {"type": type(fund).__name__, **fund.as_dict()}
+            key = tuple(d.items())
+            index = table_indices.setdefault(key, len(funds))
+            if index == len(funds):
+                funds.append(d)
+            fund_indices[id(fund)] = index
+        columns["fund"].append(index)
+        columns["units"].append(holding.units)
+        columns["target_fraction"].append(holding.target_fraction)
+    return {"version": SCHEMA_VERSION, "funds": funds, "holdings": columns}
+
+
+def decode_portfolio(d, *, registry=None):
+    """
+    Construct holdings from a portfolio in the schema-versioned format.
+
+    Every fund in the table of funds is constructed exactly once, so holdings
+    of the same fund share a single `lisatools.Fund` object.
+
+    Parameters
+    ----------
+    d : dict
+        The portfolio as returned by `encode_portfolio`, or as parsed from JSON
+        without an object hook.
+    registry : lisatools.fund.FundRegistry or None, default None
+        If specified, the funds are interned in this registry, so that they are
+        shared with other portfolios decoded using the same registry.
+
+    Returns
+    -------
+    list of lisatools.Holding
+
+    See also
+    --------
+    encode_portfolio
+    """
+    version = d.get("version")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"unsupported portfolio schema version {version!r}")
+    funds = [_fund_types[f["type"]].from_dict(f) for f in d["funds"]]
+    if registry is not None:
+        funds = [registry.intern(fund) for fund in funds]
+    columns = d["holdings"]
+    return [
+        Holding(funds[index], units, target)
+        for index, units, target in zip(
+            columns["fund"], columns["units"], columns["target_fraction"]
+        )
+    ]
+
+
+def loads(s, *, registry=None):
+    """
+    Construct holdings from a JSON string in either portfolio format.
+
+    The schema-versioned format (a JSON object) is decoded in bulk by
+    `decode_portfolio`; the original format (a JSON array of holdings) is
+    decoded by `JSONDecoder`.
+
+    Parameters
+    ----------
+    s : str
+    registry : lisatools.fund.FundRegistry or None, default None
+        Registry in which the funds are interned. If unspecified, funds are
+        only shared between holdings in `s`.
+
+    Returns
+    -------
+    list of lisatools.Holding
+    """
+    if registry is None:
+        registry = FundRegistry()
+    if s.lstrip().startswith("{"):
+        return decode_portfolio(json.loads(s), registry=registry)
+    return json.loads(s, cls=JSONDecoder, registry=registry)
+
+
+def dump_jsonl(holdings, handle):
+    """
+    Write holdings to a file object in line-delimited JSON format, one holding
+    per line.
+
+    Holdings are encoded one at a time, so `holdings` can be any iterable,
+    including a generator.
+
+    Parameters
+    ----------
+    holdings : iterable of lisatools.Holding
+    handle : file object
+        Text file opened for writing.
+    """
+    encoder = JSONEncoder(allow_nan=False)
+    for holding in holdings:
+        handle.write(encoder.encode(holding))
+        handle.write("\n")
+
+
+def load_jsonl(handle, *, registry=None):
+    """
+    Read holdings one at a time from a file object in line-delimited JSON
+    format.
+
+    Blank lines are skipped. Since every line is decoded independently, the
+    holdings on complete lines of a truncated file are yielded before an error
+    is raised for the truncated line.
+
+    Parameters
+    ----------
+    handle : file object
+        Text file opened for reading.
+    registry : lisatools.fund.FundRegistry or None, default None
+        Registry in which the funds are interned. If unspecified, funds are
+        only shared between holdings read from `handle`.
+
+    Yields
+    ------
+    lisatools.Holding
+    """
+    decoder = JSONDecoder(registry=registry)
+    for line in handle:
+        if line.strip():
+            yield decoder.decode(line)
+
+
+def read_prices_csv(handle):
+    """
+    Read fund prices from a CSV file object, e.g. an end-of-day price file.
+
+    The file must have a header row with the columns "ISIN" (or "key", to
+    identify funds by `lisatools.fund.fund_key`), "price" and "date" (in ISO
+    format); any other columns are ignored. Each distinct date string is only
+    parsed once.
+
+    Parameters
+    ----------
+    handle : file object
+        Text file opened for reading, with `newline=""`.
+
+    Returns
+    -------
+    dict
+        Pairs of price and date, keyed by ISIN (or key).
+    """
+    reader = csv.DictReader(handle)
+    key_column = "key" if "key" in (reader.fieldnames or ()) else "ISIN"
+    dates = {}
+    prices = {}
+    for row in reader:
+        date_str = row["date"]
+        date = dates.get(date_str)
+        if date is None:
+            date = dates[date_str] = datetime.date.fromisoformat(date_str)
+        prices[row[key_column]] = (float(row["price"]), date)
+    return prices
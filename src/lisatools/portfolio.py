@@ -1,7 +1,14 @@
+import collections.abc
+import concurrent.futures
+import datetime
+import functools
+import itertools
 import json
+import math
 import operator
 
-from lisatools import io, scraping
+from lisatools import io
+from lisatools.fund import FundRegistry, _Observable, fund_key
 
 
 _str_prefix = """
@@ -24,7 +31,28 @@ def _str_line(description, units, value, target, isin, date):
     return line
 
 
-class Holding:
+def _join_holdings(holdings, target_holdings):
+    # hash join on fund key, returning (fund, units, target units, target
+    # fraction) in order of first appearance
+    joined = {}
+    for units_index, side in ((1, holdings), (2, target_holdings)):
+        for holding in side:
+            key = fund_key(holding.fund)
+            if key is None:
+                key = id(holding.fund)
+            entry = joined.get(key)
+            if entry is None:
+                entry = joined[key] = [
+                    holding.fund,
+                    0.0,
+                    0.0,
+                    holding.target_fraction,
+                ]
+            entry[units_index] += holding.units
+    return joined.values()
+
+
+class Holding(_Observable):
     """
     Specification of a fund with units held and target allocation.
 
@@ -47,9 +75,17 @@ class Holding:
     >>> lisatools.Holding(f, 1.234, 0.5)
     """
 
+    # no per-instance __dict__, to keep large portfolios compact
+    __slots__ = ("_fund", "_units", "target_fraction")
+
+    # number of times the fund of any holding was replaced, so that portfolios
+    # can tell that their index is out of date
+    _fund_changes = 0
+
     def __init__(self, fund, units=1.0, target_fraction=0.0):
-        self.fund = fund
-        self.units = units
+        self._observers = None
+        self._fund = fund
+        self._units = units
         self.target_fraction = target_fraction
 
     def __repr__(self):
@@ -73,12 +109,33 @@ class Holding:
             and self.target_fraction == other.target_fraction
         )
 
+    @property
+    def fund(self):
+        return self._fund
+
+    @fund.setter
+    def fund(self, fund):
+        self._fund = fund
+        Holding._fund_changes += 1
+        if self._observers:
+            self._notify()
+
+    @property
+    def units(self):
+        return self._units
+
+    @units.setter
+    def units(self, units):
+        self._units = units
+        if self._observers:
+            self._notify()
+
     def value(self):
         """
         Return the value of the holding based on the latest fund price
         available.
         """
-        return self.units * self.fund.price
+        return self._units * self.fund.price
 
     def _str_line(self):
         line = " ".join(
@@ -121,15 +178,225 @@ class Holding:
         )
 
 
+# versions of all holdings lists, so that no two lists share a version
+_versions = itertools.count()
+
+
+class _Holdings(list):
+    """
+    List of the holdings of a portfolio, whose version changes whenever it is
+    modified in place, so that a portfolio can tell when its index is out of
+    date.
+    """
+
+    __slots__ = ("_version",)
+
+    def __init__(self, holdings=()):
+        super().__init__(holdings)
+        self._version = next(_versions)
+
+    def _modified(self):
+        self._version = next(_versions)
+
+
+def _modifies(name):
+    method = getattr(list, name)
+
+    @functools.wraps(method)
+    def modify(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._modified()
+        return result
+
+    return modify
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "reverse",
+    "sort",
+):
+    setattr(_Holdings, _name, _modifies(_name))
+
+
+class _ExactSum:
+    """
+    Sum of floats that stays exact as terms are added, so that it does not
+    drift however many values are added and taken away again (Shewchuk's
+    algorithm, as used by `math.fsum`).
+    """
+
+    __slots__ = ("_partials",)
+
+    def __init__(self):
+        # non-overlapping partial sums in increasing order of magnitude
+        self._partials = []
+
+    def add(self, x):
+        partials = self._partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def __float__(self):
+        return math.fsum(self._partials)
+
+
+class ValueTracker:
+    """
+    Values of the holdings of a portfolio and its total value, kept up to
+    date as units and fund prices change.
+
+    `Portfolio.total_value` and `Portfolio.drift` revisit every holding. A
+    tracker instead observes the holdings and their funds, and recalculates
+    only the values of the holdings affected by a change, which pays off when
+    few prices change between queries of a large portfolio. While it is open,
+    it holds memory for every holding and slows down changes to prices and
+    units, so it should be closed when no longer needed.
+
+    Holdings added with `Portfolio.add_holding`, `Portfolio.add_holdings` or
+    `Portfolio.merge` are tracked as they are added. Any other change to the
+    `holdings` list (e.g. sorting it or replacing a holding), or replacing
+    the fund of a holding, causes the values to be recalculated in full when
+    they are next needed.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+        The portfolio to track.
+
+    Example
+    -------
+    >>> with pf.track() as tracker:
+    ...     pf[0].fund.update_price(180.0)
+    ...     tracker.total_value()
+    """
+
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+        self._subjects = {}
+        self._track()
+
+    def __repr__(self):
+        return f"<ValueTracker of {len(self._values)} holdings>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stop observing the holdings and funds of the portfolio. The tracker
+        starts observing them again if it is used afterwards.
+        """
+        for subject in self._subjects.values():
+            subject._detach(self)
+        self._subjects = {}
+        self._revision = None
+
+    def _track(self):
+        self.close()
+        self._revision = self.portfolio._revision()
+        # positions of the holdings affected by a change to a holding or fund
+        self._positions = {}
+        self._values = []
+        self._sum = _ExactSum()
+        self._watch_new()
+
+    def _watch_new(self):
+        holdings = self.portfolio.holdings
+        for position in range(len(self._values), len(holdings)):
+            holding = holdings[position]
+            for subject in (holding, holding.fund):
+                positions = self._positions.get(id(subject))
+                if positions is None:
+                    self._positions[id(subject)] = [position]
+                    self._subjects[id(subject)] = subject
+                    subject._attach(self)
+                else:
+                    positions.append(position)
+            value = holding.value()
+            self._values.append(value)
+            self._sum.add(value)
+
+    def _sync(self):
+        if self._revision != self.portfolio._revision():
+            self._track()
+        elif len(self._values) != len(self.portfolio.holdings):
+            # holdings were only appended
+            self._watch_new()
+
+    def _changed(self, subject):
+        if self._revision != self.portfolio._revision():
+            return
+        holdings = self.portfolio.holdings
+        for position in self._positions.get(id(subject), ()):
+            value = holdings[position].value()
+            self._sum.add(value)
+            self._sum.add(-self._values[position])
+            self._values[position] = value
+
+    def total_value(self):
+        """
+        Return the total value of all the holdings, as
+        `Portfolio.total_value`.
+        """
+        self._sync()
+        total = float(self._sum)
+        if not math.isfinite(total):
+            # the exact sum does not survive infinite or NaN values
+            self._sum = _ExactSum()
+            for value in self._values:
+                self._sum.add(value)
+            total = math.fsum(self._values)
+        return total
+
+    def drift(self):
+        """
+        Return the difference between the current and the target allocation of
+        each holding, as `Portfolio.drift`.
+        """
+        total = self.total_value()
+        return [
+            (value / total if total else 0.0) - holding.target_fraction
+            for value, holding in zip(self._values, self.portfolio.holdings)
+        ]
+
+
 class Portfolio:
     """
     A collection of funds held in defined amounts with target allocations.
 
+    Holdings can be looked up by the ticker symbol or ISIN of their fund (see
+    `get`), through an index that is built when first needed and kept up to
+    date as holdings are added. To keep the value of a large portfolio up to
+    date as prices change, see `track`.
+
     Attributes
     ----------
     holdings: list
         The funds held with their units held and target allocations, as a list
-        of `lisatools.Holding`s.
+        of `lisatools.Holding`s. Assigning a list to `holdings` stores a copy
+        of it.
 
     Example
     -------
@@ -141,7 +408,68 @@ class Portfolio:
     """
 
     def __init__(self, holdings=None):
-        self.holdings = list(holdings) if holdings is not None else []
+        self.holdings = holdings if holdings is not None else []
+
+    @property
+    def holdings(self):
+        return self._holdings
+
+    @holdings.setter
+    def holdings(self, holdings):
+        self._holdings = _Holdings(holdings)
+        # positions of the first holding of each ticker symbol or ISIN, and of
+        # each fund without either
+        self._index = None
+        self._identities = None
+        self._index_revision = None
+
+    def __getstate__(self):
+        return {"holdings": list(self._holdings)}
+
+    def __setstate__(self, state):
+        self.holdings = state["holdings"]
+
+    def _revision(self):
+        # changes whenever the holdings are modified other than by _append
+        return (self._holdings._version, Holding._fund_changes)
+
+    def _lookup(self):
+        revision = self._revision()
+        if self._index is None or self._index_revision != revision:
+            self._index = {}
+            self._identities = {}
+            self._index_revision = revision
+            for position, holding in enumerate(self._holdings):
+                self._add_to_index(position, holding)
+        return self._index
+
+    def _add_to_index(self, position, holding):
+        fund = holding.fund
+        key = fund_key(fund)
+        if key is None:
+            # funds without a ticker symbol or ISIN are matched by identity
+            self._identities.setdefault(id(fund), position)
+            return
+        self._index.setdefault(key, position)
+        isin = fund.isin
+        if isin != "None" and isin != key:
+            self._index.setdefault(isin, position)
+
+    def _append(self, holding):
+        # add a holding without invalidating the index
+        holdings = self._holdings
+        list.append(holdings, holding)
+        if self._index is not None:
+            self._add_to_index(len(holdings) - 1, holding)
+
+    def _position(self, fund):
+        # position of the first holding of a fund, matched by key or identity
+        index = self._lookup()
+        for key in (fund_key(fund), fund.isin):
+            position = index.get(key)
+            if position is not None:
+                return position
+        return self._identities.get(id(fund))
 
     def __repr__(self):
         holdings_repr = ", ".join(f"{holding!r}" for holding in self.holdings)
@@ -174,18 +502,76 @@ class Portfolio:
         index = operator.index(key)
         return self.holdings[index]
 
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item in self._lookup()
+        return item in self._holdings
+
     def __eq__(self, other):
         return self.holdings == other.holdings
 
+    def get(self, key, default=None):
+        """
+        Return the first holding of the fund with a given ticker symbol or
+        ISIN, or `default` if there is none.
+
+        Holdings are looked up through an index kept up to date as holdings
+        are added, so the time taken does not depend on the size of the
+        portfolio. The index is rebuilt after any other change to `holdings`,
+        or to the fund of a holding.
+
+        Example
+        -------
+        >>> pf.get("GB00BD3RZ582")
+        >>> "VGOV" in pf
+        True
+        """
+        position = self._lookup().get(key)
+        return self._holdings[position] if position is not None else default
+
     def total_value(self):
         """
         Return the total value of all the holdings based on the latest fund
         prices available.
         """
-        return sum(holding.value() for holding in self.holdings)
+        return math.fsum(holding.value() for holding in self.holdings)
+
+    def drift(self):
+        """
+        Return the difference between the current and the target allocation of
+        each holding, as fractions of the total value of the portfolio.
+
+        Positive values indicate holdings that are over their target
+        allocation; negative values holdings that are under it.
+
+        Returns
+        -------
+        list of float
+            One entry per holding, in the order of `holdings`.
+        """
+        values = [holding.value() for holding in self.holdings]
+        total = math.fsum(values)
+        return [
+            (value / total if total else 0.0) - holding.target_fraction
+            for value, holding in zip(values, self.holdings)
+        ]
+
+    def track(self):
+        """
+        Return a `ValueTracker`, which keeps the total value and drift of the
+        portfolio up to date as prices and units change, instead of
+        recalculating them in full.
+
+        Example
+        -------
+        >>> with pf.track() as tracker:
+        ...     pf.update_prices()
+        ...     tracker.total_value()
+        """
+        return ValueTracker(self)
 
     @classmethod
-    def from_funds(cls, funds, *, units=None, target_fractions=None):
+    def from_funds(cls, funds, *, units=None, target_fractions=None, registry=None):
         """
         Construct a portfolio from an iterable of funds, with optional units
         held and target allocations.
@@ -199,6 +585,10 @@ class Portfolio:
         target_fractions : iterable or None, default None
             Target allocation fractions. Defaults to equal fractions of each
             fund, all adding up to 1.
+        registry : lisatools.fund.FundRegistry or None, default None
+            Registry in which the funds are interned, so that equal funds are
+            represented by a single object. If unspecified, funds are only
+            shared within `funds`.
 
         Example
         -------
@@ -223,9 +613,12 @@ class Portfolio:
         if len(target_fractions) != n_funds:
             raise ValueError(f"unequal lengths for {funds=} and {target_fractions=}")
 
+        if registry is None:
+            registry = FundRegistry()
+
         holdings = []
         for fund, units_held, target in zip(funds, units, target_fractions):
-            holdings.append(Holding(fund, units_held, target))
+            holdings.append(Holding(registry.intern(fund), units_held, target))
         return cls(holdings)
 
     def add_holding(self, new_holding, scale_new=True):
@@ -276,14 +669,63 @@ class Portfolio:
         Fund 4                           1.0000     1.00 0.5000 None         2022-11-23
         """
         if scale_new:
-            self.holdings.append(new_holding)
-            for holding in self.holdings:
+            for holding in self._holdings:
                 holding.target_fraction /= 1.0 + new_holding.target_fraction
+            new_holding.target_fraction /= 1.0 + new_holding.target_fraction
         else:
             scale_factor = 1.0 - new_holding.target_fraction
-            for holding in self.holdings:
+            for holding in self._holdings:
                 holding.target_fraction *= scale_factor
-            self.holdings.append(new_holding)
+        self._append(new_holding)
+
+    def add_holdings(self, new_holdings, scale_new=True):
+        """
+        Add many holdings to the portfolio at once, ensuring that the sum of
+        all target allocations is equal to 1.0 after the addition.
+
+        The result is the same (up to rounding) as adding the holdings one at a
+        time in order using `add_holding`, but every target allocation is only
+        rescaled once, so the time taken is linear rather than quadratic in the
+        number of holdings.
+
+        Parameters
+        ----------
+        new_holdings : iterable of lisatools.Holding
+            The holdings that are to be added to the portfolio, in order.
+        scale_new : bool, default True
+            The strategy used to rescale the allocations; see `add_holding`.
+
+        Example
+        -------
+        >>> pf = lisatools.Portfolio()
+        >>> pf.add_holdings(
+        ...     lisatools.Holding(lisatools.Fund(f"Fund {i}"), 1.0, 1.0)
+        ...     for i in range(3)
+        ... )
+
+        See also
+        --------
+        add_holding
+        """
+        new_holdings = list(new_holdings)
+        # scale factors applied to each new holding by the additions after it
+        # (and, for strategy 1, by its own addition)
+        factors = []
+        factor = 1.0
+        for holding in reversed(new_holdings):
+            if scale_new:
+                factor /= 1.0 + holding.target_fraction
+                factors.append(factor)
+            else:
+                factors.append(factor)
+                factor *= 1.0 - holding.target_fraction
+        factors.reverse()
+
+        for holding in self._holdings:
+            holding.target_fraction *= factor
+        for holding, holding_factor in zip(new_holdings, factors):
+            holding.target_fraction *= holding_factor
+            self._append(holding)
 
     def add_fund(self, fund, *, value=None, units=1.0, target=None, **kwargs):
         """
@@ -376,7 +818,7 @@ class Portfolio:
             target_holdings.append(holding)
         return Portfolio(target_holdings)
 
-    def trade_to_target(self, target_portfolio=None):
+    def trade_to_target(self, target_portfolio=None, *, match="position"):
         """
         Return the required buy and sell instructions to reach the target
         portfolio.
@@ -386,6 +828,15 @@ class Portfolio:
         target_portfolio : lisatools.Portfolio or None, default None
             Target to rebalance the portfolio into. If unspecified, calculate
             this based on the target allocations defined by `target_fraction`s.
+        match : {"position", "key"}, default "position"
+            How holdings are paired with the holdings of the target portfolio.
+            With "position", the n-th holding is paired with the n-th holding of
+            the target, which must hold the same funds in the same order. With
+            "key", holdings are joined on the funds' ticker symbols or ISINs
+            (or, for funds without either, on fund identity), so the target may
+            hold the funds in any order: funds only held currently are sold in
+            full, and funds only in the target are bought in full. The units of
+            several holdings of the same fund are combined.
 
         Returns
         -------
@@ -399,33 +850,229 @@ class Portfolio:
         if target_portfolio is None:
             target_portfolio = self.target_portfolio()
 
+        if match == "position":
+            pairs = [
+                (orig.fund, orig.units, target.units, orig.target_fraction)
+                for orig, target in zip(self.holdings, target_portfolio.holdings)
+            ]
+        elif match == "key":
+            pairs = _join_holdings(self.holdings, target_portfolio.holdings)
+        else:
+            raise ValueError(f"unknown match mode {match!r}")
+
         buy = []
         sell = []
-        for orig, target in zip(self.holdings, target_portfolio.holdings):
-            diff = target.units - orig.units
+        for fund, units, target_units, target_fraction in pairs:
+            diff = target_units - units
             if diff > 0:
-                trade = Holding(orig.fund, diff, orig.target_fraction)
+                trade = Holding(fund, diff, target_fraction)
                 buy.append(trade)
             elif diff < 0:
-                trade = Holding(orig.fund, -diff, orig.target_fraction)
+                trade = Holding(fund, -diff, target_fraction)
                 sell.append(trade)
 
         return Portfolio(buy), Portfolio(sell)
 
-    def update_prices(self):
+    def merge(self, other):
         """
-        Silently update the fund prices and dates for all the funds held in
-        the portfolio.
+        Add the holdings of another portfolio to this one, combining holdings
+        of the same fund.
+
+        Holdings are matched by ticker symbol or ISIN, or else by fund
+        identity, using the index of the portfolio. The units of matched
+        holdings are added to the first holding of the fund; unmatched holdings
+        are appended with their own target allocation, without rescaling the
+        other target allocations.
+
+        Arguments
+        ---------
+        other : lisatools.Portfolio or iterable of lisatools.Holding
+        """
+        for holding in other:
+            position = self._position(holding.fund)
+            if position is None:
+                new_holding = Holding(
+                    holding.fund, holding.units, holding.target_fraction
+                )
+                self._append(new_holding)
+            else:
+                self._holdings[position].units += holding.units
+
+    def apply_trades(self, buy, sell):
+        """
+        Apply buy and sell instructions, such as those returned by
+        `trade_to_target`, to the portfolio.
+
+        Arguments
+        ---------
+        buy : lisatools.Portfolio
+            Units of funds bought. Funds not yet held are added to the
+            portfolio, as in `merge`.
+        sell : lisatools.Portfolio
+            Units of funds sold.
+
+        Raises
+        ------
+        ValueError
+            If a fund to be sold is not held, in which case the portfolio is
+            left unchanged.
+
+        Example
+        -------
+        >>> buy, sell = pf.trade_to_target()
+        >>> pf.apply_trades(buy, sell)
+        """
+        positions = []
+        for trade in sell:
+            position = self._position(trade.fund)
+            if position is None:
+                raise ValueError(f"cannot sell {trade.fund.description}: not held")
+            positions.append(position)
+        self.merge(buy)
+        for trade, position in zip(sell, positions):
+            self._holdings[position].units -= trade.units
+
+    def update_prices(self, *, provider=None, max_workers=8, timeout=10.0):
+        """
+        Update the fund prices and dates for all the funds held in the
+        portfolio, fetching the pricing data concurrently.
+
+        By default, this scrapes the Financial Times web site for historical
+        pricing data using the `lisatools.scraping` module. Funds that share a
+        source of prices are only looked up once, and each distinct fund object
+        is only updated once (see `lisatools.fund.FundRegistry`). A failure to
+        update one fund does not prevent the other funds from being updated.
+
+        Arguments
+        ---------
+        provider : lisatools.providers.PriceProvider or None, default None
+            Source of the prices. If unspecified, the provider returned by
+            `lisatools.providers.get_default` is used.
+        max_workers : int, default 8
+            Maximum number of prices that are looked up at the same time.
+        timeout : float or None, default 10.0
+            Time in seconds to wait for each individual request to a remote
+            source of prices. If `None`, wait indefinitely.
+
+        Returns
+        -------
+        errors : list
+            One entry per holding, in the order of `holdings`: `None` if the
+            price of the holding's fund was updated successfully, otherwise the
+            exception that prevented the update.
+        """
+        from lisatools import providers  # deferred, to keep imports fast
+
+        if provider is None:
+            provider = providers.get_default()
+
+        funds_by_key = {}
+        for holding in self.holdings:
+            funds = funds_by_key.setdefault(provider.key(holding.fund), {})
+            funds[id(holding.fund)] = holding.fund
+
+        errors = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(
+                    provider.latest_price, next(iter(funds.values())), timeout=timeout
+                ): funds
+                for funds in funds_by_key.values()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                funds = futures[future]
+                try:
+                    price, date = future.result()
+                except Exception as exc:
+                    error = exc
+                else:
+                    error = None
+                    for fund in funds.values():
+                        fund.update_price(price, date=date)
+                for fund_id in funds:
+                    errors[fund_id] = error
+
+        return [errors[id(holding.fund)] for holding in self.holdings]
+
+    def apply_prices(self, prices, *, stale_before=None):
+        """
+        Update the fund prices in bulk from a mapping or an end-of-day price
+        file.
+
+        The funds are matched to the prices through a hash index of the
+        portfolio's funds by `lisatools.fund.fund_key` and by ISIN, and all
+        updates are applied in a single pass. Each distinct date string is only
+        parsed once.
 
-        This scrapes the Financial Times web site for historical pricing data
-        using the `lisatools.scraping` module. It may take a couple of seconds
-        to run.
+        Arguments
+        ---------
+        prices : mapping or path-like object
+            Pairs of price and date (a `datetime.date` or an ISO-formatted date
+            string) keyed by fund key or ISIN, or the path to a CSV file in the
+            format read by `lisatools.io.read_prices_csv`.
+        stale_before : datetime.date or None, default None
+            Funds whose price date is before this date after the update are
+            reported as stale. Defaults to the most recent date in `prices`.
+
+        Returns
+        -------
+        report : dict
+            The funds that were "updated", the funds that were "unmatched" by
+            any of the prices, and the funds that are "stale", each as a list
+            in the order of `holdings`.
+
+        Example
+        -------
+        >>> report = pf.apply_prices({"GB00BD3RZ582": (172.14, "2022-11-21")})
+        >>> report["unmatched"]
+        []
         """
+        if not isinstance(prices, collections.abc.Mapping):
+            with open(prices, "r", newline="") as handle:
+                prices = io.read_prices_csv(handle)
+
+        funds = {}
+        index = {}
         for holding in self.holdings:
-            price, date = scraping.latest_price(holding.fund)
-            holding.fund.update_price(price, date=date)
+            fund = holding.fund
+            if id(fund) in funds:
+                continue
+            funds[id(fund)] = fund
+            key = fund_key(fund)
+            if key is not None:
+                index.setdefault(key, []).append(fund)
+            # "None" is the placeholder for funds without an ISIN
+            if fund.isin != "None" and fund.isin != key:
+                index.setdefault(fund.isin, []).append(fund)
+
+        dates = {}
+        newest = None
+        updated = {}
+        for key, (price, date) in prices.items():
+            if isinstance(date, str):
+                if date not in dates:
+                    dates[date] = datetime.date.fromisoformat(date)
+                date = dates[date]
+            if newest is None or date > newest:
+                newest = date
+            for fund in index.get(key, ()):
+                if id(fund) not in updated:
+                    fund.update_price(price, date=date)
+                    updated[id(fund)] = fund
+        if stale_before is None:
+            stale_before = newest
 
-    def save(self, file=None, *, silent=False, **kwargs):
+        return {
+            "updated": [fund for fund in funds.values() if id(fund) in updated],
+            "unmatched": [fund for fund in funds.values() if id(fund) not in updated],
+            "stale": [
+                fund
+                for fund in funds.values()
+                if stale_before is not None and fund.date < stale_before
+            ],
+        }
+
+    def save(self, file=None, *, silent=False, version=1, **kwargs):
         """
         Return the portfolio as a JSON string and optionally save to file, and/or print
         it to stdout.
@@ -441,6 +1088,11 @@ class Portfolio:
             is written.
         silent : bool, default False
             If `True`, print the JSON string to stdout.
+        version : int, default 1
+            Format of the JSON string. Version 1 is a pretty-printed list of
+            holdings, each including its fund. Version 2 is the compact,
+            schema-versioned format of `lisatools.io.encode_portfolio`, which
+            stores each distinct fund once and is faster to load.
 
         Returns
         -------
@@ -451,12 +1103,22 @@ class Portfolio:
         --------
         load
         """
-        s = json.dumps(
-            self.holdings,
-            cls=io.JSONEncoder,
-            indent=4,
-            allow_nan=False,
-        )
+        if version == 1:
+            s = json.dumps(
+                self.holdings,
+                cls=io.JSONEncoder,
+                indent=4,
+                allow_nan=False,
+            )
+        elif version == io.SCHEMA_VERSION:
+            s = json.dumps(
+                io.encode_portfolio(self.holdings),
+                cls=io.JSONEncoder,
+                separators=(",", ":"),
+                allow_nan=False,
+            )
+        else:
+            raise ValueError(f"unsupported portfolio schema version {version!r}")
         if file is None:
             pass
         else:
@@ -467,19 +1129,69 @@ class Portfolio:
         return s
 
     @classmethod
-    def load(cls, file, **kwargs):
+    def load(cls, file, *, registry=None, **kwargs):
         """
         Construct a portfolio from a specified JSON file.
 
+        Files in either format written by `save` can be read.
+
         Arguments
         ---------
         file : path-like object
             Path of the file to be read.
+        registry : lisatools.fund.FundRegistry or None, default None
+            Registry in which the funds are interned, e.g. to share funds
+            between several portfolios. If unspecified, funds are only shared
+            within the portfolio.
 
         See also
         --------
         save
         """
         with open(file, "r", **kwargs) as handle:
-            holdings = json.load(handle, cls=io.JSONDecoder)
+            holdings = io.loads(handle.read(), registry=registry)
         return cls(holdings)
+
+    def save_jsonl(self, file, **kwargs):
+        """
+        Save the portfolio to a file in line-delimited JSON format, with one
+        holding per line.
+
+        Unlike `save`, the holdings are written one at a time without building
+        the whole document in memory.
+
+        Arguments
+        ---------
+        file : path-like object
+            Path where a file is to be opened for writing, truncating any
+            previously existing file.
+
+        See also
+        --------
+        load_jsonl, lisatools.io.dump_jsonl
+        """
+        with open(file, "w", **kwargs) as handle:
+            io.dump_jsonl(self.holdings, handle)
+
+    @classmethod
+    def load_jsonl(cls, file, *, registry=None, **kwargs):
+        """
+        Construct a portfolio from a file in line-delimited JSON format, with
+        one holding per line.
+
+        To process the holdings one at a time instead, use
+        `lisatools.io.load_jsonl`.
+
+        Arguments
+        ---------
+        file : path-like object
+            Path of the file to be read.
+        registry : lisatools.fund.FundRegistry or None, default None
+            Registry in which the funds are interned; see `load`.
+
+        See also
+        --------
+        save_jsonl, lisatools.io.load_jsonl
+        """
+        with open(file, "r", **kwargs) as handle:
+            return cls(io.load_jsonl(handle, registry=registry))
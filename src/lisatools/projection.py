@@ -0,0 +1,269 @@
+import concurrent.futures
+import itertools
+import math
+import os
+
+import numpy as np
+
+
+ANNUAL_ALLOWANCE = 4000.0
+"""Maximum yearly contribution to a Lifetime ISA."""
+
+BONUS_RATE = 0.25
+"""Government bonus paid on contributions to a Lifetime ISA."""
+
+LAST_CONTRIBUTION_AGE = 49
+"""Contributions can be made until the day before the holder turns 50."""
+
+PAYOUT_AGE = 60
+"""Age from which the Lifetime ISA can be withdrawn without a penalty."""
+
+
+class Projection:
+    """
+    Percentile bands of the projected value of a portfolio.
+
+    Attributes
+    ----------
+    ages : numpy.ndarray
+        Age of the holder at each point of the projection, from the current
+        age up to `PAYOUT_AGE`.
+    percentiles : tuple of float
+        The percentiles of the bands.
+    bands : numpy.ndarray
+        Value of each percentile at each age, as an array of shape (number of
+        percentiles, number of ages).
+    mean : numpy.ndarray
+        Mean value at each age.
+    n_paths : int
+        Number of simulated paths.
+    """
+
+    def __init__(self, ages, percentiles, bands, mean, n_paths):
+        self.ages = ages
+        self.percentiles = tuple(percentiles)
+        self.bands = bands
+        self.mean = mean
+        self.n_paths = n_paths
+
+    def __repr__(self):
+        return (
+            f"<Projection: {self.n_paths} paths from age {self.ages[0]} "
+            f"to {self.ages[-1]}, percentiles {self.percentiles}>"
+        )
+
+    def band(self, percentile):
+        """
+        Return the value of a percentile at each age.
+        """
+        return self.bands[self.percentiles.index(percentile)]
+
+
+def _contributions(age, contribution):
+    ages = np.arange(age, PAYOUT_AGE)
+    return np.where(ages <= LAST_CONTRIBUTION_AGE, contribution * (1 + BONUS_RATE), 0.0)
+
+
+def _simulate_chunk(
+    seed, n_paths, initial_value, weights, log_means, factor, deposits, edges
+):
+    # simulate one chunk of paths, returning a histogram of the values at each
+    # age and their sum; the first bin of the histogram counts the values below
+    # `edges[0]` (e.g. those of an empty portfolio), and the others the values
+    # within the log-spaced `edges`, where values above `edges[-1]` are counted
+    # in the last bin
+    rng = np.random.default_rng(seed)
+    log_lo = math.log(edges[0])
+    log_step = math.log(edges[1] / edges[0])
+    n_bins = len(edges) - 1
+
+    counts = np.zeros((len(deposits) + 1, n_bins + 1), dtype=np.int64)
+    sums = np.zeros(len(deposits) + 1)
+    values = np.full(n_paths, initial_value)
+    for year, deposit in enumerate(deposits, start=1):
+        log_returns = log_means + rng.standard_normal((n_paths, len(weights))) @ factor
+        values = (values + deposit) * (np.exp(log_returns) @ weights)
+        bins = (np.log(np.maximum(values, edges[0])) - log_lo) / log_step
+        bins = np.clip(bins.astype(np.int64), 0, n_bins - 1) + 1
+        bins[values < edges[0]] = 0
+        counts[year] = np.bincount(bins, minlength=n_bins + 1)
+        sums[year] = values.sum()
+    return counts, sums
+
+
+def _percentiles(counts, edges, percentiles):
+    # interpolate geometrically within the bin holding each percentile, where
+    # percentiles in the first bin (below the edges) are reported as zero
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    result = []
+    for percentile in percentiles:
+        rank = percentile / 100 * total
+        i = min(int(np.searchsorted(cumulative, rank, side="left")), len(counts) - 1)
+        if i == 0:
+            if counts[0]:
+                result.append(0.0)
+                continue
+            i = 1
+        fraction = (rank - cumulative[i - 1]) / counts[i] if counts[i] else 0.0
+        lower, upper = edges[i - 1], edges[i]
+        result.append(lower * (upper / lower) ** fraction)
+    return result
+
+
+def project(
+    portfolio,
+    age,
+    *,
+    expected_returns,
+    volatilities,
+    correlation=None,
+    contribution=ANNUAL_ALLOWANCE,
+    n_paths=1_000_000,
+    percentiles=(5, 25, 50, 75, 95),
+    seed=None,
+    chunksize=100_000,
+    max_workers=None,
+    n_bins=16384,
+):
+    """
+    Project the value of a Lifetime ISA portfolio up to `PAYOUT_AGE` using a
+    Monte Carlo simulation of yearly returns.
+
+    The simulation starts from the current total value of the portfolio. At
+    the start of each year until the holder turns 50, `contribution` is paid in
+    along with the government bonus on it. The portfolio is assumed to be
+    rebalanced to its target allocation every year, and the yearly log returns
+    of the funds follow a multivariate normal distribution.
+
+    Paths are simulated in chunks of vectorised NumPy batches, which are
+    spread over a pool of processes. Each chunk has its own random number
+    stream spawned from `seed`, so results are reproducible regardless of the
+    number of processes. Rather than keeping every path, each chunk only
+    returns a histogram of the values at each age over fixed log-spaced bins,
+    so memory use does not grow with the number of paths. The percentiles are
+    interpolated within the bins, to a relative precision of about
+    `log(max/min) / n_bins`, where `max` and `min` bound the values. Values
+    below `min`, such as those of an empty portfolio, are counted separately,
+    and percentiles that fall among them are reported as zero.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+    age : int
+        Current age of the holder.
+    expected_returns : float or array_like
+        Expected yearly (arithmetic) return of each fund, in the order of the
+        portfolio's holdings, e.g. 0.05 for 5%. A single value applies to all
+        funds.
+    volatilities : float or array_like
+        Standard deviation of the yearly log return of each fund.
+    correlation : array_like or None, default None
+        Correlation matrix of the yearly log returns. Defaults to independent
+        returns.
+    contribution : float, default ANNUAL_ALLOWANCE
+        Yearly contribution, excluding the bonus.
+    n_paths : int, default 1_000_000
+    percentiles : sequence of float, default (5, 25, 50, 75, 95)
+    seed : int, numpy.random.SeedSequence, or None, default None
+        Seed of the random number streams. If unspecified, fresh entropy is
+        used.
+    chunksize : int, default 100_000
+        Number of paths simulated at once by a worker.
+    max_workers : int or None, default None
+        Number of worker processes. Defaults to the number of processors. If 1,
+        the chunks are simulated in the current process.
+    n_bins : int, default 16384
+        Number of histogram bins.
+
+    Returns
+    -------
+    Projection
+
+    Example
+    -------
+    >>> projection = lisatools.projection.project(
+    ...     pf, 30, expected_returns=[0.06, 0.02], volatilities=[0.15, 0.05], seed=1
+    ... )
+    >>> projection.band(50)[-1]
+    """
+    if contribution > ANNUAL_ALLOWANCE:
+        raise ValueError(f"contributions are limited to {ANNUAL_ALLOWANCE} a year")
+    if not age < PAYOUT_AGE:
+        raise ValueError(f"age must be below {PAYOUT_AGE}")
+
+    weights = np.array([holding.target_fraction for holding in portfolio])
+    n_funds = len(weights)
+    expected_returns = np.broadcast_to(np.asarray(expected_returns, float), n_funds)
+    volatilities = np.broadcast_to(np.asarray(volatilities, float), n_funds)
+    if correlation is None:
+        correlation = np.eye(n_funds)
+    covariance = np.asarray(correlation, float) * np.outer(volatilities, volatilities)
+    # z @ factor has the given covariance for standard normal z; the eigenvalue
+    # decomposition also copes with degenerate (e.g. zero) volatilities
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    factor = (eigenvectors * np.sqrt(np.maximum(eigenvalues, 0.0))).T
+    log_means = np.log1p(expected_returns) - volatilities**2 / 2
+
+    initial_value = float(portfolio.total_value())
+    deposits = _contributions(age, contribution)
+    # bound the values by the worst and best fund doing 8 standard deviations
+    # worse or better than expected over the whole projection
+    n_years = len(deposits)
+    spread = 8 * float(np.max(volatilities, initial=0.0)) * math.sqrt(n_years)
+    money = [amount for amount in (initial_value, *deposits) if amount > 0.0]
+    best = float(np.max(log_means, initial=0.0))
+    worst = float(np.min(log_means, initial=0.0))
+    hi = sum(money, 1.0) * math.exp(best * n_years + spread)
+    lo = min(money, default=1.0) * math.exp(worst * n_years - spread)
+    if not hi > lo:
+        # no money and no returns, so that every value is zero: any bins will do
+        hi = 2.0 * lo
+    edges = np.geomspace(lo, hi, n_bins + 1)
+
+    chunks = [chunksize] * (n_paths // chunksize)
+    if n_paths % chunksize:
+        chunks.append(n_paths % chunksize)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = (initial_value, weights, log_means, factor, deposits, edges)
+
+    counts = np.zeros((n_years + 1, n_bins + 1), dtype=np.int64)
+    # the sums are added up in order of the chunks, to be reproducible
+    sums = np.zeros((len(chunks), n_years + 1))
+
+    if max_workers == 1:
+        for i, (chunk_seed, size) in enumerate(zip(seeds, chunks)):
+            chunk_counts, sums[i] = _simulate_chunk(chunk_seed, size, *args)
+            counts += chunk_counts
+    else:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        # only a few chunks per worker are submitted ahead of their results
+        # being added up, to bound the memory held by pending results
+        max_pending = 2 * max_workers
+        chunk_args = enumerate(zip(seeds, chunks))
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            pending = {}
+            while True:
+                for i, (chunk_seed, size) in itertools.islice(
+                    chunk_args, max_pending - len(pending)
+                ):
+                    future = executor.submit(_simulate_chunk, chunk_seed, size, *args)
+                    pending[future] = i
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    chunk_counts, sums[pending.pop(future)] = future.result()
+                    counts += chunk_counts
+
+    ages = np.arange(age, PAYOUT_AGE + 1)
+    bands = np.empty((len(percentiles), len(ages)))
+    bands[:, 0] = initial_value
+    for year in range(1, len(ages)):
+        bands[:, year] = _percentiles(counts[year], edges, percentiles)
+    mean = sums.sum(axis=0) / n_paths
+    mean[0] = initial_value
+    return Projection(ages, percentiles, bands, mean, n_paths)
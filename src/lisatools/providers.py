@@ -0,0 +1,283 @@
+import abc
+import csv
+import datetime
+import pathlib
+
+from lisatools import io
+from lisatools.fund import fund_key
+
+
+registry = {}
+
+
+def register(name):
+    """
+    Class decorator registering a price provider under a name, so that it can
+    be constructed using `create`.
+    """
+
+    def decorator(cls):
+        registry[name] = cls
+        return cls
+
+    return decorator
+
+
+def create(name, *args, **kwargs):
+    """
+    Construct the price provider registered under a name, passing on any
+    further arguments to its constructor.
+    """
+    try:
+        cls = registry[name]
+    except KeyError:
+        raise ValueError(f"unknown price provider {name!r}") from None
+    return cls(*args, **kwargs)
+
+
+class PriceProvider(abc.ABC):
+    """
+    Source of the latest prices of funds.
+
+    Subclasses must implement `latest_price`, and may override `key` if funds
+    share a source of prices in some other way than by having the same key.
+    """
+
+    def key(self, fund):
+        """
+        Return a key such that funds with equal keys have the same price, to
+        avoid looking up a price more than once.
+        """
+        key = fund_key(fund)
+        return id(fund) if key is None else key
+
+    @abc.abstractmethod
+    def latest_price(self, fund, *, timeout=None):
+        """
+        Return the latest price of a fund and the date of that price.
+
+        Parameters
+        ----------
+        fund : lisatools.Fund
+        timeout : float or None, default None
+            Time in seconds to wait for a remote source of prices, if any.
+
+        Raises
+        ------
+        LookupError
+            If the provider does not have a price for the fund.
+        """
+
+
+@register("ft")
+class FTProvider(PriceProvider):
+    """
+    Prices scraped from the Financial Times' historical pricing data using
+    `lisatools.scraping`.
+    """
+
+    def __repr__(self):
+        return "FTProvider()"
+
+    def key(self, fund):
+        from lisatools import scraping
+
+        return scraping.history_url(fund)
+
+    def latest_price(self, fund, *, timeout=None):
+        from lisatools import scraping
+
+        return scraping.latest_price(fund, timeout=timeout)
+
+
+@register("memory")
+class MemoryProvider(PriceProvider):
+    """
+    Prices held in memory, keyed by `lisatools.fund.fund_key` or by ISIN.
+
+    Parameters
+    ----------
+    prices : mapping or None, default None
+        Pairs of price and date (a `datetime.date` or an ISO-formatted date
+        string) keyed by fund key or ISIN.
+
+    Example
+    -------
+    >>> provider = lisatools.providers.MemoryProvider(
+    ...     {"GB00BD3RZ582": (172.14, "2022-11-21")}
+    ... )
+    >>> pf.update_prices(provider=provider)
+    """
+
+    def __init__(self, prices=None):
+        self.prices = {}
+        for key, (price, date) in (prices or {}).items():
+            self.set(key, price, date)
+
+    def __repr__(self):
+        return f"MemoryProvider({self.prices!r})"
+
+    def set(self, key, price, date):
+        """
+        Set the price of the fund with a given key or ISIN.
+        """
+        if isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        self.prices[key] = (price, date)
+
+    def latest_price(self, fund, *, timeout=None):
+        key = fund_key(fund)
+        if key in self.prices:
+            return self.prices[key]
+        if fund.isin != "None" and fund.isin in self.prices:
+            return self.prices[fund.isin]
+        raise LookupError(f"no price available for {fund.description}")
+
+
+@register("csv")
+class CSVProvider(MemoryProvider):
+    """
+    Prices from a single CSV file, such as an end-of-day price file, which is
+    read in one go on construction.
+
+    Parameters
+    ----------
+    path : path-like object
+        The CSV file, in the format read by `lisatools.io.read_prices_csv`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r", newline="") as handle:
+            super().__init__(io.read_prices_csv(handle))
+
+    def __repr__(self):
+        return f"CSVProvider({str(self.path)!r})"
+
+
+@register("directory")
+class DirectoryProvider(PriceProvider):
+    """
+    Prices from a directory of CSV price histories, with one file per fund
+    named after its key or ISIN, e.g. "GB00BD3RZ582.csv".
+
+    Each file must have a header row with the columns "date" (in ISO format)
+    and "close" (or "price"). The latest date in a file is used, regardless of
+    the order of the rows.
+
+    Parameters
+    ----------
+    directory : path-like object
+    """
+
+    def __init__(self, directory):
+        self.directory = pathlib.Path(directory)
+
+    def __repr__(self):
+        return f"DirectoryProvider({str(self.directory)!r})"
+
+    def latest_price(self, fund, *, timeout=None):
+        for key in (fund_key(fund), fund.isin):
+            if key is None or key == "None":
+                continue
+            path = self.directory / f"{key}.csv"
+            if path.is_file():
+                return self._read_latest(path)
+        raise LookupError(f"no price history available for {fund.description}")
+
+    @staticmethod
+    def _read_latest(path):
+        with open(path, "r", newline="") as handle:
+            reader = csv.DictReader(handle)
+            price_column = "close" if "close" in reader.fieldnames else "price"
+            # ISO-formatted dates sort chronologically as strings
+            latest = max(reader, key=lambda row: row["date"], default=None)
+        if latest is None:
+            raise LookupError(f"empty price history in {path}")
+        date = datetime.date.fromisoformat(latest["date"])
+        return float(latest[price_column]), date
+
+
+class ChainProvider(PriceProvider):
+    """
+    Fallback chain of price providers, tried in order of decreasing priority
+    until one of them has a price for the fund.
+
+    Parameters
+    ----------
+    providers : iterable of PriceProvider, default ()
+        Providers in order of decreasing priority.
+
+    Example
+    -------
+    Use prices from an end-of-day file, falling back on the FT's web site.
+
+    >>> chain = lisatools.providers.ChainProvider(
+    ...     [CSVProvider("prices.csv"), FTProvider()]
+    ... )
+    >>> pf.update_prices(provider=chain)
+    """
+
+    def __init__(self, providers=()):
+        self._entries = []
+        for provider in providers:
+            self.add(provider, priority=-len(self._entries))
+
+    def __repr__(self):
+        return f"ChainProvider({self.providers!r})"
+
+    @property
+    def providers(self):
+        """
+        The providers in the chain, in the order in which they are tried.
+        """
+        return [provider for _, provider in self._entries]
+
+    def add(self, provider, *, priority=0):
+        """
+        Add a provider to the chain. Providers with a higher priority are tried
+        first; providers with equal priority in the order they were added.
+        """
+        index = len(self._entries)
+        while index > 0 and self._entries[index - 1][0] < priority:
+            index -= 1
+        self._entries.insert(index, (priority, provider))
+
+    def key(self, fund):
+        # funds only share prices if all providers agree that they do
+        return tuple(provider.key(fund) for provider in self.providers)
+
+    def latest_price(self, fund, *, timeout=None):
+        errors = []
+        for provider in self.providers:
+            try:
+                return provider.latest_price(fund, timeout=timeout)
+            except Exception as exc:
+                errors.append(exc)
+        raise LookupError(
+            f"no price available for {fund.description}: "
+            + "; ".join(str(error) for error in errors)
+        )
+
+
+_default = None
+
+
+def get_default():
+    """
+    Return the provider used by `lisatools.Portfolio.update_prices` if no other
+    provider is specified, which is an `FTProvider` unless changed using
+    `set_default`.
+    """
+    global _default
+    if _default is None:
+        _default = FTProvider()
+    return _default
+
+
+def set_default(provider):
+    """
+    Replace the default price provider. If `None`, restore the `FTProvider`.
+    """
+    global _default
+    _default = provider
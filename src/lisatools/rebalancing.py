@@ -0,0 +1,289 @@
+import heapq
+import math
+
+import numpy as np
+
+from lisatools.columnar import ColumnarPortfolio
+from lisatools.fund import ETF, fund_key
+from lisatools.portfolio import Holding, Portfolio
+
+
+def lot_size(fund, lot_sizes=None):
+    """
+    Return the number of units of a fund that must be traded at a time.
+
+    Parameters
+    ----------
+    fund : lisatools.Fund
+    lot_sizes : mapping or None, default None
+        Lot sizes keyed by `lisatools.fund.fund_key` or by ISIN, overriding the
+        defaults: whole units for `lisatools.ETF`s, and any amount (a lot size of
+        0.0) for other funds.
+    """
+    if lot_sizes is not None:
+        for key in (fund_key(fund), fund.isin):
+            if key in lot_sizes:
+                return lot_sizes[key]
+    return 1.0 if isinstance(fund, ETF) else 0.0
+
+
+def _round_down(units, lot):
+    if not lot:
+        return units
+    # tolerance, so that e.g. 2.9999999999999996 lots count as 3
+    return math.floor(units / lot + 1e-9) * lot
+
+
+def _water_level(deficits, budget):
+    # the level such that reducing every deficit to it (where above it)
+    # costs exactly the budget, which minimises the sum of the squared
+    # remaining deficits; 0.0 if the budget covers all the deficits
+    if sum(deficits) <= budget:
+        return 0.0
+    ordered = sorted(deficits, reverse=True)
+    prefix = 0.0
+    for k, deficit in enumerate(ordered, start=1):
+        prefix += deficit
+        level = (prefix - budget) / k
+        if k == len(ordered) or level >= ordered[k]:
+            return max(level, 0.0)
+
+
+def rebalance(portfolio, cash=0.0, *, lot_sizes=None, min_trade=0.0, buy_only=False):
+    """
+    Calculate the trades that bring a portfolio closest to its target
+    allocations, given the cash available and constraints on the trades.
+
+    Unlike `lisatools.Portfolio.trade_to_target`, which trades any amount of
+    any fund, trades are limited to the cash available (plus the proceeds of
+    any sales), are made in whole lots, and are only made if they are worth at
+    least `min_trade`.
+
+    Holdings over their target are sold down to it (unless `buy_only`). The
+    cash is then spread over the holdings under their target so as to
+    minimise the sum of the squared differences between the values of the
+    holdings and their targets, first in whole lots, after which the remaining
+    cash is spent greedily one lot at a time on the holdings furthest below
+    their target. The time taken is O(n log n) in the number of holdings.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+    cash : float, default 0.0
+        Cash available to invest, in addition to the holdings.
+    lot_sizes : mapping or None, default None
+        Number of units traded at a time, keyed by ticker symbol or ISIN; see
+        `lot_size`. By default, ETFs are traded in whole units and other funds
+        in any amount.
+    min_trade : float, default 0.0
+        Minimum value of a trade. Smaller trades are not made.
+    buy_only : bool, default False
+        If `True`, holdings are never sold.
+
+    Returns
+    -------
+    buy : lisatools.Portfolio
+        Funds to purchase, with positive `units` values.
+    sell : lisatools.Portfolio
+        Funds to sell, with positive `units` values.
+    cash : float
+        Cash left over after the trades.
+
+    Example
+    -------
+    >>> buy, sell, cash = lisatools.rebalancing.rebalance(
+    ...     pf, 1000.0, min_trade=50.0, buy_only=True
+    ... )
+    """
+    holdings = portfolio.holdings
+    total = portfolio.total_value() + cash
+    prices = [holding.fund.price for holding in holdings]
+    values = [holding.value() for holding in holdings]
+    lots = [lot_size(holding.fund, lot_sizes) for holding in holdings]
+    trades = [0.0] * len(holdings)
+
+    if not buy_only:
+        for i, holding in enumerate(holdings):
+            excess = values[i] - holding.target_fraction * total
+            if excess <= 0.0:
+                continue
+            units = min(_round_down(excess / prices[i], lots[i]), holding.units)
+            if units <= 0.0 or units * prices[i] < min_trade:
+                continue
+            trades[i] = -units
+            values[i] -= units * prices[i]
+            cash += units * prices[i]
+
+    deficits = [
+        max(holding.target_fraction * total - value, 0.0)
+        for holding, value in zip(holdings, values)
+    ]
+
+    def buy(i, units):
+        nonlocal cash
+        cost = units * prices[i]
+        trades[i] += units
+        deficits[i] -= cost
+        cash -= cost
+
+    # buy whole lots towards the optimal (fractional) allocation of the cash
+    level = _water_level(deficits, cash)
+    for i, deficit in enumerate(deficits):
+        units = _round_down((deficit - level) / prices[i], lots[i])
+        if units > 0.0 and units * prices[i] >= min_trade:
+            buy(i, units)
+
+    # spend what is left lot by lot on the holdings furthest below target, as
+    # long as this brings them closer to it
+    heap = [(-deficit, i) for i, deficit in enumerate(deficits) if lots[i]]
+    heapq.heapify(heap)
+    while heap:
+        deficit, i = heapq.heappop(heap)
+        deficit = -deficit
+        lot_cost = lots[i] * prices[i]
+        n_lots = 1 if trades[i] > 0.0 else max(1, math.ceil(min_trade / lot_cost))
+        if n_lots * lot_cost > cash or n_lots * lot_cost >= 2.0 * deficit:
+            continue
+        buy(i, n_lots * lots[i])
+        heapq.heappush(heap, (-deficits[i], i))
+
+    # and spread the rest over the holdings that can be bought in any amount
+    fractional = [i for i, lot in enumerate(lots) if not lot and deficits[i] > 0.0]
+    level = _water_level([deficits[i] for i in fractional], cash)
+    for i in fractional:
+        amount = deficits[i] - level
+        if amount > 0.0 and (trades[i] > 0.0 or amount >= min_trade):
+            buy(i, amount / prices[i])
+
+    buy_holdings = []
+    sell_holdings = []
+    for holding, units in zip(holdings, trades):
+        if units > 0.0:
+            buy_holdings.append(Holding(holding.fund, units, holding.target_fraction))
+        elif units < 0.0:
+            sell_holdings.append(Holding(holding.fund, -units, holding.target_fraction))
+    return Portfolio(buy_holdings), Portfolio(sell_holdings), cash
+
+
+def _band_columns(funds, absolute, relative, bands):
+    abs_tolerance = np.full(len(funds), absolute, dtype=float)
+    rel_tolerance = np.full(len(funds), relative, dtype=float)
+    if bands:
+        for i, fund in enumerate(funds):
+            for key in (fund_key(fund), fund.isin):
+                if key in bands:
+                    abs_tolerance[i], rel_tolerance[i] = bands[key]
+                    break
+    return abs_tolerance, rel_tolerance
+
+
+def rebalance_within_bands(
+    portfolio,
+    cash=0.0,
+    *,
+    absolute=0.0,
+    relative=0.0,
+    bands=None,
+    to="target",
+    dealing_cost=0.0,
+    dealing_rate=0.0,
+):
+    """
+    Calculate the trades that bring every holding of a portfolio back within
+    a tolerance band around its target allocation, trading only the holdings
+    that are outside of their band.
+
+    The band of a holding is the larger of an absolute and a relative
+    tolerance: a holding with target fraction `t` is within its band if its
+    current fraction of the total value differs from `t` by at most
+    `max(absolute, relative * t)`. The band checks are vectorised, so large
+    portfolios can be checked quickly.
+
+    A holding is only traded if the value by which it is outside of its band
+    is more than the dealing costs of the trade. Purchases are limited to the
+    cash available plus the proceeds of the sales, net of dealing costs: if
+    these do not cover all the purchases, the holdings furthest outside of
+    their band are bought first, and the last purchase made is scaled down to
+    the cash left.
+
+    Parameters
+    ----------
+    portfolio : lisatools.Portfolio
+    cash : float, default 0.0
+        Cash available to invest, in addition to the holdings.
+    absolute : float, default 0.0
+        Absolute tolerance, as a fraction of the total value.
+    relative : float, default 0.0
+        Relative tolerance, as a fraction of the target fraction.
+    bands : mapping or None, default None
+        Pairs of absolute and relative tolerance, keyed by ticker symbol or
+        ISIN, overriding `absolute` and `relative` for individual funds.
+    to : {"target", "edge"}, default "target"
+        Whether holdings outside of their band are traded back to their target,
+        or only to the nearest edge of their band, which trades less.
+    dealing_cost : float, default 0.0
+        Fixed cost of each trade.
+    dealing_rate : float, default 0.0
+        Cost of each trade as a fraction of its value.
+
+    Returns
+    -------
+    buy : lisatools.Portfolio
+        Funds to purchase, with positive `units` values.
+    sell : lisatools.Portfolio
+        Funds to sell, with positive `units` values.
+    cash : float
+        Cash left over after the trades and their dealing costs.
+
+    Example
+    -------
+    Trade holdings more than 5 percentage points (or 25%) away from target,
+    with a dealing cost of 1.50 per trade.
+
+    >>> buy, sell, cash = lisatools.rebalancing.rebalance_within_bands(
+    ...     pf, absolute=0.05, relative=0.25, dealing_cost=1.5
+    ... )
+    """
+    cpf = ColumnarPortfolio.from_portfolio(portfolio)
+    values = cpf.values()
+    total = float(values.sum()) + cash
+    targets = cpf.target_fractions
+    abs_tolerance, rel_tolerance = _band_columns(cpf.funds, absolute, relative, bands)
+    tolerance = np.maximum(abs_tolerance, rel_tolerance * targets)
+
+    weights = values / total if total else np.zeros_like(values)
+    deviation = weights - targets
+    excess = (np.abs(deviation) - tolerance) * total
+    if to == "target":
+        new_weights = targets
+    elif to == "edge":
+        new_weights = np.maximum(targets + np.sign(deviation) * tolerance, 0.0)
+    else:
+        raise ValueError(f"unknown rebalancing destination {to!r}")
+
+    diff = new_weights * total - values
+    costs = dealing_cost + dealing_rate * np.abs(diff)
+    # only trade holdings that are outside of their band by more than the
+    # cost of trading them
+    diff = np.where((excess > 0.0) & (excess > costs) & (diff != 0.0), diff, 0.0)
+
+    sales = diff < 0.0
+    cash -= float(diff[sales].sum()) + float(costs[sales].sum())
+    # buy the holdings furthest outside of their band first, as far as the
+    # cash allows
+    for i in sorted(np.flatnonzero(diff > 0.0), key=lambda i: -excess[i]):
+        budget = (cash - dealing_cost) / (1.0 + dealing_rate)
+        if budget <= 0.0:
+            diff[i] = 0.0
+        elif diff[i] >= budget:
+            diff[i] = budget
+            cash = 0.0
+        else:
+            cash -= diff[i] + dealing_cost + dealing_rate * diff[i]
+
+    units = diff / cpf.prices
+    buy = cpf[units > 0.0]
+    buy.units = units[units > 0.0]
+    sell = cpf[units < 0.0]
+    sell.units = -units[units < 0.0]
+    return buy.to_portfolio(), sell.to_portfolio(), cash
@@ -1,11 +1,116 @@
 import datetime
 import functools
+import math
+import threading
 
 import cachetools.func
 import requests
-from bs4 import BeautifulSoup
+import requests.adapters
+import urllib3.util
 
+from lisatools.cache import PriceCache
 from lisatools.fund import ETF
+from lisatools.history import PriceHistory
+from lisatools.tables import extract_table
+
+
+_cache = None
+_cache_disabled = False
+_session = None
+# guards the creation of the cache and session, which may first be needed by
+# several threads at once (see `lisatools.Portfolio.update_prices`)
+_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Return the persistent cache used for price histories, creating the default
+    `lisatools.cache.PriceCache` on first use. Returns `None` if caching has
+    been disabled using `set_cache(None)`.
+    """
+    global _cache
+    with _lock:
+        if _cache is None and not _cache_disabled:
+            _cache = PriceCache()
+        return _cache
+
+
+def set_cache(cache):
+    """
+    Replace the persistent cache used for price histories.
+
+    Parameters
+    ----------
+    cache : lisatools.cache.PriceCache or None
+        The new cache. If `None`, price histories are not cached on disk.
+    """
+    global _cache, _cache_disabled
+    with _lock:
+        _cache = cache
+        _cache_disabled = cache is None
+
+
+def make_session(*, retries=3, backoff_factor=0.5, pool_maxsize=10):
+    """
+    Construct a `requests.Session` suitable for scraping price data.
+
+    Connections are kept alive and pooled per host, and requests that fail with
+    a connection error or with status 429 (Too Many Requests) or 5xx are
+    retried with exponential backoff, respecting any Retry-After header.
+
+    Parameters
+    ----------
+    retries : int, default 3
+        Maximum number of retries per request.
+    backoff_factor : float, default 0.5
+        Base of the exponential backoff between retries, in seconds.
+    pool_maxsize : int, default 10
+        Maximum number of connections kept alive per host. This should be at
+        least the number of concurrent requests, e.g. the `max_workers` of
+        `lisatools.Portfolio.update_prices`.
+    """
+    retry = urllib3.util.Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        max_retries=retry, pool_maxsize=pool_maxsize
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Return the session used for all requests, creating one with the defaults
+    of `make_session` on first use.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def set_session(session):
+    """
+    Replace the session used for all requests.
+
+    Parameters
+    ----------
+    session : requests.Session or None
+        The new session, e.g. one constructed by `make_session` or one with a
+        custom transport adapter mounted. If `None`, a default session is
+        created on next use.
+    """
+    global _session
+    with _lock:
+        _session = session
 
 
 @functools.singledispatch
@@ -27,16 +132,98 @@ def _(fund):
 
 
 @cachetools.func.ttl_cache
-def retrieve_history(url):
+def retrieve_table(url, timeout=None):
+    """
+    Extract the table from the FT's historical price data page.
+
+    Only the text of the table is kept (see `lisatools.tables.extract_table`),
+    and the result is cached using `cachetools.TTLCache` with its default
+    time-to-live of 600 seconds.
+
+    Parameters
+    ----------
+    url : str
+        URL of the historical price data page.
+    timeout : float or None, default None
+        Time in seconds to wait for the server to respond. If `None`, wait
+        indefinitely.
+
+    Returns
+    -------
+    lisatools.tables.HistoryTable
+    """
+    response = get_session().get(url, timeout=timeout)
+    return _extract_response(response)
+
+
+def _extract_response(response):
+    response.raise_for_status()
+    content = response.content.decode(response.encoding or "utf-8", errors="replace")
+    price_history = extract_table(content)
+    if price_history is None:
+        raise ValueError(f"no historical prices table found at {response.url}")
+    return price_history
+
+
+def parse_table(price_history):
+    """
+    Extract the full price history from a table of fund pricing as provided
+    by the FT.
+
+    The table is parsed in a single pass over its rows. Columns other than the
+    date and closing price are optional; if the FT does not provide them, they
+    are filled with NaN.
+
+    Parameters
+    ----------
+    price_history : lisatools.tables.HistoryTable
+        The table as returned by `retrieve_table`.
+
+    Returns
+    -------
+    lisatools.history.PriceHistory
+        The price history in chronological order.
+    """
+    # Extract positions in the row of the date and price columns
+    col_names = price_history.columns
+    date_index = col_names.index("Date")
+    indices = [
+        col_names.index(name) if name in col_names else None
+        for name in ("Open", "High", "Low", "Close", "Volume")
+    ]
+    if indices[3] is None:
+        raise ValueError("price history does not contain closing prices")
+
+    # Extract dates and prices.
+    #
+    # This implementation assumes that the current locale is identical to the
+    # one the FT uses!
+    rows = []
+    for entry in price_history.rows:
+        date = datetime.datetime.strptime(entry[date_index], "%A, %B %d, %Y").date()
+        values = [
+            math.nan if index is None else _parse_number(entry[index])
+            for index in indices
+        ]
+        rows.append((date, *values))
+
+    return PriceHistory.from_rows(rows)
+
+
+@cachetools.func.ttl_cache
+def retrieve_history(url, timeout=None):
     """
     Find an HTML table from the FT's historical price data page that can be
     further processed by beautifulsoup.
 
     The result is cached using `cachetools.TTLCache` with its default time-to-live of
-    600 seconds.
+    600 seconds. `retrieve_table` is faster, and keeps only the text of the
+    table.
     """
-    request = requests.get(url)
-    soup = BeautifulSoup(request.content, "html.parser")
+    from bs4 import BeautifulSoup  # deferred, to keep imports fast
+
+    response = get_session().get(url, timeout=timeout)
+    soup = BeautifulSoup(response.content, "html.parser")
     price_history = soup.find(
         "table", {"class": "mod-tearsheet-historical-prices__results"}
     )
@@ -47,6 +234,8 @@ def parse_history(price_history):
     """
     Extract the latest price and date from an HTML table of fund pricing
     as provided by the FT.
+
+    See `parse_table` for the full price history.
     """
     # Parse table to get the latest price information (first row of data)
     body = price_history.find("tbody")
@@ -75,13 +264,111 @@ def parse_history(price_history):
     return price, date
 
 
-def latest_price(fund):
+_suffixes = {"k": 1.0e3, "m": 1.0e6, "bn": 1.0e9}
+
+
+def _parse_number(text):
+    text = text.replace(",", "")
+    for suffix, factor in _suffixes.items():
+        if text.endswith(suffix):
+            return float(text[: -len(suffix)]) * factor
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def load_history(url, *, timeout=None):
+    """
+    Return the price history from an FT historical price data page.
+
+    Parsed histories are stored in the persistent cache returned by
+    `get_cache`, so that repeated lookups within its time-to-live skip the
+    network. Once an entry has expired, the page is requested conditionally
+    using the ETag and Last-Modified headers of the previous response, so that
+    an unchanged page is answered by a cheap 304 (Not Modified) response.
+
+    Parameters
+    ----------
+    url : str
+        URL of the historical price data page.
+    timeout : float or None, default None
+        Time in seconds to wait for the server to respond. If `None`, wait
+        indefinitely.
+
+    Returns
+    -------
+    lisatools.history.PriceHistory
+    """
+    cache = get_cache()
+    if cache is None:
+        return parse_table(retrieve_table(url, timeout=timeout))
+
+    history = cache.get(url)
+    if history is not None:
+        return history
+
+    headers = {}
+    stale = cache.get_stale(url)
+    if stale is not None:
+        history, etag, last_modified = stale
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+    response = get_session().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and stale is not None:
+        cache.touch(url)
+        return history
+
+    history = parse_table(_extract_response(response))
+    cache.put(
+        url,
+        history,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+    return history
+
+
+def fund_history(fund, *, timeout=None):
+    """
+    Return a fund's full price history using the Financial Times' historical
+    pricing data.
+
+    Parameters
+    ----------
+    fund : lisatools.Fund
+        The fund for which the price history is looked up.
+    timeout : float or None, default None
+        Time in seconds to wait for the FT's web site to respond. If `None`,
+        wait indefinitely.
+
+    Returns
+    -------
+    lisatools.history.PriceHistory
+
+    See also
+    --------
+    load_history
+    """
+    return load_history(history_url(fund), timeout=timeout)
+
+
+def latest_price(fund, *, timeout=None):
     """
     Return a fund's latest price and matching date using the Financial Times'
     historical pricing data.
-    """
-    url = history_url(fund)
-    price_history = retrieve_history(url)
-    price, date = parse_history(price_history)
 
-    return price, date
+    This is a lookup into the (cached) full price history; see
+    `fund_history`.
+
+    Parameters
+    ----------
+    fund : lisatools.Fund
+        The fund for which the price is looked up.
+    timeout : float or None, default None
+        Time in seconds to wait for the FT's web site to respond. If `None`,
+        wait indefinitely.
+    """
+    return fund_history(fund, timeout=timeout).latest()
@@ -0,0 +1,316 @@
+import copy
+import http.server
+import json
+import math
+import os
+import sys
+import threading
+import urllib.parse
+
+from lisatools import io
+from lisatools.fund import Fund, fund_key
+from lisatools.portfolio import Portfolio
+
+
+class WatchedPortfolio:
+    """
+    Portfolio loaded from a file, which is only read again when the file's
+    modification time (or size) changes, and whose prices can be refreshed
+    while it is in use.
+
+    The portfolio returned by `portfolio` is a snapshot that is never changed
+    afterwards: reloading the file or refreshing the prices replaces it, so it
+    can be used by several threads without locking. Prices obtained by
+    `refresh` are kept, and applied again when the file is reloaded unless the
+    file holds a more recent price.
+
+    Parameters
+    ----------
+    path : path-like object or str
+        Location of a portfolio in JSON format, or in line-delimited JSON
+        format if its name ends in .jsonl.
+
+    Example
+    -------
+    >>> watched = lisatools.server.WatchedPortfolio("portfolio.json")
+    >>> pf, errors = watched.refresh()
+    >>> watched.portfolio().total_value()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._portfolio = None
+        self._prices = {}
+
+    def __repr__(self):
+        return f"WatchedPortfolio({str(self.path)!r})"
+
+    def _load(self):
+        if str(self.path).endswith(".jsonl"):
+            return Portfolio.load_jsonl(self.path)
+        return Portfolio.load(self.path)
+
+    def _apply_prices(self, pf):
+        for holding in pf:
+            fund = holding.fund
+            for key in (fund_key(fund), fund.isin):
+                if key in self._prices:
+                    price, date = self._prices[key]
+                    if date > fund.date:
+                        fund.update_price(price, date=date)
+                    break
+
+    def portfolio(self):
+        """
+        Return the portfolio, reloading the file if it has changed since it
+        was last read. The portfolio must not be modified.
+        """
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                pf = self._load()
+                self._apply_prices(pf)
+                self._portfolio, self._stamp = pf, stamp
+            return self._portfolio
+
+    def refresh(self, **kwargs):
+        """
+        Update the prices of the portfolio's funds.
+
+        The prices are looked up for a copy of the portfolio, so the current
+        portfolio can still be used in the meantime.
+
+        Arguments
+        ---------
+        **kwargs
+            Passed on to `lisatools.Portfolio.update_prices`.
+
+        Returns
+        -------
+        portfolio : lisatools.Portfolio
+            The copy of the portfolio whose prices were looked up, which may
+            differ from the current portfolio if the file was reloaded in the
+            meantime.
+        errors : list
+            One entry per holding of `portfolio`; see
+            `lisatools.Portfolio.update_prices`.
+        """
+        pf = copy.deepcopy(self.portfolio())
+        errors = pf.update_prices(**kwargs)
+        prices = {}
+        for holding, error in zip(pf, errors):
+            key = fund_key(holding.fund)
+            if error is None and key is not None:
+                prices[key] = (holding.fund.price, holding.fund.date)
+        with self._lock:
+            self._prices.update(prices)
+            # the file may have been reloaded in the meantime
+            current = copy.deepcopy(self._portfolio)
+            self._apply_prices(current)
+            self._portfolio = current
+        return pf, errors
+
+
+def _refresh_periodically(watched, interval, stop, kwargs):
+    while True:
+        try:
+            pf, errors = watched.refresh(**kwargs)
+        except Exception as exc:
+            print(f"could not refresh prices: {exc}", file=sys.stderr)
+        else:
+            for holding, error in zip(pf, errors):
+                if error is not None:
+                    print(
+                        f"could not update {holding.fund.description}: {error}",
+                        file=sys.stderr,
+                    )
+        if stop.wait(interval):
+            return
+
+
+def _flag(query, name):
+    return query.get(name, ["0"])[-1].lower() in ("1", "true", "yes")
+
+
+def _amount(name, text):
+    # a finite, non-negative number given as a query parameter
+    value = float(text)
+    if not math.isfinite(value) or value < 0.0:
+        raise ValueError(f"{name} must be a non-negative number, got {text!r}")
+    return value
+
+
+def _rebalance_options(query, lot_sizes):
+    options = {
+        "cash": _amount("cash", query.get("cash", ["0"])[-1]),
+        "min_trade": _amount("min_trade", query.get("min_trade", ["0"])[-1]),
+        "buy_only": _flag(query, "buy_only"),
+        "lot_sizes": dict(lot_sizes),
+    }
+    for arg in query.get("lot_size", []):
+        key, sep, units = arg.partition("=")
+        if not sep:
+            raise ValueError(f"expected KEY=UNITS, got {arg!r}")
+        options["lot_sizes"][key] = _amount("lot_size", units)
+    options["constrained"] = (
+        _flag(query, "constrained")
+        or options["buy_only"]
+        or options["min_trade"] > 0.0
+        or "lot_size" in query
+    )
+    return options
+
+
+def _rebalance(pf, *, cash, min_trade, buy_only, lot_sizes, constrained):
+    if constrained:
+        from lisatools import rebalancing  # deferred, to keep imports fast
+
+        buy, sell, cash = rebalancing.rebalance(
+            pf, cash, lot_sizes=lot_sizes, min_trade=min_trade, buy_only=buy_only
+        )
+        return {"buy": buy.holdings, "sell": sell.holdings, "cash": cash}
+
+    if cash:
+        pf = copy.deepcopy(pf)
+        pf.add_fund(Fund("Cash", price=100.0), value=cash, target=0.0)
+    buy, sell = pf.trade_to_target()
+    return {"buy": buy.holdings, "sell": sell.holdings}
+
+
+def _encode(body):
+    return json.dumps(body, cls=io.JSONEncoder, allow_nan=False).encode()
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path not in ("/portfolio", "/rebalance"):
+            self._send(404, {"error": f"unknown path {url.path}"})
+            return
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            pf = self.server.watched.portfolio()
+            if url.path == "/rebalance":
+                options = _rebalance_options(query, self.server.lot_sizes)
+        except (OSError, ValueError) as exc:
+            self._send(400, {"error": str(exc)})
+            return
+        try:
+            if url.path == "/portfolio":
+                body = {"holdings": pf.holdings, "total_value": pf.total_value()}
+            else:
+                body = _rebalance(pf, **options)
+            data = _encode(body)
+        except Exception as exc:
+            self.log_error("could not answer %r: %r", self.path, exc)
+            self._send(500, {"error": f"internal error: {exc}"})
+            return
+        self._send(200, data=data)
+
+    def _send(self, status, body=None, *, data=None):
+        if data is None:
+            data = _encode(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(path, address=("127.0.0.1", 8000), *, lot_sizes=None):
+    """
+    Create an HTTP server answering queries about a portfolio file.
+
+    The server keeps the portfolio in memory (see `WatchedPortfolio`) and
+    handles each request in its own thread. It answers GET requests for:
+
+    /portfolio
+        The holdings of the portfolio and its total value.
+    /rebalance
+        The trades required to rebalance the portfolio, as the "buy" and
+        "sell" holdings. By default, these are the trades of
+        `lisatools.Portfolio.trade_to_target`, after adding the amount of
+        cash given by the `cash` parameter. If any of the parameters
+        `constrained`, `buy_only`, `min_trade` or `lot_size` (KEY=UNITS, can
+        be repeated) is given, the trades of
+        `lisatools.rebalancing.rebalance` are returned instead, along with
+        the "cash" left over.
+
+    Responses are in JSON format. Invalid query parameters (e.g. a negative
+    or infinite amount of cash) are answered with status 400, and failures to
+    compute the answer with status 500, with a message as "error".
+
+    Parameters
+    ----------
+    path : path-like object or str
+        Location of the portfolio file.
+    address : tuple, default ("127.0.0.1", 8000)
+        Host and port to listen on. Use port 0 to pick any free port.
+    lot_sizes : mapping or None, default None
+        Lot sizes used for constrained rebalancing, keyed by ticker symbol or
+        ISIN, which the `lot_size` parameter of a query adds to or overrides.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        With the `WatchedPortfolio` as its `watched` attribute.
+    """
+    watched = WatchedPortfolio(path)
+    watched.portfolio()  # fail early if the file cannot be read
+    server = http.server.ThreadingHTTPServer(address, _RequestHandler)
+    server.daemon_threads = True
+    server.watched = watched
+    server.lot_sizes = dict(lot_sizes or {})
+    return server
+
+
+def serve(path, address=("127.0.0.1", 8000), *, refresh_interval=None, **kwargs):
+    """
+    Answer queries about a portfolio file over HTTP until interrupted,
+    refreshing its prices on a schedule.
+
+    Keeping a single process running avoids the start-up time of the command
+    line interface for each query, and keeps the portfolio and the caches of
+    prices warm in memory. See `make_server` for the queries answered.
+
+    Parameters
+    ----------
+    path : path-like object or str
+        Location of the portfolio file.
+    address : tuple, default ("127.0.0.1", 8000)
+        Host and port to listen on.
+    refresh_interval : float or None, default None
+        Time in seconds between refreshes of the prices (see
+        `WatchedPortfolio.refresh`), the first of which is made on start-up.
+        If `None`, prices are not refreshed.
+    **kwargs
+        Passed on to `make_server`, except for `provider` and `timeout`, which
+        are passed on to `lisatools.Portfolio.update_prices`.
+
+    Example
+    -------
+    >>> lisatools.server.serve("portfolio.json", refresh_interval=3600.0)
+    """
+    refresh_kwargs = {
+        name: kwargs.pop(name) for name in ("provider", "timeout") if name in kwargs
+    }
+    server = make_server(path, address, **kwargs)
+    stop = threading.Event()
+    if refresh_interval is not None:
+        threading.Thread(
+            target=_refresh_periodically,
+            args=(server.watched, refresh_interval, stop, refresh_kwargs),
+            daemon=True,
+        ).start()
+    host, port = server.server_address[:2]
+    print(f"serving {path} on http://{host}:{port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
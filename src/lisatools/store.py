@@ -0,0 +1,297 @@
+import copy
+import datetime
+import math
+import os
+import pathlib
+import sqlite3
+import threading
+
+from lisatools.history import PriceHistory
+from lisatools.portfolio import Holding, Portfolio
+
+
+_schema_version = 1
+
+# stay well below SQLite's limit on the number of parameters of a statement
+_max_parameters = 500
+
+
+def default_path():
+    """
+    Return the default location of the price store.
+
+    The store is kept in the `lisatools` subdirectory of `$XDG_DATA_HOME`,
+    falling back to `~/.local/share` if that environment variable is not set.
+    Unlike the price cache (see `lisatools.cache`), its contents are not
+    disposable.
+    """
+    root = os.environ.get("XDG_DATA_HOME") or (pathlib.Path.home() / ".local" / "share")
+    return pathlib.Path(root) / "lisatools" / "history.sqlite"
+
+
+def _ordinal(date):
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    return date.toordinal()
+
+
+class PriceStore:
+    """
+    Local, append-only history of fund prices keyed by ISIN, stored in an
+    SQLite database indexed on ISIN and date.
+
+    Prices are only ever added: a price for an ISIN and date that is already
+    stored is kept, so that refreshing prices never loses history. Portfolios
+    can then be valued at past dates without accessing the network.
+
+    Parameters
+    ----------
+    path : path-like object, str, or None, default None
+        Location of the database file. If unspecified, the location given by
+        `default_path` is used. Use ":memory:" for a store that is not
+        persisted.
+
+    Example
+    -------
+    >>> store = lisatools.store.PriceStore()
+    >>> pf.update_prices()
+    >>> store.record(pf)
+    >>> store.portfolio_as_of(pf, "2023-01-20").total_value()
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = default_path()
+        if str(path) != ":memory:":
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version == 0:
+            self._connection.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS prices (
+                    isin TEXT NOT NULL,
+                    date INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    PRIMARY KEY (isin, date)
+                ) WITHOUT ROWID;
+                PRAGMA user_version = {_schema_version};
+                """
+            )
+        elif version != _schema_version:
+            self._connection.close()
+            raise ValueError(
+                f"unsupported price store schema version {version} in {path}"
+            )
+
+    def __repr__(self):
+        return f"PriceStore({str(self.path)!r})"
+
+    def __len__(self):
+        return self.count()
+
+    def count(self, isins=None, end=None):
+        """
+        Return the number of prices stored.
+
+        Parameters
+        ----------
+        isins : iterable of str or None, default None
+            Only count the prices of these funds.
+        end : datetime.date, str, or None, default None
+            Only count the prices on or before this date.
+        """
+        end = math.inf if end is None else _ordinal(end)
+        with self._lock:
+            if isins is None:
+                (n,) = self._connection.execute(
+                    "SELECT COUNT(*) FROM prices WHERE date <= ?", (end,)
+                ).fetchone()
+                return n
+            isins = list(dict.fromkeys(isins))
+            n = 0
+            for start in range(0, len(isins), _max_parameters):
+                chunk = isins[start : start + _max_parameters]
+                keys = ", ".join(["?"] * len(chunk))
+                (chunk_n,) = self._connection.execute(
+                    f"SELECT COUNT(*) FROM prices WHERE isin IN ({keys}) AND date <= ?",
+                    (*chunk, end),
+                ).fetchone()
+                n += chunk_n
+            return n
+
+    def revision(self):
+        """
+        Return a value that changes whenever prices are added to the store,
+        including through other connections to the same database file.
+        """
+        with self._lock:
+            (version,) = self._connection.execute("PRAGMA data_version").fetchone()
+            return version, self._connection.total_changes
+
+    def append(self, rows):
+        """
+        Add prices to the store, ignoring any price for an ISIN and date that
+        is already stored.
+
+        Parameters
+        ----------
+        rows : iterable
+            Triples of ISIN, date (a `datetime.date` or an ISO-formatted date
+            string) and price.
+
+        Returns
+        -------
+        int
+            The number of prices added.
+        """
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO prices (isin, date, price) VALUES (?, ?, ?)",
+                ((isin, _ordinal(date), price) for isin, date, price in rows),
+            )
+            return self._connection.total_changes - before
+
+    def append_history(self, isin, history):
+        """
+        Add the closing prices of a `lisatools.history.PriceHistory` to the
+        store, e.g. as returned by `lisatools.scraping.fund_history`. Missing
+        closing prices are skipped.
+
+        Returns
+        -------
+        int
+            The number of prices added.
+        """
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO prices (isin, date, price) VALUES (?, ?, ?)",
+                (
+                    (isin, ordinal, close)
+                    for ordinal, close in zip(history.ordinals, history.close)
+                    if not math.isnan(close)
+                ),
+            )
+            return self._connection.total_changes - before
+
+    def record(self, portfolio):
+        """
+        Add the current price of every fund held in a portfolio, at the date
+        of that price. Funds without an ISIN are skipped.
+
+        Returns
+        -------
+        int
+            The number of prices added.
+        """
+        return self.append(
+            (holding.fund.isin, holding.fund.date, holding.fund.price)
+            for holding in portfolio
+            if holding.fund.isin != "None"
+        )
+
+    def history(self, isin, start=None, end=None):
+        """
+        Return the stored prices of a fund between two dates (inclusive) as a
+        `lisatools.history.PriceHistory` with only closing prices.
+
+        Parameters
+        ----------
+        isin : str
+        start, end : datetime.date, str, or None, default None
+            First and last date to include. If unspecified, the history is not
+            limited on that side.
+        """
+        start = -1 if start is None else _ordinal(start)
+        end = math.inf if end is None else _ordinal(end)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT date, price FROM prices "
+                "WHERE isin = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (isin, start, end),
+            ).fetchall()
+        ordinals, close = zip(*rows) if rows else ((), ())
+        return PriceHistory.from_ordinals(ordinals, close=close)
+
+    def prices_as_of(self, isins, date):
+        """
+        Return the latest stored price on or before a date of each of a number
+        of funds.
+
+        Each chunk of up to 500 ISINs is looked up using a single query, which
+        finds every price using the (ISIN, date) index.
+
+        Parameters
+        ----------
+        isins : iterable of str
+        date : datetime.date or str
+
+        Returns
+        -------
+        dict
+            Pairs of price and the `datetime.date` of that price, keyed by ISIN.
+            Funds without any price on or before `date` are left out.
+        """
+        isins = list(dict.fromkeys(isins))
+        ordinal = _ordinal(date)
+        prices = {}
+        with self._lock:
+            for start in range(0, len(isins), _max_parameters):
+                chunk = isins[start : start + _max_parameters]
+                keys = ", ".join(["(?)"] * len(chunk))
+                rows = self._connection.execute(
+                    f"WITH keys (isin) AS (VALUES {keys}) "
+                    "SELECT prices.isin, prices.date, prices.price "
+                    "FROM keys JOIN prices ON prices.isin = keys.isin "
+                    "AND prices.date = ("
+                    "    SELECT MAX(date) FROM prices "
+                    "    WHERE isin = keys.isin AND date <= ?"
+                    ")",
+                    (*chunk, ordinal),
+                )
+                for isin, day, price in rows:
+                    prices[isin] = (price, datetime.date.fromordinal(day))
+        return prices
+
+    def portfolio_as_of(self, portfolio, date):
+        """
+        Return a copy of a portfolio with every fund priced at the latest
+        stored price on or before a date.
+
+        The funds are copied, so the prices of the original portfolio are not
+        changed. Funds shared between holdings remain shared in the copy.
+
+        Raises
+        ------
+        LookupError
+            If there is no stored price on or before `date` for some fund.
+        """
+        prices = self.prices_as_of((holding.fund.isin for holding in portfolio), date)
+        missing = [
+            holding.fund.description
+            for holding in portfolio
+            if holding.fund.isin not in prices
+        ]
+        if missing:
+            raise LookupError(f"no price as of {date} for " + ", ".join(missing))
+        funds = {}
+        holdings = []
+        for holding in portfolio:
+            fund = funds.get(id(holding.fund))
+            if fund is None:
+                fund = funds[id(holding.fund)] = copy.copy(holding.fund)
+                price, day = prices[fund.isin]
+                fund.update_price(price, date=day)
+            holdings.append(Holding(fund, holding.units, holding.target_fraction))
+        return Portfolio(holdings)
+
+    def close(self):
+        """
+        Close the connection to the underlying database.
+        """
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,229 @@
+import html.parser
+
+
+TABLE_CLASS = "mod-tearsheet-historical-prices__results"
+FULL_TEXT_CLASS = "mod-ui-hide-small-below"
+
+_chunk_size = 1 << 16
+
+
+class HistoryTable:
+    """
+    Text content of the historical prices table on an FT tearsheet page.
+
+    Only the table itself is kept, rather than a tree of the whole page. Where
+    the FT encodes a cell twice (for display on different screen sizes), the
+    unabbreviated version is kept.
+
+    Attributes
+    ----------
+    columns : list of str
+        Column names from the table header.
+    rows : list of list of str
+        Cell texts of each row in the table body, in the order of the page.
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = [list(row) for row in rows]
+
+    def __repr__(self):
+        return f"HistoryTable({self.columns!r}, {self.rows!r})"
+
+    def __eq__(self, other):
+        return self.columns == other.columns and self.rows == other.rows
+
+
+class _TableExtractor(html.parser.HTMLParser):
+    """
+    Streaming parser that only materialises the historical prices table.
+
+    Everything outside of the table is skipped, and parsing can stop as soon
+    as the table has been closed (see `done`).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.columns = []
+        self.rows = []
+        self.found = False
+        self.done = False
+        self._depth = 0  # nesting level of tables inside the target table
+        self._section = None
+        self._row = None
+        self._cell = None  # all text in the current cell
+        self._full = None  # text inside the unabbreviated span, if any
+        self._spans = []  # whether each open span holds the unabbreviated text
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            if self._depth:
+                self._depth += 1
+            elif TABLE_CLASS in _classes(attrs):
+                self.found = True
+                self._depth = 1
+            return
+        if self._depth != 1:
+            return
+        if tag in ("thead", "tbody"):
+            self._section = tag
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("th", "td") and self._row is not None:
+            self._cell = []
+            self._full = None
+            self._spans = []
+        elif tag == "span" and self._cell is not None:
+            full = FULL_TEXT_CLASS in _classes(attrs)
+            self._spans.append(full)
+            if full:
+                self._full = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        if tag == "table":
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+            return
+        if self._depth != 1:
+            return
+        if tag in ("th", "td") and self._cell is not None:
+            parts = self._cell if self._full is None else self._full
+            self._row.append(" ".join("".join(parts).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._section == "thead":
+                self.columns.extend(self._row)
+            elif self._row:
+                self.rows.append(self._row)
+            self._row = None
+        elif tag in ("thead", "tbody"):
+            self._section = None
+        elif tag == "span" and self._spans:
+            self._spans.pop()
+
+    def handle_data(self, data):
+        if self._cell is None or self.done:
+            return
+        self._cell.append(data)
+        if any(self._spans):
+            self._full.append(data)
+
+
+def _classes(attrs):
+    for name, value in attrs:
+        if name == "class" and value:
+            return value.split()
+    return []
+
+
+def _extract_html_parser(content):
+    extractor = _TableExtractor()
+    for start in range(0, len(content), _chunk_size):
+        extractor.feed(content[start : start + _chunk_size])
+        if extractor.done:
+            break
+    if not extractor.found:
+        return None
+    return HistoryTable(extractor.columns, extractor.rows)
+
+
+def _extract_lxml(content):
+    import lxml.html
+
+    document = lxml.html.fromstring(content)
+    tables = document.xpath(
+        "//table[contains(concat(' ', normalize-space(@class), ' '), "
+        f"' {TABLE_CLASS} ')]"
+    )
+    if not tables:
+        return None
+
+    def text(cell):
+        full = cell.xpath(
+            ".//span[contains(concat(' ', normalize-space(@class), ' '), "
+            f"' {FULL_TEXT_CLASS} ')]"
+        )
+        return " ".join((full[0] if full else cell).text_content().split())
+
+    table = tables[0]
+    columns = [text(cell) for cell in table.xpath("./thead/tr/th | ./thead/tr/td")]
+    rows = [
+        [text(cell) for cell in row.xpath("./td | ./th")]
+        for row in table.xpath("./tbody/tr")
+    ]
+    return HistoryTable(columns, [row for row in rows if row])
+
+
+def _extract_bs4(content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    table = soup.find("table", {"class": TABLE_CLASS})
+    if table is None:
+        return None
+
+    def text(cell):
+        full = cell.find("span", {"class": FULL_TEXT_CLASS})
+        return " ".join((full or cell).get_text().split())
+
+    columns = [text(cell) for cell in table.find("thead").find_all(["th", "td"])]
+    rows = [
+        [text(cell) for cell in row.find_all(["td", "th"])]
+        for row in table.find("tbody").find_all("tr")
+    ]
+    return HistoryTable(columns, [row for row in rows if row])
+
+
+_backends = {
+    "lxml": _extract_lxml,
+    "html.parser": _extract_html_parser,
+    "bs4": _extract_bs4,
+}
+
+
+def available_backends():
+    """
+    Return the names of the table extraction backends that can be used, in
+    order of preference.
+
+    The "lxml" backend is only available if the optional `lxml` package is
+    installed. The "bs4" backend builds a tree of the whole page and is mainly
+    kept as a fallback.
+    """
+    try:
+        import lxml.html  # noqa: F401
+    except ImportError:
+        return ["html.parser", "bs4"]
+    return ["lxml", "html.parser", "bs4"]
+
+
+def extract_table(content, *, backend=None):
+    """
+    Extract the historical prices table from an FT tearsheet page.
+
+    Parameters
+    ----------
+    content : str
+        The HTML of the page.
+    backend : str or None, default None
+        Name of the backend used to parse the HTML; see `available_backends`.
+        If unspecified, the available backends are tried in order of preference
+        until one of them finds the table.
+
+    Returns
+    -------
+    lisatools.tables.HistoryTable or None
+        The table, or `None` if the page does not contain one.
+    """
+    if backend is not None:
+        return _backends[backend](content)
+    for name in available_backends():
+        table = _backends[name](content)
+        if table is not None:
+            return table
+    return None
@@ -79,3 +79,34 @@ def example_json(example_portfolio_path):
     with open(example_portfolio_path, "r") as handle:
         text = handle.read()
     return text
+
+
+@pytest.fixture(autouse=True)
+def price_cache(tmp_path, monkeypatch):
+    cache = lisatools.cache.PriceCache(tmp_path / "prices.sqlite")
+    monkeypatch.setattr(lisatools.scraping, "_cache", cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def ft_history_html():
+    path = pathlib.Path(".") / "tests" / "ft_history.html"
+    with open(path, "rb") as handle:
+        content = handle.read()
+    return content
+
+
+@pytest.fixture
+def ft_history():
+    dates = [datetime.date(2023, 1, day) for day in (17, 18, 19, 20)]
+    closes = [181.36, 1180.75, 179.02, 180.49]
+    h = lisatools.history.PriceHistory(
+        dates,
+        open=closes,
+        high=[181.36, 1181.0, 179.02, 180.49],
+        low=[181.36, 1179.5, 179.02, 180.49],
+        close=closes,
+        volume=[2.5e6, float("nan"), 0.0, 1250.0],
+    )
+    return h
@@ -0,0 +1,143 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import lisatools
+from lisatools import analytics
+from lisatools.store import PriceStore
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0003, 0.01, size=(300, 2))
+    return 100.0 * np.exp(np.cumsum(returns, axis=0))
+
+
+@pytest.fixture
+def dates(prices):
+    start = datetime.date(2022, 1, 3)
+    return [start + datetime.timedelta(days=i) for i in range(len(prices))]
+
+
+@pytest.fixture
+def store(two_fund_6040, dates, prices):
+    store = PriceStore(":memory:")
+    for j, holding in enumerate(two_fund_6040):
+        store.append(
+            (holding.fund.isin, date, price) for date, price in zip(dates, prices[:, j])
+        )
+    return store
+
+
+def test_full_window_statistics():
+    values = np.array([100.0, 110.0, 99.0, 104.5, 120.0, 90.0])
+    assert analytics.max_drawdown(values) == pytest.approx(0.25)
+    assert analytics.drawdown(values)[2] == pytest.approx(0.1)
+    r = analytics.returns(values)
+    assert r[0] == pytest.approx(0.1)
+    assert analytics.volatility(r, 1) == pytest.approx(np.std(r, ddof=1))
+    contributions = analytics.risk_contributions([0.6, 0.4], [[0.04, 0.0], [0.0, 0.01]])
+    assert contributions == pytest.approx([0.9, 0.1])
+    assert contributions.sum() == pytest.approx(1.0)
+
+
+def test_rolling_moments():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=200)
+    moments = analytics.RollingMoments(20)
+    for i, value in enumerate(x):
+        moments.update(value)
+        window = x[max(0, i - 19) : i + 1]
+        assert moments.mean == pytest.approx(window.mean())
+        if len(window) > 1:
+            assert moments.variance == pytest.approx(window.var(ddof=1))
+    assert len(moments) == 20
+
+
+def test_rolling_covariance():
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=(100, 3))
+    rolling = analytics.RollingCovariance(3, 30)
+    for row in x:
+        rolling.update(row)
+    np.testing.assert_allclose(rolling.covariance, np.cov(x[-30:], rowvar=False))
+    np.testing.assert_allclose(rolling.mean, x[-30:].mean(axis=0))
+
+
+def test_rolling_drawdown():
+    values = [100.0, 120.0, 90.0, 100.0, 80.0, 85.0]
+    drawdown = analytics.RollingDrawdown(3)
+    for value in values:
+        drawdown.update(value)
+    # the peak of the last three values is 100.0
+    assert drawdown.drawdown == pytest.approx(0.15)
+    assert drawdown.max_drawdown == pytest.approx(0.25)
+    unbounded = analytics.RollingDrawdown()
+    for value in values:
+        unbounded.update(value)
+    assert unbounded.max_drawdown == pytest.approx(1 - 80 / 120)
+
+
+def test_risk_analysis(dates, prices):
+    analysis = analytics.RiskAnalysis([0.6, 0.4], window=50, periods_per_year=252)
+    analysis.extend(dates, prices)
+    fund_returns = analytics.returns(prices)
+    portfolio_returns = fund_returns @ [0.6, 0.4]
+    assert analysis.volatility() == pytest.approx(
+        analytics.volatility(portfolio_returns[-50:])
+    )
+    np.testing.assert_allclose(
+        analysis.covariance(), analytics.covariance(fund_returns[-50:])
+    )
+    assert analysis.risk_contributions().sum() == pytest.approx(1.0)
+    values = np.cumprod(np.concatenate([[1.0], 1.0 + portfolio_returns]))
+    assert analysis.value == pytest.approx(values[-1])
+    assert analysis.end == dates[-1]
+
+
+def test_analyse_cached(two_fund_6040, store, dates, prices):
+    analysis = analytics.analyse(two_fund_6040, store, window=50)
+    assert analytics.analyse(two_fund_6040, store, window=50) is analysis
+    assert analytics.analyse(two_fund_6040, store, window=20) is not analysis
+
+    # new prices are added to the cached statistics
+    last = dates[-1]
+    new_date = last + datetime.timedelta(days=1)
+    store.append([("GB00BD3RZ582", new_date, prices[-1, 0] * 1.02)])
+    assert analytics.analyse(two_fund_6040, store, window=50) is analysis
+    assert analysis.end == new_date
+    expected = analytics.RiskAnalysis([0.6, 0.4], window=50)
+    expected.extend(
+        dates + [new_date], np.vstack([prices, [prices[-1, 0] * 1.02, prices[-1, 1]]])
+    )
+    assert analysis.volatility() == pytest.approx(expected.volatility())
+    assert analysis.max_drawdown() == pytest.approx(expected.max_drawdown())
+
+
+def test_analyse_per_store(two_fund_6040, store, dates, prices):
+    analysis = analytics.analyse(two_fund_6040, store, window=50)
+    other = PriceStore(":memory:")
+    other.append(("GB00BD3RZ582", date, 100.0 + i) for i, date in enumerate(dates))
+    other.append(("IE00B42WWV65", date, 10.0) for date in dates)
+    other_analysis = analytics.analyse(two_fund_6040, other, window=50)
+    assert other_analysis is not analysis
+    assert other_analysis.volatility() != pytest.approx(analysis.volatility())
+
+
+def test_analyse_backfilled(two_fund_6040, store, dates, prices):
+    analysis = analytics.analyse(two_fund_6040, store, window=50)
+    # a price added before the latest date analysed is taken into account by
+    # computing the statistics afresh
+    store.append([("GB00BD3RZ582", dates[0] - datetime.timedelta(days=1), 1.0)])
+    recomputed = analytics.analyse(two_fund_6040, store, window=50)
+    assert recomputed is not analysis
+    assert recomputed.max_drawdown() == pytest.approx(analysis.max_drawdown())
+    assert recomputed.end == dates[-1]
+
+
+def test_analyse_missing(two_fund_6040):
+    with pytest.raises(LookupError, match="U.K. Gilt"):
+        analytics.analyse(two_fund_6040, PriceStore(":memory:"))
+    assert lisatools.analytics is analytics
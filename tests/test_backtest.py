@@ -0,0 +1,91 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from lisatools import backtest
+from lisatools.history import PriceHistory
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0003, 0.01, size=(400, 2))
+    return 100.0 * np.exp(np.cumsum(returns, axis=0))
+
+
+@pytest.fixture
+def dates(prices):
+    start = datetime.date(2021, 1, 4)
+    return [start + datetime.timedelta(days=i) for i in range(len(prices))]
+
+
+def simulate(portfolio, dates, prices, rows, targets):
+    # straightforward day-by-day simulation, for comparison
+    units = np.array([holding.units for holding in portfolio])
+    values = np.empty(len(dates))
+    for row in range(len(dates)):
+        if row in rows:
+            units = targets * (units @ prices[row]) / prices[row]
+        values[row] = units @ prices[row]
+    return values
+
+
+def test_price_matrix(ft_history):
+    other = PriceHistory(
+        [datetime.date(2023, 1, 16), datetime.date(2023, 1, 19)],
+        close=[10.0, 11.0],
+    )
+    dates, prices = backtest.price_matrix([ft_history, other])
+    assert dates == ft_history.dates
+    np.testing.assert_array_equal(prices[:, 0], ft_history.close)
+    np.testing.assert_array_equal(prices[:, 1], [10.0, 10.0, 11.0, 11.0])
+
+    dates, prices = backtest.price_matrix(
+        [ft_history, other], start=datetime.date(2023, 1, 18)
+    )
+    assert dates == ft_history.dates[1:]
+    assert backtest.price_matrix([ft_history, PriceHistory()])[0] == []
+
+
+@pytest.mark.parametrize("schedule", [None, "monthly", "quarterly", "yearly", 30])
+def test_backtest_matches_simulation(two_fund_6040, dates, prices, schedule):
+    result = backtest.backtest(two_fund_6040, dates, prices, rebalance=schedule)
+    rows = set(backtest._rebalance_rows(dates, schedule).tolist())
+    expected = simulate(two_fund_6040, dates, prices, rows, np.array([0.6, 0.4]))
+    np.testing.assert_allclose(result.values[:, 0], expected)
+    assert len(result.rebalance_dates) == len(rows)
+
+
+def test_backtest_variants(two_fund_6040, dates, prices):
+    targets = np.array([[0.6, 0.4], [1.0, 0.0], [0.2, 0.8]])
+    schedule = [dates[0], datetime.date(2021, 6, 1)]
+    result = backtest.backtest(
+        two_fund_6040, dates, prices, rebalance=schedule, targets=targets
+    )
+    assert result.values.shape == (len(dates), 3)
+    assert result.rebalance_dates == [dates[0], datetime.date(2021, 6, 1)]
+    rows = {0, dates.index(datetime.date(2021, 6, 1))}
+    for variant, target in enumerate(targets):
+        expected = simulate(two_fund_6040, dates, prices, rows, target)
+        np.testing.assert_allclose(result.values[:, variant], expected)
+
+    trades = result.trades()
+    assert trades.shape == (2, 3, 2)
+    # fully invested in the first fund after the first rebalance
+    units = np.array([h.units for h in two_fund_6040])
+    np.testing.assert_allclose(
+        (units + trades[0, 1]) * prices[0], [result.values[0, 1], 0.0]
+    )
+    np.testing.assert_allclose(
+        result.turnover()[:, 1].sum(), np.abs(trades[:, 1] * prices[sorted(rows)]).sum()
+    )
+
+
+def test_backtest_errors(two_fund_6040, dates, prices):
+    with pytest.raises(ValueError):
+        backtest.backtest(two_fund_6040, dates[:-1], prices)
+    with pytest.raises(ValueError):
+        backtest.backtest(two_fund_6040, dates, prices, rebalance="weekly")
+    with pytest.raises(ValueError):
+        backtest.backtest(two_fund_6040, dates, prices, targets=[0.2, 0.3, 0.5])
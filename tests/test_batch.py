@@ -0,0 +1,72 @@
+import datetime
+import io
+
+import pytest
+
+import lisatools
+from lisatools import batch
+
+
+@pytest.fixture
+def portfolio_dir(tmp_path, two_fund_6040, example_portfolio):
+    directory = tmp_path / "portfolios"
+    directory.mkdir()
+    two_fund_6040.save(directory / "a.json", silent=True)
+    example_portfolio.save(directory / "b.json", silent=True)
+    return directory
+
+
+@pytest.fixture
+def portfolio_jsonl(tmp_path, two_fund_6040, example_portfolio):
+    path = tmp_path / "portfolios.jsonl"
+    with open(path, "w") as handle:
+        batch.write_portfolio("a", two_fund_6040, handle)
+        handle.write("\n")
+        batch.write_portfolio("b", example_portfolio, handle)
+    return path
+
+
+def test_read_portfolios_dir(portfolio_dir, two_fund_6040, example_portfolio):
+    portfolios = list(batch.read_portfolios(portfolio_dir))
+    assert portfolios == [("a", two_fund_6040), ("b", example_portfolio)]
+
+
+def test_read_portfolios_jsonl(portfolio_jsonl, two_fund_6040, example_portfolio):
+    portfolios = list(batch.read_portfolios(portfolio_jsonl))
+    assert portfolios == [("a", two_fund_6040), ("b", example_portfolio)]
+
+
+def test_write_portfolio(two_fund_6040):
+    handle = io.StringIO()
+    batch.write_portfolio("a", two_fund_6040, handle)
+    line = handle.getvalue()
+    assert line.endswith("\n")
+    assert line.count("\n") == 1
+
+
+def test_update_prices(monkeypatch, two_fund_6040, example_portfolio):
+    calls = []
+
+    def fake_latest_price(fund, *, timeout=None):
+        calls.append(fund.isin)
+        return 100.0, datetime.date(2023, 1, 2)
+
+    monkeypatch.setattr(lisatools.scraping, "latest_price", fake_latest_price)
+    errors = batch.update_prices([two_fund_6040, example_portfolio])
+    assert errors == [[None, None], [None, None]]
+    # both portfolios hold the same two funds
+    assert sorted(calls) == sorted({h.fund.isin for h in two_fund_6040})
+    assert all(h.fund.price == 100.0 for h in example_portfolio)
+
+
+def test_rebalance_many(two_fund_6040, example_portfolio):
+    portfolios = [(str(i), two_fund_6040) for i in range(10)]
+    portfolios.append(("example", example_portfolio))
+    results = list(batch.rebalance_many(portfolios, max_workers=2, chunksize=3))
+    assert sorted(name for name, _, _ in results) == sorted(
+        name for name, _ in portfolios
+    )
+    expected = {"example": example_portfolio.trade_to_target()}
+    expected.update({str(i): two_fund_6040.trade_to_target() for i in range(10)})
+    for name, buy, sell in results:
+        assert (buy, sell) == expected[name]
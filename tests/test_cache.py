@@ -0,0 +1,62 @@
+import datetime
+import time
+import types
+
+import pytest
+
+import lisatools
+from lisatools.cache import PriceCache
+from lisatools.history import PriceHistory
+
+
+@pytest.fixture
+def one_day():
+    return PriceHistory([datetime.date(2023, 1, 2)], close=[1.0])
+
+
+def test_cache_put_get(tmp_path, ft_history):
+    cache = PriceCache(tmp_path / "prices.sqlite")
+    assert cache.get("a") is None
+    cache.put("a", ft_history)
+    assert cache.get("a") == ft_history
+    assert len(cache) == 1
+    cache.clear()
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_persistent(tmp_path, one_day):
+    path = tmp_path / "prices.sqlite"
+    cache = PriceCache(path)
+    cache.put("a", one_day)
+    cache.close()
+    assert PriceCache(path).get("a") == one_day
+
+
+def test_cache_ttl(one_day):
+    cache = PriceCache(":memory:", ttl=0.0)
+    cache.put("a", one_day)
+    time.sleep(0.01)
+    assert cache.get("a") is None
+
+
+def test_cache_maxsize(one_day, monkeypatch):
+    # the order of use does not depend on the resolution of the clock
+    clock = types.SimpleNamespace(time=lambda: 1.0e9)
+    monkeypatch.setattr(lisatools.cache, "time", clock)
+    cache = PriceCache(":memory:", maxsize=2)
+    cache.put("a", one_day)
+    cache.put("b", one_day)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.put("c", one_day)
+    assert len(cache) == 2
+    assert cache.get("a") == one_day
+    assert cache.get("b") is None
+    assert cache.get("c") == one_day
+
+
+def test_latest_price_cached(price_cache, ft_history, ftse_global, ftse_global_url):
+    price_cache.put(ftse_global_url, ft_history)
+    price, date = lisatools.scraping.latest_price(ftse_global)
+    assert price == 180.49
+    assert date == datetime.date(2023, 1, 20)
@@ -1,6 +1,10 @@
+import io
+import subprocess
+import sys
+
 import pytest
 
-from lisatools import cli, Fund, Holding, Portfolio
+from lisatools import batch, cli, rebalancing, Fund, Holding, Portfolio
 
 
 @pytest.mark.parametrize("option", ("-h", "--help"))
@@ -120,3 +124,114 @@ def test_rebalance(capsys, option, example_portfolio_path, example_portfolio):
     ]
     output_portfolio = Portfolio(buy_holdings + sell_holdings)
     assert out.strip() == str(output_portfolio)
+
+
+@pytest.mark.parametrize("source", ("directory", "jsonl"))
+def test_batch(capsys, tmp_path, source, example_portfolio):
+    if source == "directory":
+        path = tmp_path / "portfolios"
+        path.mkdir()
+        for name in ("a", "b"):
+            example_portfolio.save(path / f"{name}.json", silent=True)
+    else:
+        path = tmp_path / "portfolios.jsonl"
+        with open(path, "w") as handle:
+            for name in ("a", "b"):
+                batch.write_portfolio(name, example_portfolio, handle)
+    args = [str(path), "--batch", "-r", "-j", "2"]
+    try:
+        cli.main(args)
+    except SystemExit:
+        pass
+    out, err = capsys.readouterr()
+    assert err == ""
+    buy, sell = example_portfolio.trade_to_target()
+    sell_holdings = [
+        Holding(h.fund, -h.units, h.target_fraction) for h in sell.holdings
+    ]
+    expected = io.StringIO()
+    batch.write_portfolio("a", Portfolio(buy.holdings + sell_holdings), expected)
+    lines = sorted(out.splitlines())
+    assert lines[0] == expected.getvalue().strip()
+    assert lines[1] == lines[0].replace('"name": "a"', '"name": "b"')
+
+
+def test_jsonl(capsys, tmp_path, example_portfolio_path, example_portfolio):
+    file = tmp_path / "out.jsonl"
+    args = [str(example_portfolio_path), "-o", str(file)]
+    try:
+        cli.main(args)
+    except SystemExit:
+        pass
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert err == ""
+    assert Portfolio.load_jsonl(file) == example_portfolio
+    try:
+        cli.main([str(file)])
+    except SystemExit:
+        pass
+    out, err = capsys.readouterr()
+    assert out.strip() == str(example_portfolio)
+
+
+def test_lazy_imports():
+    # importing the CLI must not pull in the dependencies needed for scraping
+    heavy = ["requests", "bs4", "cachetools", "numpy", "importlib.metadata"]
+    code = (
+        "import sys, lisatools.cli; "
+        f"print([m for m in {heavy!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("option", ("-p", "--prices"))
+def test_prices(capsys, tmp_path, option, example_portfolio_path, example_portfolio):
+    path = tmp_path / "prices.csv"
+    path.write_text("ISIN,price,date\nGB00BD3RZ582,180.49,2023-01-20\n")
+    args = [str(example_portfolio_path), option, str(path)]
+    try:
+        cli.main(args)
+    except SystemExit:
+        pass
+    out, err = capsys.readouterr()
+    assert err.splitlines() == [
+        "no price for VGOV: U.K. Gilt UCITS ETF",
+        "stale price for VGOV: U.K. Gilt UCITS ETF (2022-11-21)",
+    ]
+    example_portfolio.apply_prices(path)
+    assert out.strip() == str(example_portfolio)
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        ["--rebalance-within-cash"],
+        ["--buy-only", "--min-trade", "10", "--lot-size", "VGOV=10"],
+    ),
+)
+def test_rebalance_within_cash(
+    capsys, options, example_portfolio_path, example_portfolio
+):
+    args = [str(example_portfolio_path), "-c", "500", *options]
+    cli.main(args)
+    out, err = capsys.readouterr()
+    lot_size = 10.0 if "--lot-size" in options else 1.0
+    buy, sell, cash = rebalancing.rebalance(
+        example_portfolio,
+        500.0,
+        lot_sizes={"VGOV": lot_size},
+        min_trade=10.0 if "--min-trade" in options else 0.0,
+        buy_only="--buy-only" in options,
+    )
+    assert err == f"cash left over: {cash:.2f}\n"
+    assert out.strip() == str(Portfolio(buy.holdings))
+
+
+def test_rebalance_conflict(capsys, example_portfolio_path):
+    with pytest.raises(SystemExit):
+        cli.main([str(example_portfolio_path), "-r", "--buy-only"])
+    assert "cannot be combined" in capsys.readouterr().err
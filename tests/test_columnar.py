@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pytest
+
+import lisatools
+from lisatools import ColumnarPortfolio
+
+
+@pytest.fixture
+def large_portfolio():
+    rng = random.Random(42)
+    holdings = []
+    for i in range(1000):
+        fund = lisatools.Fund(f"Fund {i}", rng.uniform(1.0, 200.0), isin=f"ISIN{i:08d}")
+        holdings.append(lisatools.Holding(fund, rng.uniform(0.0, 50.0), 1.0 / 1000))
+    return lisatools.Portfolio(holdings)
+
+
+def test_columnar_init(ftse_global, gilts):
+    cpf = ColumnarPortfolio([ftse_global, gilts])
+    assert len(cpf) == 2
+    assert list(cpf.units) == [1.0, 1.0]
+    assert list(cpf.target_fractions) == [0.5, 0.5]
+    assert list(cpf.prices) == [ftse_global.price, gilts.price]
+    with pytest.raises(ValueError):
+        ColumnarPortfolio([ftse_global, gilts], units=[1.0])
+    assert len(ColumnarPortfolio()) == 0
+
+
+def test_columnar_roundtrip(two_fund_6040):
+    cpf = ColumnarPortfolio.from_portfolio(two_fund_6040)
+    assert cpf.funds[0] is two_fund_6040[0].fund
+    assert cpf.to_portfolio() == two_fund_6040
+    assert str(cpf) == str(two_fund_6040)
+
+
+def test_columnar_getitem(two_fund_6040):
+    cpf = ColumnarPortfolio.from_portfolio(two_fund_6040)
+    assert cpf[1] == two_fund_6040[1]
+    assert cpf[1:].to_portfolio() == two_fund_6040[1:]
+    assert cpf[np.array([False, True])] == cpf[1:]
+
+
+def test_columnar_refresh_prices(two_fund_6040):
+    cpf = ColumnarPortfolio.from_portfolio(two_fund_6040)
+    two_fund_6040[0].fund.update_price(200.0)
+    assert cpf.prices[0] == 172.14
+    cpf.refresh_prices()
+    assert cpf.prices[0] == 200.0
+
+
+def test_columnar_total_value(large_portfolio):
+    cpf = ColumnarPortfolio.from_portfolio(large_portfolio)
+    assert cpf.total_value() == pytest.approx(large_portfolio.total_value())
+    values = [holding.value() for holding in large_portfolio]
+    np.testing.assert_allclose(cpf.values(), values)
+
+
+def test_columnar_target_portfolio(large_portfolio):
+    cpf = ColumnarPortfolio.from_portfolio(large_portfolio)
+    target = cpf.target_portfolio()
+    expected = large_portfolio.target_portfolio()
+    np.testing.assert_allclose(target.units, [h.units for h in expected])
+    assert target.total_value() == pytest.approx(cpf.total_value())
+
+
+def test_columnar_trade_to_target(large_portfolio):
+    cpf = ColumnarPortfolio.from_portfolio(large_portfolio)
+    buy, sell = cpf.trade_to_target()
+    expected_buy, expected_sell = large_portfolio.trade_to_target()
+    assert len(buy) == len(expected_buy)
+    assert len(sell) == len(expected_sell)
+    assert all(a is b.fund for a, b in zip(buy.funds, expected_buy))
+    np.testing.assert_allclose(buy.units, [h.units for h in expected_buy])
+    np.testing.assert_allclose(sell.units, [h.units for h in expected_sell])
+    with pytest.raises(ValueError):
+        cpf.trade_to_target(cpf[:10])
+
+
+def test_columnar_trade_to_target_small(two_fund_6040, ftse_global, gilts):
+    cpf = ColumnarPortfolio.from_portfolio(two_fund_6040)
+    buy, sell = cpf.trade_to_target()
+    assert buy[0].fund == gilts
+    assert buy[0].units == pytest.approx(0.7059203444564046)
+    assert sell[0].fund == ftse_global
+    assert sell[0].units == pytest.approx(0.0761937957476474)
@@ -0,0 +1,60 @@
+import array
+import datetime
+import math
+
+import pytest
+
+from lisatools.history import PriceHistory
+
+
+def test_history_init(ft_history):
+    h = ft_history
+    assert len(h) == 4
+    assert type(h.close) == array.array
+    assert h.dates == [datetime.date(2023, 1, day) for day in (17, 18, 19, 20)]
+    assert h.start == datetime.date(2023, 1, 17)
+    assert h.end == datetime.date(2023, 1, 20)
+    assert list(h.close) == [181.36, 1180.75, 179.02, 180.49]
+
+
+def test_history_init_defaults():
+    h = PriceHistory([datetime.date(2023, 1, 2)], close=[1.0])
+    assert math.isnan(h.open[0])
+    assert math.isnan(h.volume[0])
+    empty = PriceHistory()
+    assert len(empty) == 0
+    assert empty.start is None
+    with pytest.raises(LookupError):
+        empty.latest()
+
+
+def test_history_init_invalid():
+    dates = [datetime.date(2023, 1, 3), datetime.date(2023, 1, 2)]
+    with pytest.raises(ValueError):
+        PriceHistory(dates, close=[1.0])
+    with pytest.raises(ValueError):
+        PriceHistory(dates, close=[1.0, 2.0])
+
+
+def test_history_eq(ft_history):
+    h = PriceHistory.from_rows(reversed(list(ft_history.rows())))
+    assert h == ft_history
+    assert PriceHistory.from_ordinals(ft_history.ordinals) != ft_history
+
+
+def test_history_latest(ft_history):
+    assert ft_history.latest() == (180.49, datetime.date(2023, 1, 20))
+
+
+@pytest.mark.parametrize(
+    "date, price, price_date",
+    [
+        (datetime.date(2023, 1, 17), 181.36, datetime.date(2023, 1, 17)),
+        (datetime.date(2023, 1, 19), 179.02, datetime.date(2023, 1, 19)),
+        (datetime.date(2023, 1, 22), 180.49, datetime.date(2023, 1, 20)),
+    ],
+)
+def test_history_as_of(ft_history, date, price, price_date):
+    assert ft_history.as_of(date) == (price, price_date)
+    with pytest.raises(LookupError):
+        ft_history.as_of(datetime.date(2023, 1, 16))
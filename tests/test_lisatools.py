@@ -1,6 +1,7 @@
 import bs4
 from copy import deepcopy
 import datetime
+import json
 import lisatools
 import pytest
 
@@ -354,6 +355,13 @@ def test_retrieve_history(ftse_global_url):
     assert price_history.name == "table"
 
 
+def test_retrieve_table(ftse_global_url):
+    price_history = lisatools.scraping.retrieve_table(ftse_global_url)
+    assert type(price_history) == lisatools.tables.HistoryTable
+    assert "Date" in price_history.columns
+    assert "Close" in price_history.columns
+
+
 def test_latest_price(ftse_global):
     price, date = lisatools.scraping.latest_price(ftse_global)
     assert type(price) == float
@@ -361,3 +369,425 @@ def test_latest_price(ftse_global):
     assert type(date) == datetime.date
     delta = datetime.date.today() - date
     assert 0 <= delta.days < 7
+
+
+def test_portfolio_update_prices_offline(monkeypatch, ftse_global, gilts):
+    calls = []
+
+    def fake_latest_price(fund, *, timeout=None):
+        calls.append(fund)
+        if fund.isin == gilts.isin:
+            raise ConnectionError("no connection")
+        return 180.0, datetime.date(2023, 1, 2)
+
+    monkeypatch.setattr(lisatools.scraping, "latest_price", fake_latest_price)
+    duplicate = lisatools.Fund(ftse_global.description, isin=ftse_global.isin)
+    pf = lisatools.Portfolio(
+        [
+            lisatools.Holding(ftse_global, 1.0, 0.4),
+            lisatools.Holding(gilts, 5.0, 0.4),
+            lisatools.Holding(duplicate, 2.0, 0.2),
+        ]
+    )
+    errors = pf.update_prices(max_workers=2, timeout=1.0)
+    # funds sharing a history URL are fetched only once
+    assert len(calls) == 2
+    assert errors[0] is None
+    assert isinstance(errors[1], ConnectionError)
+    assert errors[2] is None
+    assert pf[0].fund.price == 180.0
+    assert pf[2].fund.price == 180.0
+    assert pf[2].fund.date == datetime.date(2023, 1, 2)
+    assert pf[1].fund.price == 18.58
+
+
+def test_parse_table(ft_history_html, ft_history):
+    table = lisatools.tables.extract_table(ft_history_html.decode())
+    history = lisatools.scraping.parse_table(table)
+    assert history == ft_history
+
+
+def test_parse_history(ft_history_html):
+    soup = bs4.BeautifulSoup(ft_history_html, "html.parser")
+    table = soup.find("table", {"class": "mod-tearsheet-historical-prices__results"})
+    price, date = lisatools.scraping.parse_history(table)
+    assert price == 180.49
+    assert date == datetime.date(2023, 1, 20)
+
+
+def test_portfolio_load_save_jsonl(tmp_path, two_fund_6040):
+    path = tmp_path / "two_fund_6040.jsonl"
+    two_fund_6040.save_jsonl(path)
+    with open(path, "r") as handle:
+        lines = handle.readlines()
+    assert len(lines) == len(two_fund_6040)
+    pf = lisatools.Portfolio.load_jsonl(path)
+    assert type(pf[1].fund) == lisatools.ETF
+    assert pf == two_fund_6040
+
+
+def test_load_jsonl_partial(tmp_path, two_fund_6040):
+    path = tmp_path / "two_fund_6040.jsonl"
+    two_fund_6040.save_jsonl(path)
+    with open(path, "r") as handle:
+        text = handle.read()
+    with open(path, "w") as handle:
+        handle.write(text[:-20])
+    holdings = []
+    with pytest.raises(ValueError):
+        with open(path, "r") as handle:
+            for holding in lisatools.io.load_jsonl(handle):
+                holdings.append(holding)
+    assert holdings == [two_fund_6040[0]]
+
+
+def test_portfolio_load_save_v2(tmp_path, two_fund_6040):
+    path = tmp_path / "two_fund_6040.json"
+    s = two_fund_6040.save(path, silent=True, version=2)
+    assert json.loads(s)["version"] == lisatools.io.SCHEMA_VERSION
+    pf = lisatools.Portfolio.load(path)
+    assert type(pf[1].fund) == lisatools.ETF
+    assert pf == two_fund_6040
+    with pytest.raises(ValueError):
+        two_fund_6040.save(silent=True, version=3)
+
+
+def test_encode_portfolio_shared_funds(ftse_global, gilts):
+    duplicate = deepcopy(ftse_global)
+    holdings = [
+        lisatools.Holding(ftse_global, 1.0, 0.4),
+        lisatools.Holding(gilts, 2.0, 0.2),
+        lisatools.Holding(duplicate, 3.0, 0.4),
+    ]
+    d = lisatools.io.encode_portfolio(holdings)
+    assert len(d["funds"]) == 2
+    assert d["funds"][1]["type"] == "ETF"
+    assert d["holdings"]["fund"] == [0, 1, 0]
+    decoded = lisatools.io.decode_portfolio(
+        json.loads(json.dumps(d, cls=lisatools.io.JSONEncoder))
+    )
+    assert decoded == holdings
+    assert decoded[0].fund is decoded[2].fund
+    with pytest.raises(ValueError):
+        lisatools.io.decode_portfolio({"version": 1})
+
+
+def test_fund_key(ftse_global, gilts):
+    assert lisatools.fund.fund_key(ftse_global) == "GB00BD3RZ582"
+    assert lisatools.fund.fund_key(gilts) == "VGOV"
+    assert lisatools.fund.fund_key(lisatools.Fund("Cash")) is None
+
+
+def test_registry_intern(ftse_global, gilts):
+    registry = lisatools.FundRegistry([ftse_global])
+    assert len(registry) == 1
+    assert "GB00BD3RZ582" in registry
+    older = deepcopy(ftse_global)
+    older.update_price(1.0, date=datetime.date(2022, 1, 1))
+    assert registry.intern(older) is ftse_global
+    assert ftse_global.price == 172.14
+    newer = deepcopy(ftse_global)
+    newer.update_price(180.0, date=datetime.date(2023, 1, 2))
+    assert registry.intern(newer) is ftse_global
+    assert ftse_global.price == 180.0
+    assert registry.intern(gilts) is gilts
+    assert registry.get("VGOV") is gilts
+    assert list(registry) == [ftse_global, gilts]
+    cash = lisatools.Fund("Cash")
+    assert registry.intern(cash) is cash
+    assert len(registry) == 2
+
+
+def test_portfolio_load_shared_funds(tmp_path, two_fund_6040):
+    pf = lisatools.Portfolio(two_fund_6040.holdings + deepcopy(two_fund_6040.holdings))
+    assert pf[0].fund is not pf[2].fund
+    for version in (1, 2):
+        path = tmp_path / f"v{version}.json"
+        pf.save(path, silent=True, version=version)
+        loaded = lisatools.Portfolio.load(path)
+        assert loaded == pf
+        assert loaded[0].fund is loaded[2].fund
+        assert loaded[1].fund is loaded[3].fund
+    registry = lisatools.FundRegistry()
+    pf1 = lisatools.Portfolio.load(path, registry=registry)
+    pf2 = lisatools.Portfolio.load(path, registry=registry)
+    assert pf1[0].fund is pf2[0].fund
+    pf.save_jsonl(tmp_path / "pf.jsonl")
+    loaded = lisatools.Portfolio.load_jsonl(tmp_path / "pf.jsonl")
+    assert loaded[0].fund is loaded[2].fund
+
+
+def test_portfolio_from_funds_shared(ftse_global):
+    pf = lisatools.Portfolio.from_funds([ftse_global, deepcopy(ftse_global)])
+    assert pf[0].fund is pf[1].fund is ftse_global
+
+
+def test_slots(ftse_global, gilts):
+    holding = lisatools.Holding(ftse_global)
+    for obj in (ftse_global, gilts, holding):
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.unknown_attribute = None
+
+
+def test_lazy_attributes():
+    assert lisatools.__version__ == lisatools.__version__
+    assert lisatools.ColumnarPortfolio is lisatools.columnar.ColumnarPortfolio
+    assert "scraping" in dir(lisatools)
+    with pytest.raises(AttributeError):
+        lisatools.unknown_attribute
+
+
+def test_read_prices_csv(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text("key,price,date\nVGOV,16.54,2023-01-20\nX,1.0,2023-01-19\n")
+    with open(path, "r", newline="") as handle:
+        prices = lisatools.io.read_prices_csv(handle)
+    assert prices == {
+        "VGOV": (16.54, datetime.date(2023, 1, 20)),
+        "X": (1.0, datetime.date(2023, 1, 19)),
+    }
+
+
+def test_portfolio_apply_prices(two_fund_6040, tmp_path):
+    cash = lisatools.Fund("Cash", 1.0, date=datetime.date(2023, 1, 2))
+    two_fund_6040.add_fund(cash, value=100.0, target=0.0)
+    prices = {
+        "GB00BD3RZ582": (180.0, "2023-01-20"),
+        "VGOV": (17.0, datetime.date(2023, 1, 19)),
+        "XS0000000000": (1.0, "2023-01-20"),
+        # not the price of funds without an ISIN
+        "None": (2.0, "2023-01-20"),
+    }
+    report = two_fund_6040.apply_prices(prices)
+    ftse_global, gilts = two_fund_6040[0].fund, two_fund_6040[1].fund
+    assert report["updated"] == [ftse_global, gilts]
+    assert report["unmatched"] == [cash]
+    assert report["stale"] == [gilts, cash]
+    assert ftse_global.price == 180.0
+    assert ftse_global.date == datetime.date(2023, 1, 20)
+    assert gilts.price == 17.0
+    report = two_fund_6040.apply_prices({}, stale_before=datetime.date(2023, 1, 3))
+    assert report["stale"] == [cash]
+
+    path = tmp_path / "prices.csv"
+    path.write_text("ISIN,price,date\nIE00B42WWV65,16.0,2023-01-21\n")
+    report = two_fund_6040.apply_prices(path)
+    assert report["updated"] == [gilts]
+    assert gilts.price == 16.0
+
+
+def test_portfolio_incremental_total_value(two_fund_6040, ftse_global, gilts):
+    assert two_fund_6040.total_value() == pytest.approx(172.14 + 5 * 18.58)
+    ftse_global.update_price(180.0)
+    assert two_fund_6040.total_value() == pytest.approx(180.0 + 5 * 18.58)
+    two_fund_6040[1].units = 10.0
+    assert two_fund_6040.total_value() == pytest.approx(180.0 + 10 * 18.58)
+    two_fund_6040.add_fund(lisatools.Fund("Cash", 1.0), value=100.0)
+    assert two_fund_6040.total_value() == pytest.approx(280.0 + 10 * 18.58)
+    # holdings modified in place
+    two_fund_6040.holdings.pop()
+    assert two_fund_6040.total_value() == pytest.approx(180.0 + 10 * 18.58)
+    gilts.update_price(20.0)
+    assert two_fund_6040.total_value() == pytest.approx(180.0 + 10 * 20.0)
+
+
+def test_portfolio_total_value_in_place(two_fund_6040, ftse_global, gilts):
+    two_fund_6040.holdings.reverse()
+    ftse_global.update_price(20.0)
+    assert two_fund_6040.total_value() == pytest.approx(20.0 + 5 * 18.58)
+    two_fund_6040.holdings[0] = lisatools.Holding(ftse_global, 5.0, 1.0)
+    assert two_fund_6040.total_value() == pytest.approx(5 * 20.0 + 20.0)
+    two_fund_6040[0].fund = gilts
+    assert two_fund_6040.total_value() == pytest.approx(5 * 18.58 + 20.0)
+    gilts.update_price(10.0)
+    assert two_fund_6040.total_value() == pytest.approx(5 * 10.0 + 20.0)
+
+
+def test_portfolio_untracked(two_fund_6040, ftse_global):
+    # portfolios do not observe their holdings and funds unless tracked
+    assert not ftse_global._observers
+    assert not two_fund_6040[0]._observers
+    ftse_global.update_price(0.0)
+    two_fund_6040[1].fund.update_price(0.0)
+    assert two_fund_6040.total_value() == 0.0
+
+
+def test_tracker_total_value(two_fund_6040, ftse_global, gilts):
+    with two_fund_6040.track() as tracker:
+        assert tracker.total_value() == pytest.approx(172.14 + 5 * 18.58)
+        ftse_global.update_price(180.0)
+        two_fund_6040[1].units = 10.0
+        assert tracker.total_value() == pytest.approx(180.0 + 10 * 18.58)
+        two_fund_6040.add_fund(lisatools.Fund("Cash", 1.0), value=100.0)
+        assert tracker.total_value() == pytest.approx(280.0 + 10 * 18.58)
+        assert tracker.drift() == pytest.approx(two_fund_6040.drift())
+        # holdings modified in place
+        two_fund_6040.holdings.reverse()
+        gilts.update_price(20.0)
+        assert tracker.total_value() == pytest.approx(280.0 + 10 * 20.0)
+        two_fund_6040[2].fund = gilts
+        assert tracker.total_value() == pytest.approx(100.0 + 11 * 20.0)
+    assert not ftse_global._observers
+    assert not gilts._observers
+
+
+def test_tracker_exact(ftse_global):
+    holdings = [lisatools.Holding(lisatools.Fund(f"Fund {i}"), 0.1) for i in range(100)]
+    pf = lisatools.Portfolio(holdings)
+    tracker = pf.track()
+    for i, holding in enumerate(holdings):
+        holding.fund.update_price(1.0 + i / 3)
+    for holding in holdings:
+        holding.fund.update_price(0.0)
+    assert tracker.total_value() == 0.0
+    assert tracker.drift() == [0.0] * 100
+
+
+def test_tracker_observers_detached(two_fund_6040, ftse_global, gilts):
+    def n_observers(subject):
+        return sum(ref() is not None for ref in subject._observers)
+
+    tracker = two_fund_6040.track()
+    for _ in range(100):
+        two_fund_6040.holdings.append(lisatools.Holding(gilts, 0.0, 0.0))
+        tracker.total_value()
+    assert n_observers(ftse_global) == 1
+    assert n_observers(gilts) == 1
+    tracker.close()
+    assert n_observers(gilts) == 0
+
+
+def test_portfolio_shared_fund_total_value(ftse_global):
+    pf = lisatools.Portfolio.from_funds([ftse_global, ftse_global], units=[1.0, 2.0])
+    sliced = pf[:1]
+    ftse_global.update_price(100.0)
+    assert pf.total_value() == pytest.approx(300.0)
+    assert sliced.total_value() == pytest.approx(100.0)
+
+
+def test_portfolio_drift(two_fund_6040, ftse_global):
+    total = 172.14 + 5 * 18.58
+    drift = two_fund_6040.drift()
+    assert drift == pytest.approx([172.14 / total - 0.6, 5 * 18.58 / total - 0.4])
+    ftse_global.update_price(5 * 18.58 * 1.5)
+    assert two_fund_6040.drift() == pytest.approx([0.0, 0.0], abs=1e-12)
+    assert lisatools.Portfolio().drift() == []
+
+
+def test_portfolio_copy_tracking(two_fund_6040):
+    pf = deepcopy(two_fund_6040)
+    assert pf == two_fund_6040
+    pf[0].fund.update_price(100.0)
+    assert pf.total_value() == pytest.approx(100.0 + 5 * 18.58)
+    assert two_fund_6040.total_value() == pytest.approx(172.14 + 5 * 18.58)
+
+
+@pytest.mark.parametrize("scale_new", [True, False])
+def test_portfolio_add_holdings(ftse_global, gilts, scale_new):
+    def make_holdings():
+        return [
+            lisatools.Holding(fund, 1.0 + i, target)
+            for i, (fund, target) in enumerate(
+                [(ftse_global, 0.3), (gilts, 0.5), (ftse_global, 0.1), (gilts, 0.25)]
+            )
+        ]
+
+    sequential = lisatools.Portfolio(make_holdings()[:1])
+    for holding in make_holdings()[1:]:
+        sequential.add_holding(holding, scale_new=scale_new)
+    bulk = lisatools.Portfolio(make_holdings()[:1])
+    bulk.add_holdings(make_holdings()[1:], scale_new=scale_new)
+
+    assert [h.target_fraction for h in bulk] == pytest.approx(
+        [h.target_fraction for h in sequential]
+    )
+    assert [h.units for h in bulk] == [h.units for h in sequential]
+    assert bulk.total_value() == pytest.approx(sequential.total_value())
+    bulk.add_holdings([])
+    assert len(bulk) == 4
+
+
+def test_portfolio_index(two_fund_6040, ftse_global, gilts):
+    assert two_fund_6040.get("GB00BD3RZ582") is two_fund_6040[0]
+    assert two_fund_6040.get("VGOV") is two_fund_6040[1]
+    assert two_fund_6040.get("IE00B42WWV65") is two_fund_6040[1]
+    assert two_fund_6040.get("XS0000000000") is None
+    assert "VGOV" in two_fund_6040
+    assert "XS0000000000" not in two_fund_6040
+    assert two_fund_6040[0] in two_fund_6040
+    assert "VGOV" not in two_fund_6040[:1]
+
+    etf = lisatools.ETF("Other ETF", 10.0, ticker="VWRL")
+    two_fund_6040.add_fund(etf, target=0.0)
+    assert two_fund_6040.get("VWRL") is two_fund_6040[2]
+    two_fund_6040.holdings.pop(0)
+    assert "GB00BD3RZ582" not in two_fund_6040
+    assert two_fund_6040.get("VWRL") is two_fund_6040[1]
+
+
+def test_portfolio_index_in_place(two_fund_6040, ftse_global, gilts):
+    two_fund_6040.holdings.reverse()
+    assert two_fund_6040.get("GB00BD3RZ582").fund is ftse_global
+    assert two_fund_6040.get("VGOV").fund is gilts
+    two_fund_6040.merge([lisatools.Holding(ftse_global, 2.0, 0.6)])
+    assert [h.units for h in two_fund_6040] == [5.0, 3.0]
+    two_fund_6040.holdings[1] = lisatools.Holding(
+        lisatools.Fund("Other", 1.0, isin="XS0000000000"), 1.0, 0.6
+    )
+    assert "GB00BD3RZ582" not in two_fund_6040
+    assert two_fund_6040.get("XS0000000000") is two_fund_6040[1]
+
+
+def test_portfolio_merge(two_fund_6040, ftse_global):
+    cash = lisatools.Fund("Cash", 1.0)
+    other = lisatools.Portfolio(
+        [
+            lisatools.Holding(deepcopy(ftse_global), 2.0, 0.5),
+            lisatools.Holding(cash, 10.0, 0.0),
+            lisatools.Holding(cash, 5.0, 0.0),
+        ]
+    )
+    two_fund_6040.merge(other)
+    assert [h.units for h in two_fund_6040] == [3.0, 5.0, 15.0]
+    assert two_fund_6040[2].fund is cash
+    assert two_fund_6040[0].target_fraction == 0.6
+    assert two_fund_6040.total_value() == pytest.approx(3 * 172.14 + 5 * 18.58 + 15)
+
+
+def test_portfolio_apply_trades(two_fund_6040, two_fund_6040_target):
+    buy, sell = two_fund_6040.trade_to_target()
+    two_fund_6040.apply_trades(buy, sell)
+    assert [h.units for h in two_fund_6040] == pytest.approx(
+        [h.units for h in two_fund_6040_target]
+    )
+    unknown = lisatools.Holding(lisatools.Fund("Unknown"), 1.0)
+    with pytest.raises(ValueError):
+        two_fund_6040.apply_trades(buy, lisatools.Portfolio([unknown]))
+    assert [h.units for h in two_fund_6040] == pytest.approx(
+        [h.units for h in two_fund_6040_target]
+    )
+
+
+def test_trade_to_target_match_key(two_fund_6040, two_fund_6040_target, gilts):
+    cash = lisatools.Fund("Cash", 1.0)
+    target = lisatools.Portfolio(
+        [
+            lisatools.Holding(deepcopy(gilts), two_fund_6040_target[1].units, 0.4),
+            lisatools.Holding(cash, 10.0, 0.0),
+        ]
+    )
+    buy, sell = two_fund_6040.trade_to_target(target, match="key")
+    assert [h.fund for h in buy] == [gilts, cash]
+    assert buy[0].units == pytest.approx(0.7059203444564046)
+    assert buy[1].units == 10.0
+    assert [h.fund for h in sell] == [two_fund_6040[0].fund]
+    assert sell[0].units == 1.0
+
+    reordered = lisatools.Portfolio(two_fund_6040_target.holdings[::-1])
+    buy, sell = two_fund_6040.trade_to_target(reordered, match="key")
+    expected_buy, expected_sell = two_fund_6040.trade_to_target()
+    assert buy == expected_buy
+    assert sell == expected_sell
+    with pytest.raises(ValueError):
+        two_fund_6040.trade_to_target(match="isin")
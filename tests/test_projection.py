@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+import lisatools
+from lisatools import projection
+
+
+@pytest.fixture
+def pf():
+    return lisatools.Portfolio(
+        [
+            lisatools.Holding(lisatools.Fund("Equities", 100.0), 10.0, 0.6),
+            lisatools.Holding(lisatools.Fund("Bonds", 50.0), 20.0, 0.4),
+        ]
+    )
+
+
+def expected_value(age, initial_value, growth, contribution=4000.0):
+    value = initial_value
+    for year in range(age, projection.PAYOUT_AGE):
+        if year <= projection.LAST_CONTRIBUTION_AGE:
+            value += contribution * (1 + projection.BONUS_RATE)
+        value *= growth
+    return value
+
+
+def test_project_deterministic(pf):
+    result = projection.project(
+        pf, 45, expected_returns=0.05, volatilities=0.0, n_paths=100, max_workers=1
+    )
+    np.testing.assert_array_equal(result.ages, np.arange(45, 61))
+    assert result.bands.shape == (5, 16)
+    expected = expected_value(45, 2000.0, 1.05)
+    assert result.mean[-1] == pytest.approx(expected)
+    assert result.band(50)[-1] == pytest.approx(expected, rel=1e-3)
+    assert result.band(5)[0] == 2000.0
+
+
+def test_project_stochastic(pf):
+    result = projection.project(
+        pf,
+        40,
+        expected_returns=[0.06, 0.02],
+        volatilities=[0.15, 0.05],
+        correlation=[[1.0, 0.3], [0.3, 1.0]],
+        contribution=2000.0,
+        n_paths=20_000,
+        chunksize=5_000,
+        seed=1,
+        max_workers=1,
+    )
+    # yearly rebalancing, so the mean grows at the weighted expected return
+    expected = expected_value(40, 2000.0, 1 + 0.6 * 0.06 + 0.4 * 0.02, 2000.0)
+    assert result.mean[-1] == pytest.approx(expected, rel=0.02)
+    assert np.all(np.diff(result.bands[:, 1:], axis=0) > 0)
+    assert (
+        result.band(5)[-1] < result.band(50)[-1] < result.mean[-1] < result.band(95)[-1]
+    )
+
+
+def test_project_reproducible(pf):
+    kwargs = dict(
+        expected_returns=[0.06, 0.02],
+        volatilities=[0.15, 0.05],
+        n_paths=10_000,
+        chunksize=3_000,
+        seed=42,
+    )
+    serial = projection.project(pf, 30, max_workers=1, **kwargs)
+    parallel = projection.project(pf, 30, max_workers=2, **kwargs)
+    np.testing.assert_array_equal(serial.bands, parallel.bands)
+    np.testing.assert_array_equal(serial.mean, parallel.mean)
+    other = projection.project(pf, 30, max_workers=1, **{**kwargs, "seed": 43})
+    assert not np.array_equal(serial.bands, other.bands)
+
+
+@pytest.mark.parametrize("volatilities", [0.0, 0.1])
+@pytest.mark.parametrize("expected_returns", [0.0, 0.05])
+def test_project_empty(pf, expected_returns, volatilities):
+    for holding in pf:
+        holding.units = 0.0
+    result = projection.project(
+        pf,
+        55,
+        expected_returns=expected_returns,
+        volatilities=volatilities,
+        n_paths=100,
+        max_workers=1,
+    )
+    np.testing.assert_array_equal(result.bands, 0.0)
+    np.testing.assert_array_equal(result.mean, 0.0)
+
+
+def test_project_errors(pf):
+    with pytest.raises(ValueError):
+        projection.project(
+            pf, 30, expected_returns=0.05, volatilities=0.1, contribution=5000.0
+        )
+    with pytest.raises(ValueError):
+        projection.project(pf, 60, expected_returns=0.05, volatilities=0.1)
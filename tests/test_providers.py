@@ -0,0 +1,116 @@
+import datetime
+
+import pytest
+
+import lisatools
+from lisatools import providers
+
+
+@pytest.fixture
+def prices_csv(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text(
+        "ISIN,name,price,date\n"
+        "GB00BD3RZ582,FTSE Global All Cap Index Fund,180.49,2023-01-20\n"
+        "IE00B42WWV65,U.K. Gilt UCITS ETF,16.54,2023-01-20\n"
+    )
+    return path
+
+
+@pytest.fixture
+def price_dir(tmp_path):
+    directory = tmp_path / "prices"
+    directory.mkdir()
+    (directory / "GB00BD3RZ582.csv").write_text(
+        "date,close\n2023-01-20,180.49\n2023-01-17,181.36\n2023-01-19,179.02\n"
+    )
+    (directory / "VGOV.csv").write_text("date,price\n")
+    return directory
+
+
+def test_registry():
+    assert providers.registry["ft"] is providers.FTProvider
+    provider = providers.create("memory", {"GB00BD3RZ582": (1.0, "2023-01-02")})
+    assert type(provider) == providers.MemoryProvider
+    with pytest.raises(ValueError):
+        providers.create("unknown")
+
+
+def test_provider_abstract():
+    class Incomplete(providers.PriceProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_memory_provider(ftse_global, gilts):
+    provider = providers.MemoryProvider({"GB00BD3RZ582": (1.0, "2023-01-02")})
+    assert provider.latest_price(ftse_global) == (1.0, datetime.date(2023, 1, 2))
+    with pytest.raises(LookupError):
+        provider.latest_price(gilts)
+    provider.set("IE00B42WWV65", 2.0, datetime.date(2023, 1, 3))
+    assert provider.latest_price(gilts) == (2.0, datetime.date(2023, 1, 3))
+    provider.set("VGOV", 3.0, datetime.date(2023, 1, 4))
+    assert provider.latest_price(gilts) == (3.0, datetime.date(2023, 1, 4))
+    provider.set("None", 4.0, datetime.date(2023, 1, 4))
+    with pytest.raises(LookupError):
+        provider.latest_price(lisatools.Fund("Cash"))
+
+
+def test_csv_provider(prices_csv, ftse_global, gilts):
+    provider = providers.CSVProvider(prices_csv)
+    date = datetime.date(2023, 1, 20)
+    assert provider.latest_price(ftse_global) == (180.49, date)
+    assert provider.latest_price(gilts) == (16.54, date)
+
+
+def test_directory_provider(price_dir, ftse_global, gilts):
+    provider = providers.DirectoryProvider(price_dir)
+    assert provider.latest_price(ftse_global) == (180.49, datetime.date(2023, 1, 20))
+    with pytest.raises(LookupError):
+        provider.latest_price(gilts)
+    with pytest.raises(LookupError):
+        provider.latest_price(lisatools.Fund("Cash"))
+    (price_dir / "None.csv").write_text("date,close\n2023-01-20,1.0\n")
+    with pytest.raises(LookupError):
+        provider.latest_price(lisatools.Fund("Cash"))
+
+
+def test_chain_provider(ftse_global, gilts):
+    first = providers.MemoryProvider({"GB00BD3RZ582": (1.0, "2023-01-02")})
+    second = providers.MemoryProvider(
+        {"GB00BD3RZ582": (2.0, "2023-01-02"), "VGOV": (3.0, "2023-01-02")}
+    )
+    chain = providers.ChainProvider([first, second])
+    assert chain.providers == [first, second]
+    assert chain.latest_price(ftse_global)[0] == 1.0
+    assert chain.latest_price(gilts)[0] == 3.0
+    with pytest.raises(LookupError):
+        chain.latest_price(lisatools.Fund("Cash"))
+    third = providers.MemoryProvider({"GB00BD3RZ582": (4.0, "2023-01-02")})
+    chain.add(third, priority=1)
+    assert chain.providers == [third, first, second]
+    assert chain.latest_price(ftse_global)[0] == 4.0
+
+
+def test_update_prices_provider(two_fund_6040):
+    provider = providers.MemoryProvider({"GB00BD3RZ582": (180.0, "2023-01-02")})
+    errors = two_fund_6040.update_prices(provider=provider)
+    assert errors[0] is None
+    assert isinstance(errors[1], LookupError)
+    assert two_fund_6040[0].fund.price == 180.0
+    assert two_fund_6040[0].fund.date == datetime.date(2023, 1, 2)
+
+
+def test_default_provider(two_fund_6040):
+    assert type(providers.get_default()) == providers.FTProvider
+    provider = providers.MemoryProvider(
+        {"GB00BD3RZ582": (180.0, "2023-01-02"), "VGOV": (17.0, "2023-01-02")}
+    )
+    providers.set_default(provider)
+    try:
+        assert two_fund_6040.update_prices() == [None, None]
+    finally:
+        providers.set_default(None)
+    assert type(providers.get_default()) == providers.FTProvider
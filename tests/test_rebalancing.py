@@ -0,0 +1,146 @@
+import pytest
+
+import lisatools
+from lisatools import rebalancing
+
+
+def units(pf):
+    return {holding.fund.description: holding.units for holding in pf}
+
+
+def test_lot_size(ftse_global, gilts):
+    assert rebalancing.lot_size(ftse_global) == 0.0
+    assert rebalancing.lot_size(gilts) == 1.0
+    assert rebalancing.lot_size(gilts, {"VGOV": 10.0}) == 10.0
+    assert rebalancing.lot_size(ftse_global, {"GB00BD3RZ582": 0.5}) == 0.5
+
+
+def test_rebalance_unconstrained(ftse_global, gilts):
+    pf = lisatools.Portfolio(
+        [lisatools.Holding(ftse_global, 1.0, 0.6), lisatools.Holding(gilts, 5.0, 0.4)]
+    )
+    buy, sell, cash = rebalancing.rebalance(pf, lot_sizes={"VGOV": 0.0})
+    expected_buy, expected_sell = pf.trade_to_target()
+    assert units(buy) == pytest.approx(units(expected_buy))
+    assert units(sell) == pytest.approx(units(expected_sell))
+    assert cash == pytest.approx(0.0, abs=1e-9)
+
+
+def test_rebalance_lots(two_fund_6040):
+    buy, sell, cash = rebalancing.rebalance(two_fund_6040, 500.0)
+    # targets of 0.6 * 765.04 and 0.4 * 765.04, in whole units of the ETF
+    assert units(sell) == {}
+    assert units(buy)["VGOV: U.K. Gilt UCITS ETF"] == 11.0
+    ftse_units = units(buy)["FTSE Global All Cap Index Fund"]
+    assert ftse_units == pytest.approx((0.6 * 765.04 - 172.14) / 172.14)
+    # one more unit of the ETF would overshoot its target by more
+    assert cash == pytest.approx(0.4 * 765.04 - 16 * 18.58)
+
+
+def test_rebalance_buy_only(two_fund_6040, gilts):
+    two_fund_6040[1].units = 50.0
+    buy, sell, cash = rebalancing.rebalance(two_fund_6040, 100.0, buy_only=True)
+    assert len(sell) == 0
+    assert units(buy) == pytest.approx({"FTSE Global All Cap Index Fund": 100 / 172.14})
+
+    buy, sell, cash = rebalancing.rebalance(two_fund_6040, 100.0)
+    assert [holding.fund for holding in sell] == [gilts]
+    assert sell[0].units == float(int(sell[0].units))
+    assert cash == pytest.approx(0.0, abs=1e-9)
+
+
+def test_rebalance_cash_limit():
+    funds = [
+        lisatools.ETF(f"ETF {i}", 1.0 + i / 10, ticker=f"E{i}") for i in range(200)
+    ]
+    pf = lisatools.Portfolio.from_funds(funds, units=[0.0] * len(funds))
+    buy, sell, cash = rebalancing.rebalance(pf, 5000.0)
+    spent = sum(holding.value() for holding in buy)
+    assert spent + cash == pytest.approx(5000.0)
+    assert cash >= 0.0
+    assert len(buy) == len(funds)
+    for holding in buy:
+        assert holding.units == int(holding.units)
+        assert abs(holding.value() - 25.0) <= holding.fund.price
+
+
+def test_rebalance_min_trade(two_fund_6040):
+    buy, sell, cash = rebalancing.rebalance(two_fund_6040, 30.0, min_trade=50.0)
+    assert len(buy) == len(sell) == 0
+    assert cash == 30.0
+    buy, sell, cash = rebalancing.rebalance(two_fund_6040, 60.0, min_trade=50.0)
+    assert all(holding.value() >= 50.0 for holding in buy)
+
+
+@pytest.fixture
+def drifted(ftse_global, gilts):
+    cash = lisatools.Fund("Cash", 1.0, isin="XS0000000000")
+    # values 200, 100 and 100 against targets of 0.4, 0.4 and 0.2
+    return lisatools.Portfolio(
+        [
+            lisatools.Holding(ftse_global, 200.0 / 172.14, 0.4),
+            lisatools.Holding(gilts, 100.0 / 18.58, 0.4),
+            lisatools.Holding(cash, 100.0, 0.2),
+        ]
+    )
+
+
+def values(pf):
+    return {holding.fund.description: holding.value() for holding in pf}
+
+
+def test_rebalance_within_bands(drifted):
+    buy, sell, cash = rebalancing.rebalance_within_bands(drifted, 20.0, absolute=0.05)
+    # the ETF is 68.0 under its target, of which 32.0 + 20.0 can be bought
+    assert values(buy) == pytest.approx({"VGOV: U.K. Gilt UCITS ETF": 52.0})
+    assert values(sell) == pytest.approx({"FTSE Global All Cap Index Fund": 32.0})
+    assert cash == 0.0
+
+    # without cash added, the purchase is limited to the proceeds of the sale
+    buy, sell, cash = rebalancing.rebalance_within_bands(drifted, absolute=0.05)
+    assert values(buy) == pytest.approx({"VGOV: U.K. Gilt UCITS ETF": 40.0})
+    assert values(sell) == pytest.approx({"FTSE Global All Cap Index Fund": 40.0})
+    assert cash == 0.0
+
+    buy, sell, cash = rebalancing.rebalance_within_bands(drifted, absolute=0.2)
+    assert len(buy) == len(sell) == 0
+    assert cash == 0.0
+
+    # a relative band of 50% of the target, except for the ETF
+    buy, sell, cash = rebalancing.rebalance_within_bands(
+        drifted, 60.0, relative=0.5, bands={"VGOV": (0.0, 0.1)}
+    )
+    assert values(buy) == pytest.approx({"VGOV: U.K. Gilt UCITS ETF": 60.0})
+    assert len(sell) == 0
+    assert cash == 0.0
+
+
+def test_rebalance_within_bands_edge_costs(drifted):
+    buy, sell, cash = rebalancing.rebalance_within_bands(
+        drifted, absolute=0.05, to="edge", dealing_cost=1.0, dealing_rate=0.01
+    )
+    # the proceeds of the sale, less its costs of 1.20, pay for the purchase
+    assert values(sell) == pytest.approx({"FTSE Global All Cap Index Fund": 20.0})
+    assert values(buy) == pytest.approx(
+        {"VGOV: U.K. Gilt UCITS ETF": (20.0 - 1.2 - 1.0) / 1.01}
+    )
+    assert cash == 0.0
+    with pytest.raises(ValueError):
+        rebalancing.rebalance_within_bands(drifted, to="middle")
+
+
+def test_rebalance_within_bands_selected_by_costs(drifted):
+    # the FTSE fund is 20.0 outside of its band, the ETF 40.0
+    buy, sell, cash = rebalancing.rebalance_within_bands(
+        drifted, absolute=0.05, dealing_cost=15.0
+    )
+    assert values(sell) == pytest.approx({"FTSE Global All Cap Index Fund": 40.0})
+    assert values(buy) == pytest.approx({"VGOV: U.K. Gilt UCITS ETF": 10.0})
+    assert cash == 0.0
+
+    # selling is no longer worth it, and there is no cash for the purchase
+    buy, sell, cash = rebalancing.rebalance_within_bands(
+        drifted, absolute=0.05, dealing_cost=25.0
+    )
+    assert len(buy) == len(sell) == 0
+    assert cash == 0.0
@@ -0,0 +1,156 @@
+import datetime
+import http.server
+import threading
+import time
+
+import pytest
+import requests
+
+import lisatools
+from lisatools import scraping
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the FT price history page, failing the first `failures` requests."""
+
+    protocol_version = "HTTP/1.1"  # keep connections alive
+    content = b""
+    etag = '"v1"'
+    failures = 0
+    requests = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests.append((self.path, dict(self.headers)))
+        if cls.failures > 0:
+            cls.failures -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == cls.etag:
+            self.send_response(304)
+            self.send_header("ETag", cls.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(cls.content)))
+            self.send_header("ETag", cls.etag)
+            self.end_headers()
+            self.wfile.write(cls.content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(ft_history_html, monkeypatch):
+    monkeypatch.setattr(StubHandler, "content", ft_history_html)
+    monkeypatch.setattr(StubHandler, "failures", 0)
+    monkeypatch.setattr(StubHandler, "requests", [])
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/historical"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    session = scraping.make_session(retries=2, backoff_factor=0.0)
+    scraping.set_session(session)
+    yield session
+    scraping.set_session(None)
+    session.close()
+
+
+def test_load_history(stub_server, session, ft_history):
+    history = scraping.load_history(stub_server, timeout=5.0)
+    assert history == ft_history
+    assert len(StubHandler.requests) == 1
+    # served from the cache within its time-to-live
+    assert scraping.load_history(stub_server) == ft_history
+    assert len(StubHandler.requests) == 1
+
+
+def test_load_history_not_modified(stub_server, session, price_cache, ft_history):
+    price_cache.ttl = 0.0
+    scraping.load_history(stub_server)
+    history = scraping.load_history(stub_server)
+    assert history == ft_history
+    assert len(StubHandler.requests) == 2
+    _, headers = StubHandler.requests[-1]
+    assert headers["If-None-Match"] == StubHandler.etag
+
+
+def test_load_history_retry(stub_server, session, ft_history):
+    StubHandler.failures = 2
+    assert scraping.load_history(stub_server) == ft_history
+    assert len(StubHandler.requests) == 3
+
+
+def test_load_history_retries_exhausted(stub_server, session):
+    StubHandler.failures = 3
+    with pytest.raises(requests.HTTPError):
+        scraping.load_history(stub_server)
+
+
+def test_load_history_uncached(stub_server, session, ft_history, monkeypatch):
+    monkeypatch.setattr(scraping, "_cache", None)
+    monkeypatch.setattr(scraping, "_cache_disabled", True)
+    assert scraping.get_cache() is None
+    assert scraping.load_history(stub_server) == ft_history
+
+
+def test_session_pooling(stub_server, session):
+    scraping.load_history(stub_server)
+    scraping.retrieve_table(stub_server + "?s=other")
+    # both requests were made on the same kept-alive connection
+    adapter = session.get_adapter(stub_server)
+    assert len(adapter.poolmanager.pools) == 1
+    assert scraping.get_session() is session
+    assert isinstance(lisatools.scraping.make_session(), requests.Session)
+
+
+def test_session_created_once(monkeypatch):
+    monkeypatch.setattr(scraping, "_session", None)
+    barrier = threading.Barrier(8)
+    created = []
+
+    def slow_make_session():
+        created.append(None)
+        time.sleep(0.05)
+        return requests.Session()
+
+    monkeypatch.setattr(scraping, "make_session", slow_make_session)
+
+    def first_use(results):
+        barrier.wait()
+        results.append(scraping.get_session())
+
+    results = []
+    threads = [threading.Thread(target=first_use, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(session is results[0] for session in results)
+
+
+def test_retrieve_history_stub(stub_server, session):
+    # the original API, returning the table for beautifulsoup
+    table = scraping.retrieve_history(stub_server + "?s=tag")
+    assert table.name == "table"
+    assert scraping.parse_history(table) == (180.49, datetime.date(2023, 1, 20))
+
+
+def test_latest_price_stub(stub_server, session, ftse_global, monkeypatch):
+    monkeypatch.setattr(scraping, "history_url", lambda fund: stub_server)
+    price, date = scraping.latest_price(ftse_global)
+    assert price == 180.49
+    assert date == datetime.date(2023, 1, 20)
@@ -0,0 +1,132 @@
+import datetime
+import json
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from lisatools import cli, providers, server
+
+
+@pytest.fixture
+def portfolio_path(tmp_path, example_portfolio_path):
+    path = tmp_path / "portfolio.json"
+    shutil.copy(example_portfolio_path, path)
+    return path
+
+
+@pytest.fixture
+def url(portfolio_path):
+    httpd = server.make_server(portfolio_path, ("127.0.0.1", 0))
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    host, port = httpd.server_address[:2]
+    yield f"http://{host}:{port}"
+    httpd.shutdown()
+    thread.join()
+    httpd.server_close()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def test_watched_reload(portfolio_path, example_portfolio):
+    watched = server.WatchedPortfolio(portfolio_path)
+    pf = watched.portfolio()
+    assert pf == example_portfolio
+    assert watched.portfolio() is pf
+
+    example_portfolio.holdings[0].units = 2.0
+    example_portfolio.save(portfolio_path, silent=True)
+    stat = os.stat(portfolio_path)
+    os.utime(portfolio_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    reloaded = watched.portfolio()
+    assert reloaded is not pf
+    assert reloaded.holdings[0].units == 2.0
+
+
+def test_watched_refresh(portfolio_path, example_portfolio):
+    watched = server.WatchedPortfolio(portfolio_path)
+    pf = watched.portfolio()
+    provider = providers.MemoryProvider({"VGOV": (16.54, "2023-01-20")})
+    refreshed, errors = watched.refresh(provider=provider)
+    assert errors[0] is not None and errors[1] is None
+    assert refreshed.holdings[1].fund.price == 16.54
+    # the earlier snapshot is left unchanged
+    assert pf.holdings[1].fund.price == 18.58
+    assert watched.portfolio().holdings[1].fund.price == 16.54
+
+    # refreshed prices survive a reload of the file, unless it has newer ones
+    example_portfolio.save(portfolio_path, silent=True)
+    stat = os.stat(portfolio_path)
+    os.utime(portfolio_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    fund = watched.portfolio().holdings[1].fund
+    assert (fund.price, fund.date) == (16.54, datetime.date(2023, 1, 20))
+
+
+def test_serve_portfolio(url, example_portfolio):
+    body = get(f"{url}/portfolio")
+    assert body["total_value"] == pytest.approx(example_portfolio.total_value())
+    assert [h["units"] for h in body["holdings"]] == [1.0, 10.0]
+
+
+def test_serve_rebalance(url, example_portfolio):
+    buy, sell = example_portfolio.trade_to_target()
+    body = get(f"{url}/rebalance")
+    assert [h["units"] for h in body["buy"]] == [h.units for h in buy]
+    assert [h["units"] for h in body["sell"]] == [h.units for h in sell]
+    assert "cash" not in body
+
+    body = get(f"{url}/rebalance?cash=100&buy_only=1")
+    assert body["sell"] == []
+    spent = sum(h["units"] * h["fund"]["price"] for h in body["buy"])
+    assert body["cash"] == pytest.approx(100.0 - spent)
+    # the ETF is bought in whole units
+    assert [h["units"] for h in body["buy"]][1] == 4.0
+
+
+def test_serve_errors(url):
+    with pytest.raises(urllib.error.HTTPError) as info:
+        get(f"{url}/rebalance?cash=lots")
+    assert info.value.code == 400
+    with pytest.raises(urllib.error.HTTPError) as info:
+        get(f"{url}/unknown")
+    assert info.value.code == 404
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["cash=inf", "cash=nan", "cash=-1e9", "min_trade=-1", "lot_size=VGOV=inf"],
+)
+def test_serve_invalid(url, query):
+    with pytest.raises(urllib.error.HTTPError) as info:
+        get(f"{url}/rebalance?{query}")
+    assert info.value.code == 400
+    assert "non-negative number" in json.load(info.value)["error"]
+
+
+def test_serve_internal_error(url, portfolio_path, example_portfolio):
+    # a zero price cannot be rebalanced
+    example_portfolio.holdings[0].fund.update_price(0.0)
+    example_portfolio.save(portfolio_path, silent=True)
+    stat = os.stat(portfolio_path)
+    os.utime(portfolio_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with pytest.raises(urllib.error.HTTPError) as info:
+        get(f"{url}/rebalance")
+    assert info.value.code == 500
+    assert "error" in json.load(info.value)
+    assert get(f"{url}/portfolio")["total_value"] == pytest.approx(18.58 * 10)
+
+
+def test_serve_cli_conflict(capsys, example_portfolio_path):
+    with pytest.raises(SystemExit):
+        cli.main([str(example_portfolio_path), "--serve", "8000", "-r"])
+    assert "cannot be combined" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        cli.main([str(example_portfolio_path), "--refresh-interval", "60"])
+    assert "requires --serve" in capsys.readouterr().err
@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+
+import lisatools
+from lisatools.store import PriceStore
+
+
+@pytest.fixture
+def store(ft_history):
+    store = PriceStore(":memory:")
+    store.append_history("GB00BD3RZ582", ft_history)
+    store.append(
+        [
+            ("IE00B42WWV65", "2023-01-16", 16.50),
+            ("IE00B42WWV65", datetime.date(2023, 1, 19), 16.54),
+        ]
+    )
+    return store
+
+
+def test_store_append_only(store):
+    assert len(store) == 6
+    assert store.append([("IE00B42WWV65", "2023-01-19", 99.0)]) == 0
+    assert store.append([("IE00B42WWV65", "2023-01-20", 16.60)]) == 1
+    assert store.prices_as_of(["IE00B42WWV65"], "2023-01-19") == {
+        "IE00B42WWV65": (16.54, datetime.date(2023, 1, 19))
+    }
+
+
+def test_store_persistent(tmp_path):
+    path = tmp_path / "history.sqlite"
+    store = PriceStore(path)
+    store.append([("IE00B42WWV65", "2023-01-16", 16.50)])
+    store.close()
+    assert len(PriceStore(path)) == 1
+
+
+def test_store_history(store, ft_history):
+    assert store.history("GB00BD3RZ582").close == ft_history.close
+    history = store.history("GB00BD3RZ582", start="2023-01-18", end="2023-01-19")
+    assert history.dates == [datetime.date(2023, 1, 18), datetime.date(2023, 1, 19)]
+    assert len(store.history("XS0000000000")) == 0
+
+
+def test_store_prices_as_of(store):
+    prices = store.prices_as_of(
+        ["GB00BD3RZ582", "IE00B42WWV65", "XS0000000000"], "2023-01-18"
+    )
+    assert prices == {
+        "GB00BD3RZ582": (1180.75, datetime.date(2023, 1, 18)),
+        "IE00B42WWV65": (16.50, datetime.date(2023, 1, 16)),
+    }
+    assert store.prices_as_of(["IE00B42WWV65"], "2023-01-15") == {}
+    many = [f"XS{i:010d}" for i in range(1200)] + ["IE00B42WWV65"]
+    assert list(store.prices_as_of(many, "2023-01-20")) == ["IE00B42WWV65"]
+
+
+def test_store_portfolio_as_of(store, two_fund_6040, ftse_global):
+    pf = store.portfolio_as_of(two_fund_6040, "2023-01-19")
+    assert pf.total_value() == pytest.approx(179.02 + 5 * 16.54)
+    assert pf[0].fund.date == datetime.date(2023, 1, 19)
+    assert ftse_global.price == 172.14
+    with pytest.raises(LookupError):
+        store.portfolio_as_of(two_fund_6040, "2023-01-15")
+
+
+def test_store_record(two_fund_6040):
+    store = PriceStore(":memory:")
+    two_fund_6040.add_fund(lisatools.Fund("Cash", 1.0), target=0.0)
+    assert store.record(two_fund_6040) == 2
+    assert store.portfolio_as_of(two_fund_6040[:2], "2022-11-21") == two_fund_6040[:2]
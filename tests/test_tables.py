@@ -0,0 +1,50 @@
+import pytest
+
+from lisatools import tables
+
+
+@pytest.fixture
+def ft_history_table():
+    columns = ["Date", "Open", "High", "Low", "Close", "Volume"]
+    rows = [
+        ["Friday, January 20, 2023", "180.49", "180.49", "180.49", "180.49", "1,250"],
+        ["Thursday, January 19, 2023", "179.02", "179.02", "179.02", "179.02", "0"],
+        [
+            "Wednesday, January 18, 2023",
+            "1,180.75",
+            "1,181.00",
+            "1,179.50",
+            "1,180.75",
+            "--",
+        ],
+        ["Tuesday, January 17, 2023", "181.36", "181.36", "181.36", "181.36", "2.5m"],
+    ]
+    return tables.HistoryTable(columns, rows)
+
+
+@pytest.mark.parametrize("backend", tables.available_backends())
+def test_extract_table(ft_history_html, ft_history_table, backend):
+    table = tables.extract_table(ft_history_html.decode(), backend=backend)
+    assert table == ft_history_table
+
+
+@pytest.mark.parametrize("backend", [None] + tables.available_backends())
+def test_extract_table_missing(backend):
+    content = "<html><body><table><tr><td>1.0</td></tr></table></body></html>"
+    assert tables.extract_table(content, backend=backend) is None
+
+
+def test_extract_table_first():
+    content = """
+    <table class="other"><tr><td>ignored</td></tr></table>
+    <table class="mod-ui-table mod-tearsheet-historical-prices__results">
+    <thead><tr><th>Date</th><th>Close</th></tr></thead>
+    <tbody>
+    <tr><td>Monday, January 2, 2023</td><td>1.0</td></tr>
+    </tbody>
+    </table>
+    <table class="mod-tearsheet-historical-prices__results"><tbody><tr><td>2</td></tr>
+    """
+    table = tables.extract_table(content, backend="html.parser")
+    assert table.columns == ["Date", "Close"]
+    assert table.rows == [["Monday, January 2, 2023", "1.0"]]